@@ -0,0 +1,58 @@
+"""
+Benchmark suite for the merchant hot paths.
+
+    python -m benchmarks                    # run and compare with baselines.json
+    python -m benchmarks --update-baseline  # store the results as the new baseline
+
+Exits with status 1 when a benchmark's CPU time or allocations per call
+exceed its baseline by more than ``--threshold``, or ``--throughput-threshold``
+for the end-to-end benchmarks against the simulator, whose timings depend on
+the scheduling of two processes and are noisier. CPU time is compared relative to a calibration workload,
+so baselines don't depend on the machine.
+"""
+import argparse
+import asyncio
+import sys
+
+from . import micro, throughput
+from .harness import calibrate, load_baselines, regressions, save_baselines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed regression, 0.5 = +50%%")
+    parser.add_argument(
+        "--throughput-threshold", type=float, default=1.0, help="allowed regression of the throughput benchmarks"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--skip-throughput", action="store_true", help="only run the in-process benchmarks")
+    parser.add_argument("--ops", type=int, default=500, help="calls per throughput benchmark")
+    args = parser.parse_args()
+
+    micro_results = micro.run()
+    throughput_results = [] if args.skip_throughput else asyncio.run(throughput.run(args.ops))
+    results = micro_results + throughput_results
+
+    print(f"Calibration: {calibrate():.2f} us")
+    print(f"{'benchmark':<36} {'ops/s':>10} {'cpu us/op':>10} {'cpu rel':>8} {'KiB/op':>8} {'blocks/op':>10}")
+    for result in results:
+        print(
+            f"{result.name:<36} {result.throughput:>10.0f} {result.cpu_us:>10.1f} {result.cpu_rel:>8.2f} "
+            f"{result.alloc_kb:>8.2f} {result.alloc_blocks:>10.1f}"
+        )
+
+    if args.update_baseline:
+        save_baselines(results)
+        print("Baseline updated")
+        return
+
+    baselines = load_baselines()
+    failures = regressions(micro_results, baselines, args.threshold)
+    failures += regressions(throughput_results, baselines, args.throughput_threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Measurement helpers and baseline handling for the benchmark suite.
+
+CPU time is compared in calibration units: the per-call time divided by
+the time of a fixed pure-Python workload measured right before and after
+each timing pass. So baselines recorded on one machine hold on a faster or
+slower one, and on a machine whose speed drifts during the run.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gc
+import json
+import time
+import tracemalloc
+import typing
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+BASELINES = Path(__file__).with_name("baselines.json")
+# Timing passes per synchronous benchmark, the fastest one counts
+REPEAT = 5
+ASYNC_REPEAT = 3
+
+_CALIBRATION_DATA = {"id": "0f0f0f0f", "amount": {"value": "100.00", "currency": "RUB"}, "items": list(range(20))}
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    # Operations per wall-clock second
+    throughput: float
+    # CPU microseconds per operation
+    cpu_us: float
+    # Allocated kilobytes and blocks per operation
+    alloc_kb: float
+    alloc_blocks: float
+    # CPU time in calibration units, see ``calibrate``
+    cpu_rel: float = 0.0
+
+
+def _allocations(snapshot_before: tracemalloc.Snapshot, snapshot_after: tracemalloc.Snapshot) -> tuple[int, int]:
+    size = blocks = 0
+    for stat in snapshot_after.compare_to(snapshot_before, "filename"):
+        size += max(stat.size_diff, 0)
+        blocks += max(stat.count_diff, 0)
+    return size, blocks
+
+
+def _calibration_workload() -> object:
+    data = json.loads(json.dumps(_CALIBRATION_DATA))
+    return sorted(f"{key}={value}" for key, value in data.items())
+
+
+def calibrate(ops: int = 500) -> float:
+    """CPU microseconds per call of the reference workload, right now."""
+    started = time.process_time()
+    for _ in range(ops):
+        _calibration_workload()
+    return (time.process_time() - started) / ops * 1e6
+
+
+class _Timer:
+    """Fastest of several timing passes, each relative to a calibration taken around it."""
+
+    def __init__(self, ops: int) -> None:
+        self.ops = ops
+        self.wall = self.cpu = self.rel = float("inf")
+
+    @contextlib.contextmanager
+    def measure(self) -> typing.Iterator[None]:
+        before = calibrate()
+        wall, cpu = time.perf_counter(), time.process_time()
+        yield
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        calibration = min(before, calibrate())
+        cpu_us = cpu / self.ops * 1e6
+        self.wall = min(self.wall, wall)
+        self.cpu = min(self.cpu, cpu_us)
+        self.rel = min(self.rel, cpu_us / calibration if calibration else float("inf"))
+
+
+def bench_sync(name: str, func: Callable[[], object], ops: int = 2000) -> Result:
+    """Benchmark a synchronous hot path."""
+    for _ in range(min(ops, 100)):
+        func()
+    gc.collect()
+    timer = _Timer(ops)
+    for _ in range(REPEAT):
+        with timer.measure():
+            for _ in range(ops):
+                func()
+
+    # Allocations are measured in a separate pass, tracing skews timings
+    keep = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(min(ops, 200)):
+        keep.append(func())
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size, blocks = _allocations(before, after)
+    traced = min(ops, 200)
+    return Result(name, ops, ops / timer.wall, timer.cpu, size / traced / 1024, blocks / traced, timer.rel)
+
+
+async def bench_async(
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        ops: int = 500,
+        concurrency: int = 1,
+) -> Result:
+    """Benchmark a coroutine, ``concurrency`` calls in flight at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await func()
+
+    await asyncio.gather(*(one() for _ in range(min(ops, 20))))
+    gc.collect()
+    timer = _Timer(ops)
+    for _ in range(ASYNC_REPEAT):
+        with timer.measure():
+            await asyncio.gather(*(one() for _ in range(ops)))
+
+    traced = min(ops, 100)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = await asyncio.gather(*(func() for _ in range(traced)))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size, blocks = _allocations(before, after)
+    del keep
+    return Result(name, ops, ops / timer.wall, timer.cpu, size / traced / 1024, blocks / traced, timer.rel)
+
+
+def load_baselines(path: Path = BASELINES) -> dict[str, dict]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baselines(results: list[Result], path: Path = BASELINES) -> None:
+    data = load_baselines(path)
+    for result in results:
+        data[result.name] = {"cpu_rel": round(result.cpu_rel, 3), "alloc_kb": round(result.alloc_kb, 3)}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def regressions(results: list[Result], baselines: dict[str, dict], threshold: float) -> list[str]:
+    """
+    Results whose relative CPU time or allocations exceed the baseline by
+    more than ``threshold``.
+    """
+    failures = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        if baseline is None:
+            continue
+        for metric in ("cpu_rel", "alloc_kb"):
+            if metric not in baseline:
+                continue
+            limit = baseline[metric] * (1 + threshold)
+            value = getattr(result, metric)
+            if baseline[metric] and value > limit:
+                failures.append(f"{result.name}: {metric} {value:.2f} > {limit:.2f} (baseline {baseline[metric]})")
+    return failures
+
+
+def as_dict(result: Result) -> dict:
+    return asdict(result)
@@ -0,0 +1,121 @@
+"""CPU and allocation cost of the library's own hot paths, without I/O."""
+from __future__ import annotations
+
+import datetime
+import json
+import uuid
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.payok.aiopayok import Payok
+from multi_merchant.merchants.usdt import TransactionResponse, TransactionStatusResponse
+from multi_merchant.merchants.yookassa.merchant import YooPayment, YooPaymentRequest, YooPaymentStatus
+from multi_merchant.models.draft import InvoiceDraft
+
+from .harness import Result, bench_sync
+from .models import BenchInvoice
+
+YOO_PAYMENT = {
+    "id": str(uuid.uuid4()),
+    "status": "pending",
+    "paid": False,
+    "amount": {"value": "100.00", "currency": "RUB"},
+    "confirmation": {"type": "redirect", "confirmation_url": "https://yoomoney.ru/checkout/payments/v2/contract"},
+    "created_at": "2024-04-04T10:00:00.000Z",
+    "description": "Product 100 RUB",
+    "recipient": {"account_id": "100500", "gateway_id": "100700"},
+    "refundable": False,
+    "test": False,
+    "metadata": {},
+}
+
+TRANSFER = {
+    "amount": 10.0,
+    "blockHash": "0" * 64,
+    "challengeStatus": "",
+    "from": "TSender",
+    "height": "60000000",
+    "isFromContract": False,
+    "isToContract": False,
+    "l1OriginHash": "",
+    "methodId": "a9059cbb",
+    "state": "success",
+    "to": "TReceiver",
+    "tokenContractAddress": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+    "tokenId": "",
+    "transactionSymbol": "USDT",
+    "transactionTime": "1712178000000",
+    "txFee": "0",
+    "txId": "f" * 64,
+}
+
+OKLINK_RESPONSE = {
+    "code": "0",
+    "data": [{
+        "chainFullName": "TRON",
+        "chainShortName": "TRON",
+        "limit": "50",
+        "page": "1",
+        "totalPage": "1",
+        "transactionLists": [TRANSFER] * 50,
+    }],
+}
+
+
+def run_sync(coro):
+    """Run a coroutine that never suspends."""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("Coroutine suspended")
+
+
+def run() -> list[Result]:
+    payok = Payok(1, "api_key", "secret", 1)
+    expire_at = datetime.datetime.now() + datetime.timedelta(hours=1)
+    yoo_payment_json = json.dumps(YOO_PAYMENT).encode()
+    oklink_json = json.dumps(OKLINK_RESPONSE).encode()
+    return [
+        bench_sync(
+            "yookassa.create_payment",
+            lambda: YooPaymentRequest.create_payment(100, "RUB", return_url="https://t.me/", description="Product"),
+        ),
+        bench_sync("yookassa.parse_payment", lambda: YooPayment(**YOO_PAYMENT)),
+        bench_sync("yookassa.parse_status", lambda: YooPaymentStatus.model_validate_json(yoo_payment_json)),
+        bench_sync("usdt.parse_transactions", lambda: TransactionResponse(**OKLINK_RESPONSE), ops=300),
+        bench_sync(
+            "usdt.parse_status",
+            lambda: TransactionStatusResponse.model_validate_json(oklink_json),
+            ops=300,
+        ),
+        bench_sync(
+            "payok.create_pay",
+            lambda: run_sync(payok.create_pay(100, uuid.uuid4().hex, "RUB", desc="Order")),
+        ),
+        bench_sync(
+            "invoice.construct",
+            lambda: BenchInvoice(
+                user_id=1,
+                amount=100.0,
+                currency="RUB",
+                invoice_id="0f0f0f0f",
+                pay_url="https://example.com/pay",
+                description="Order",
+                merchant=MerchantEnum.YOOKASSA,
+                expire_at=expire_at,
+            ),
+        ),
+        bench_sync(
+            "invoice.draft",
+            lambda: InvoiceDraft(
+                user_id=1,
+                amount=100.0,
+                currency="RUB",
+                invoice_id="0f0f0f0f",
+                pay_url="https://example.com/pay",
+                description="Order",
+                merchant=MerchantEnum.YOOKASSA,
+                expire_at=expire_at,
+            ),
+        ),
+    ]
@@ -0,0 +1,12 @@
+"""Concrete invoice model for benchmarks, as an application would declare it."""
+from sqlalchemy.orm import DeclarativeBase
+
+from multi_merchant.models.invoice import Invoice
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class BenchInvoice(Invoice, Base):
+    __tablename__ = "bench_invoices"
@@ -0,0 +1,51 @@
+"""
+Payok error handling cost versus heap size.
+
+Raises and catches ``PayokAPIError(code)`` with an increasingly large heap
+of live objects. With the interned exception-class registry the cost per
+error stays flat; the old ``gc.get_objects()`` lookup grew linearly.
+
+    python -m benchmarks.payok_errors
+"""
+import argparse
+import time
+
+from multi_merchant.merchants.payok.aiopayok.exceptions import PayokAPIError
+
+CODES = (1, 2, 3, 4, 5, 6, 7, 8)
+
+
+def raise_and_catch(code: int) -> None:
+    try:
+        raise PayokAPIError(code, "error")
+    except PayokAPIError(code):
+        pass
+
+
+def measure(iterations: int) -> float:
+    """Mean seconds per raise/catch."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        raise_and_catch(CODES[i % len(CODES)])
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--heap", type=int, nargs="+", default=[0, 100_000, 1_000_000, 3_000_000])
+    args = parser.parse_args()
+
+    classes_before = {PayokAPIError(code) for code in CODES}
+    print(f"{'heap objects':>14} {'us / error':>12}")
+    for size in args.heap:
+        ballast = [object() for _ in range(size)]
+        print(f"{size:>14} {measure(args.iterations) * 1e6:>12.2f}")
+        del ballast
+
+    classes_after = {PayokAPIError(code) for code in CODES}
+    assert classes_before == classes_after, "exception classes must keep a stable identity"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Create/status throughput per merchant against the provider simulator."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import socket
+import sys
+import tempfile
+import typing
+
+import aiohttp
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.cryptocloud import CryptoCloud
+from multi_merchant.merchants.payok.merchant import PayokPay
+from multi_merchant.merchants.usdt import USDT
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+from multi_merchant.simulator import LatencyProfile, ProviderProfile, SimulatorConfig
+
+from .harness import Result, bench_async
+from .models import BenchInvoice
+
+CONCURRENCY = (1, 10, 50)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def simulator_process() -> typing.AsyncIterator[str]:
+    """
+    Simulator in a separate process, so CPU time measured here is the
+    client's only. Zero latency, payments complete immediately.
+    """
+    config = SimulatorConfig(
+        seed=1,
+        default=ProviderProfile(latency=LatencyProfile(distribution="constant", mean=0), pay_after=0),
+    )
+    port = _free_port()
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        file.write(config.model_dump_json())
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "multi_merchant.simulator", "--port", str(port), "--config", file.name,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                with contextlib.suppress(aiohttp.ClientError):
+                    async with session.get(f"{url}/_sim/stats"):
+                        break
+                await asyncio.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        await process.wait()
+
+
+async def run(ops: int = 500) -> list[Result]:
+    results = []
+    async with simulator_process() as url:
+        yookassa = YooKassa(
+            shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA,
+            create_url=f"{url}/yookassa/v3/payments",
+        )
+        cryptocloud = CryptoCloud(
+            shop_id="1", api_key="key", merchant=MerchantEnum.CRYPTO_CLOUD,
+            create_url=f"{url}/cryptocloud/v1/invoice/create",
+            status_url=f"{url}/cryptocloud/v1/invoice/info",
+        )
+        usdt = USDT(
+            api_key="key", address="TReceiver", merchant=MerchantEnum.NONE,
+            status_url=f"{url}/oklink/api/v5/explorer/address/transaction-list",
+        )
+        payok = PayokPay(api_id=1, secret="secret", api_key="key", shop_id="1", merchant=MerchantEnum.PAYOK)
+        payok.client.API_HOST = f"{url}/payok"
+
+        yookassa_invoice = await yookassa.create_invoice(1, 100, BenchInvoice)
+        cryptocloud_invoice = await cryptocloud.create_invoice(1, 100, BenchInvoice)
+        payok_invoice = await payok.create_invoice(1, 100, BenchInvoice)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(payok_invoice.pay_url):
+                pass
+            for _ in range(50):
+                await session.post(f"{url}/_sim/oklink/transfers", json={"to": "TReceiver", "amount": 10})
+
+        cases: dict[str, typing.Callable[[], typing.Awaitable]] = {
+            "yookassa.create_invoice": lambda: yookassa.create_invoice(1, 100, BenchInvoice),
+            "yookassa.is_paid": lambda: yookassa.is_paid(yookassa_invoice.invoice_id),
+            "cryptocloud.create_invoice": lambda: cryptocloud.create_invoice(1, 100, BenchInvoice),
+            "cryptocloud.is_paid": lambda: cryptocloud.is_paid(cryptocloud_invoice.invoice_id),
+            "payok.is_paid": lambda: payok.is_paid(payok_invoice.invoice_id),
+            "usdt.is_paid": lambda: usdt.is_paid("10"),
+            "make_request": lambda: yookassa.make_request("GET", f"{url}/_sim/stats"),
+        }
+        for name, case in cases.items():
+            for concurrency in CONCURRENCY:
+                results.append(await bench_async(f"{name}[c={concurrency}]", case, ops, concurrency))
+
+        for merchant in (yookassa, cryptocloud, usdt):
+            await merchant.close_session()
+        await payok.client.get_session().close()
+    return results
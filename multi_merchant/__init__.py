@@ -1,31 +1,56 @@
-from typing import Annotated
+import typing
 
-from pydantic import Field
 from multi_merchant.merchants.base import BaseMerchant, MerchantEnum, MerchantUnion
-from multi_merchant.merchants.aaio.merchant import AaioPay
-from multi_merchant.merchants.betatransfer import BetaTransferPay
-from multi_merchant.merchants.cryptocloud import CryptoCloud
-from multi_merchant.merchants.cryptomus import Cryptomus
-from multi_merchant.merchants.cryptopay import CryptoPay
-from multi_merchant.merchants.payok.merchant import PayokPay
-from multi_merchant.merchants.qiwi import Qiwi
-from multi_merchant.merchants.yookassa.merchant import YooKassa
-from multi_merchant.merchants.yoomoney.merchant import YooMoney
+from multi_merchant.merchants.registry import (
+    MERCHANT_NAMES,
+    build_merchant_annotated,
+    get_merchant_class,
+)
+from multi_merchant.models.draft import InvoiceDraft
 from multi_merchant.models.invoice import Invoice, Currency, Status
 
+if typing.TYPE_CHECKING:
+    from pydantic import Field
+
+    from multi_merchant.merchants.aaio.merchant import AaioPay
+    from multi_merchant.merchants.betatransfer import BetaTransferPay
+    from multi_merchant.merchants.cryptocloud import CryptoCloud
+    from multi_merchant.merchants.cryptomus import Cryptomus
+    from multi_merchant.merchants.cryptopay import CryptoPay
+    from multi_merchant.merchants.payok.merchant import PayokPay
+    from multi_merchant.merchants.qiwi import Qiwi
+    from multi_merchant.merchants.yookassa.merchant import YooKassa
+    from multi_merchant.merchants.yoomoney.merchant import YooMoney
+
+    MerchantAnnotated = typing.Annotated[
+        Qiwi
+        | YooKassa
+        | YooMoney
+        | CryptoPay
+        | CryptoCloud
+        | Cryptomus
+        | BetaTransferPay
+        | PayokPay
+        | AaioPay,
+        Field(discriminator="merchant"),
+    ]
+
+
+def __getattr__(name: str) -> typing.Any:
+    # Merchants (and the union of all of them) are resolved lazily,
+    # so that importing the package does not import every SDK.
+    if name == "MerchantAnnotated":
+        value = build_merchant_annotated()
+    elif name in MERCHANT_NAMES:
+        value = get_merchant_class(MERCHANT_NAMES[name])
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
-MerchantAnnotated = Annotated[
-    Qiwi
-    | YooKassa
-    | YooMoney
-    | CryptoPay
-    | CryptoCloud
-    | Cryptomus
-    | BetaTransferPay
-    | PayokPay
-    | AaioPay,
-    Field(discriminator="merchant"),
-]
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
 
 
 BaseInvoice = Invoice
@@ -44,6 +69,9 @@ __all__ = (
     "PayokPay",
     "AaioPay",
     "BaseInvoice",
+    "InvoiceDraft",
     "Currency",
     "Status",
+    "build_merchant_annotated",
+    "get_merchant_class",
 )
@@ -0,0 +1,180 @@
+"""
+Admission control for outbound provider calls.
+
+Every merchant has its own ``AdmissionController`` (a bulkhead), so a
+backlog on one provider never takes slots of another. Inside it calls are
+admitted by priority lane:
+
+    Priority.INTERACTIVE  invoice creation for a waiting user
+    Priority.USER_CHECK   status check the user asked for
+    Priority.BACKGROUND   polling, pool refills, bulk runs
+
+``create_invoice`` runs as INTERACTIVE and ``is_paid`` as USER_CHECK unless
+the caller set a lane with ``priority(...)``. Background lanes may use only
+part of the slots, and their waiters are shed first under overload.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import math
+import typing
+from collections import Counter, deque
+from enum import IntEnum
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    USER_CHECK = 1
+    BACKGROUND = 2
+
+
+class Overloaded(Exception):
+    """The call was shed by admission control."""
+
+    def __init__(self, merchant: str, priority: Priority) -> None:
+        super().__init__(f"{merchant}: {priority.name.lower()} call shed under overload")
+        self.merchant = merchant
+        self.priority = priority
+
+
+_priority: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar("priority", default=None)
+
+
+def current_priority() -> Priority:
+    return _priority.get() or Priority.INTERACTIVE
+
+
+@contextlib.contextmanager
+def priority(value: Priority) -> Iterator[None]:
+    """Run calls made inside the block in the ``value`` lane."""
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def with_default_priority(value: Priority, func: Callable[..., typing.Awaitable[T]]) -> Callable[..., typing.Awaitable[T]]:
+    """Run ``func`` in the ``value`` lane unless the caller picked one."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        if _priority.get() is not None:
+            return await func(*args, **kwargs)
+        token = _priority.set(value)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _priority.reset(token)
+
+    return wrapper
+
+
+class AdmissionController:
+    """
+    Concurrency limit with priority lanes for one merchant.
+
+    At most ``limit`` calls run at once. Freed slots go to the highest
+    waiting lane first. ``lane_shares`` caps the slots a lane may hold:
+    background gets half by default, so interactive calls always find
+    room. A lane with ``max_waiting`` waiters rejects new calls with
+    ``Overloaded``. When waiters of higher lanes pile up beyond ``limit``,
+    the background waiters are shed.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            limit: int = 20,
+            lane_shares: dict[Priority, float] | None = None,
+            max_waiting: dict[Priority, int] | None = None,
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        shares = {Priority.INTERACTIVE: 1.0, Priority.USER_CHECK: 0.8, Priority.BACKGROUND: 0.5}
+        shares.update(lane_shares or {})
+        self.lane_limits = {lane: max(math.floor(limit * share), 1) for lane, share in shares.items()}
+        waiting = {Priority.INTERACTIVE: 10 * limit, Priority.USER_CHECK: 5 * limit, Priority.BACKGROUND: limit}
+        waiting.update(max_waiting or {})
+        self.max_waiting = waiting
+        self.in_flight = 0
+        self.admitted: Counter[Priority] = Counter()
+        self.shed: Counter[Priority] = Counter()
+        self._lane_in_flight: Counter[Priority] = Counter()
+        self._waiters: dict[Priority, deque[asyncio.Future]] = {lane: deque() for lane in Priority}
+
+    def waiting(self, lane: Priority | None = None) -> int:
+        if lane is not None:
+            return len(self._waiters[lane])
+        return sum(map(len, self._waiters.values()))
+
+    @contextlib.asynccontextmanager
+    async def slot(self, lane: Priority | None = None) -> typing.AsyncIterator[None]:
+        lane = current_priority() if lane is None else lane
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    async def acquire(self, lane: Priority) -> None:
+        if self._can_run(lane) and not any(self._waiters[p] for p in Priority if p <= lane):
+            self._admit(lane)
+            return
+        if len(self._waiters[lane]) >= self.max_waiting[lane]:
+            self.shed[lane] += 1
+            raise Overloaded(self.name, lane)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(waiter)
+        if lane < Priority.BACKGROUND and self.waiting() - self.waiting(Priority.BACKGROUND) > self.limit:
+            self._shed_background()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # Admitted and cancelled at once: hand the slot on
+                self.release(lane)
+            else:
+                with contextlib.suppress(ValueError):
+                    self._waiters[lane].remove(waiter)
+            raise
+
+    def release(self, lane: Priority) -> None:
+        self.in_flight -= 1
+        self._lane_in_flight[lane] -= 1
+        self._wake()
+
+    def _can_run(self, lane: Priority) -> bool:
+        return self.in_flight < self.limit and self._lane_in_flight[lane] < self.lane_limits[lane]
+
+    def _admit(self, lane: Priority) -> None:
+        self.in_flight += 1
+        self._lane_in_flight[lane] += 1
+        self.admitted[lane] += 1
+
+    def _wake(self) -> None:
+        for lane in Priority:
+            waiters = self._waiters[lane]
+            while waiters and self._can_run(lane):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(lane)
+                waiter.set_result(None)
+            if self.in_flight >= self.limit:
+                return
+
+    def _shed_background(self) -> None:
+        waiters = self._waiters[Priority.BACKGROUND]
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                self.shed[Priority.BACKGROUND] += 1
+                waiter.set_exception(Overloaded(self.name, Priority.BACKGROUND))
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from . import tracing
+from .admission import Priority, priority
+from .models.draft import InvoiceDraft
+
+if typing.TYPE_CHECKING:
+    from .merchants.base import Amount, BaseMerchant, InvoiceT
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceRequest:
+    user_id: int
+    amount: Amount
+    currency: Optional[str] = None
+    description: Optional[str] = None
+    # Merchant specific create_invoice arguments
+    options: dict[str, Any] = field(default_factory=dict)
+
+    def create_kwargs(self) -> dict[str, Any]:
+        kwargs = dict(self.options)
+        if self.currency is not None:
+            kwargs["currency"] = self.currency
+        if self.description is not None:
+            kwargs["description"] = self.description
+        return kwargs
+
+
+@dataclass(slots=True)
+class BulkResult:
+    request: InvoiceRequest
+    invoice: Optional[InvoiceDraft] = None
+    error: Optional[BaseException] = None
+    # Whether the invoice was inserted by the bulk run
+    persisted: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+_FLUSH = object()
+
+
+class RateLimiter:
+    """Spaces calls ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        at = max(now, self._next_at)
+        self._next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+async def create_invoices_bulk(
+        merchant: BaseMerchant,
+        requests: Iterable[InvoiceRequest],
+        InvoiceClass: typing.Type[InvoiceT],
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        concurrency: int = 10,
+        rate_limit: float | None = None,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        lane: Priority = Priority.BACKGROUND,
+) -> AsyncIterator[BulkResult]:
+    """
+    Create many invoices, yielding results as they complete.
+
+    At most ``concurrency`` provider calls run at once, started at most
+    ``rate_limit`` per second. With ``session_factory`` created invoices are
+    inserted in multi-row batches of up to ``batch_size`` (or whatever
+    completed within ``flush_interval``), each in its own transaction, and
+    yielded once inserted. Results carry ``InvoiceDraft`` objects, convert
+    them with ``to_invoice`` when an ORM object is needed. Failures, of the
+    provider call or of the insert, are reported on their result and don't
+    stop the run. Calls run in the ``lane`` admission lane, so interactive
+    checkouts keep priority over the run.
+    """
+    queue: asyncio.Queue[Optional[BulkResult]] = asyncio.Queue(concurrency * 2)
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    pending = iter(requests)
+
+    async def worker() -> None:
+        for request in pending:
+            if limiter is not None:
+                await limiter.wait()
+            try:
+                with priority(lane):
+                    invoice = await merchant.create_invoice(
+                        request.user_id, request.amount, InvoiceDraft, **request.create_kwargs()
+                    )
+                result = BulkResult(request, invoice)
+            except Exception as e:
+                result = BulkResult(request, error=e)
+            await queue.put(result)
+
+    async def produce() -> None:
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    batch: list[BulkResult] = []
+    batch_started = 0.0
+    try:
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(batch_started + flush_interval - time.monotonic(), 0)
+            try:
+                result = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Flush what completed within flush_interval
+                result = _FLUSH
+            if isinstance(result, BulkResult):
+                if not result.ok or session_factory is None:
+                    yield result
+                    continue
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(result)
+                if len(batch) < batch_size:
+                    continue
+            if batch:
+                for persisted in await _persist(session_factory, InvoiceClass, batch):
+                    yield persisted
+                batch = []
+            if result is None:
+                break
+    finally:
+        producer.cancel()
+
+
+async def _persist(
+        session_factory: async_sessionmaker[AsyncSession],
+        InvoiceClass: typing.Type[InvoiceT],
+        batch: list[BulkResult],
+) -> list[BulkResult]:
+    with tracing.span("bulk.insert", size=len(batch)):
+        try:
+            async with session_factory() as session, session.begin():
+                await InvoiceDraft.insert_many(session, InvoiceClass, [result.invoice for result in batch])
+        except Exception as e:
+            for result in batch:
+                result.error = e
+            return batch
+    for result in batch:
+        result.persisted = True
+    return batch
@@ -0,0 +1,12 @@
+from .recorder import TrafficRecorder, get_recorder, install, load_records, redact
+
+# The replay server lives in ``multi_merchant.capture.replay``; it is not
+# imported here because ``make_request`` imports this package on startup.
+
+__all__ = (
+    "TrafficRecorder",
+    "get_recorder",
+    "install",
+    "load_records",
+    "redact",
+)
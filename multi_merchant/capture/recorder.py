@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+import typing
+from typing import Any, Iterator, Optional
+
+from aiohttp import ClientResponse
+from loguru import logger
+
+# Request/response fields whose values never reach the capture file
+SENSITIVE_KEYS = re.compile(
+    r"(key|secret|token|sign|pass|auth|api_id|email|phone|card|account)", re.IGNORECASE
+)
+REDACTED = "***"
+# Writer thread command to flush the file
+_FLUSH: dict = {}
+
+_recorder: Optional["TrafficRecorder"] = None
+
+
+def get_recorder() -> Optional["TrafficRecorder"]:
+    return _recorder
+
+
+def install(recorder: Optional["TrafficRecorder"]) -> None:
+    """Record every merchant HTTP exchange with ``recorder`` (None to stop)."""
+    global _recorder
+    _recorder = recorder
+
+
+def redact(value: Any, pattern: re.Pattern = SENSITIVE_KEYS) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if isinstance(k, str) and pattern.search(k) else redact(v, pattern)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(v, pattern) for v in value]
+    return value
+
+
+class TrafficRecorder:
+    """
+    Append-only capture of merchant HTTP exchanges.
+
+    One JSON object per line with short keys (gzip members when the path
+    ends with ``.gz``):
+
+        t     request start, unix time
+        src   merchant or client name
+        m, u  method and URL without the query string
+        q, b  sanitized query parameters and request body
+        s, r  response status and sanitized body
+        ttfb  seconds to response headers
+        d     seconds to the full body
+
+    Keys matching ``redact_pattern`` are replaced in requests and in JSON
+    response bodies, and request headers are not stored at all.
+
+    Records are serialized and written by a background thread, so file
+    and gzip I/O never runs on the event loop. When ``queue_size`` records
+    are waiting new ones are dropped and counted.
+    """
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            redact_pattern: re.Pattern = SENSITIVE_KEYS,
+            flush_every: int = 100,
+            queue_size: int = 10_000,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.redact_pattern = redact_pattern
+        self.flush_every = flush_every
+        self.records = 0
+        self.dropped = 0
+        if self.path.endswith(".gz"):
+            self._file: typing.IO[str] = gzip.open(self.path, "at", encoding="utf-8")
+        else:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._queue: queue.Queue[Optional[dict]] = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = threading.Thread(
+            target=self._run, name="multi-merchant-capture", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> typing.Self:
+        install(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        install(None)
+        self.close()
+
+    def flush(self) -> None:
+        """Block until every queued record is written and flushed."""
+        if self._thread is not None:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        if not self._file.closed:
+            self._file.close()
+
+    async def capture(
+            self,
+            source: str,
+            method: str,
+            url: typing.Any,
+            request_kwargs: dict,
+            response: ClientResponse,
+            started_at: float,
+            started: float,
+    ) -> None:
+        """
+        Record an exchange whose response headers just arrived.
+
+        ``started_at`` is the unix time and ``started`` the ``perf_counter``
+        value taken right before the request was sent.
+        """
+        ttfb = time.perf_counter() - started
+        body = await response.read()
+        duration = time.perf_counter() - started
+        try:
+            self.write({
+                "t": round(started_at, 6),
+                "src": str(source),
+                "m": method.upper(),
+                "u": str(response.url.with_query(None)),
+                "q": self._sanitize(request_kwargs.get("params")),
+                "b": self._sanitize(request_kwargs.get("json", request_kwargs.get("data"))),
+                "s": response.status,
+                "r": self._sanitize_body(body),
+                "ttfb": round(ttfb, 6),
+                "d": round(duration, 6),
+            })
+        except Exception as e:
+            logger.warning(f"Failed to record {method} {url}: {e!r}")
+
+    def write(self, record: dict) -> None:
+        """Queue a record for the writer thread."""
+        if self._thread is None:
+            raise ValueError("Recorder is closed")
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None or record is _FLUSH:
+                    self._file.flush()
+                    if record is None:
+                        return
+                    continue
+                self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str))
+                self._file.write("\n")
+                self.records += 1
+                if self.records % self.flush_every == 0:
+                    self._file.flush()
+            except Exception as e:
+                logger.warning(f"Failed to write capture record: {e!r}")
+            finally:
+                self._queue.task_done()
+
+    def _sanitize(self, value: Any) -> Any:
+        if value is None:
+            return None
+        if not isinstance(value, (dict, list, tuple)):
+            try:
+                value = dict(value)
+            except (TypeError, ValueError):
+                return REDACTED
+        return redact(value, self.redact_pattern)
+
+    def _sanitize_body(self, body: bytes) -> Any:
+        try:
+            return redact(json.loads(body), self.redact_pattern)
+        except ValueError:
+            return body.decode("utf-8", "replace")
+
+
+def load_records(path: str | os.PathLike) -> Iterator[dict]:
+    """Read a capture file written by ``TrafficRecorder``."""
+    path = os.fspath(path)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import time
+import typing
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from aiohttp import web
+from yarl import URL
+
+from .recorder import load_records
+
+# Path segments that are ids: numbers, hex strings and uuids
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{16,}|INV-\w+)$")
+
+
+def path_template(path: str) -> str:
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+class ReplayServer:
+    """
+    Serves captured responses back.
+
+    Merchants are pointed at ``url_for(original_url)``. Responses are matched
+    by method and host/path (ids in the path are wildcards), served in
+    captured order and looped when exhausted. Each one is delayed by its
+    captured time to first byte divided by ``speed``.
+    """
+
+    def __init__(
+            self,
+            records: Iterable[dict] | str | os.PathLike,
+            speed: float = 1.0,
+            host: str = "127.0.0.1",
+            port: int = 0,
+    ) -> None:
+        if not 1 <= speed <= 100:
+            raise ValueError("Replay speed must be between 1 and 100")
+        if isinstance(records, (str, os.PathLike)):
+            records = load_records(records)
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.served = 0
+        self.missed = 0
+        self._responses: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._positions: dict[tuple[str, str], int] = defaultdict(int)
+        for record in records:
+            self._responses[self._key(record["m"], URL(record["u"]))].append(record)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url_for(self, original_url: str) -> str:
+        """Replay URL standing in for ``original_url``."""
+        original = URL(original_url)
+        return f"{self.url}/{original.host}{original.raw_path}".rstrip("/")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @staticmethod
+    def _key(method: str, url: URL) -> tuple[str, str]:
+        return method.upper(), path_template(f"/{url.host}{url.path}")
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        key = request.method, path_template(request.path)
+        responses = self._responses.get(key)
+        if not responses:
+            self.missed += 1
+            raise web.HTTPNotFound(text=f"No captured response for {key[0]} {key[1]}")
+
+        position = self._positions[key]
+        self._positions[key] = position + 1
+        record = responses[position % len(responses)]
+        await asyncio.sleep(record.get("ttfb", 0) / self.speed)
+        self.served += 1
+
+        body = record.get("r")
+        if isinstance(body, str):
+            return web.Response(text=body, status=record["s"])
+        return web.Response(
+            body=json.dumps(body, ensure_ascii=False),
+            status=record["s"],
+            content_type="application/json",
+        )
+
+
+async def replay_arrivals(
+        records: Iterable[dict],
+        handler: Callable[[dict], Awaitable[Any]],
+        speed: float = 1.0,
+) -> list[tuple[dict, float, Optional[BaseException]]]:
+    """
+    Call ``handler(record)`` following the captured arrival pattern.
+
+    Inter-arrival gaps are divided by ``speed``; handlers run concurrently.
+    Returns ``(record, latency, error)`` for every call.
+    """
+    if not 1 <= speed <= 100:
+        raise ValueError("Replay speed must be between 1 and 100")
+    records = sorted(records, key=lambda r: r["t"])
+    if not records:
+        return []
+    results: list[tuple[dict, float, Optional[BaseException]]] = []
+
+    async def run(record: dict) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            await handler(record)
+        except Exception as e:
+            error = e
+        results.append((record, time.perf_counter() - started, error))
+
+    first = records[0]["t"]
+    start = time.monotonic()
+    tasks = []
+    for record in records:
+        delay = (record["t"] - first) / speed - (time.monotonic() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(record)))
+    await asyncio.gather(*tasks)
+    return results
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import os
+import socket
+import typing
+import uuid
+import weakref
+from collections import defaultdict
+from typing import Awaitable, Callable, Mapping, NamedTuple, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from . import events, tracing
+from .admission import Priority, priority
+from .merchants.base import BaseMerchant, InvoiceT, MerchantEnum
+from .models.invoice import LeasedInvoice, Status
+from .models.replicas import note_core_writes
+
+# Dialects with ``SELECT ... FOR UPDATE SKIP LOCKED``
+SKIP_LOCKED_DIALECTS = frozenset({"postgresql", "mysql", "mariadb", "oracle"})
+
+OnPaid = Callable[[AsyncSession, typing.Any], Awaitable[None]]
+
+
+class _Claimed(NamedTuple):
+    id: int
+    invoice_id: str
+    user_id: int
+    merchant: Optional[MerchantEnum]
+    expire_at: Optional[datetime.datetime]
+    check_attempts: int
+
+
+def _now() -> datetime.datetime:
+    # Merchants write naive server-local times (``datetime.datetime.now()``)
+    # into naive columns, so the worker compares and writes the same way
+    return datetime.datetime.now()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class InvoiceCheckWorker:
+    """
+    Pending invoice checker that can run in any number of processes.
+
+    ``InvoiceClass`` must be a ``LeasedInvoice`` for the schedule columns.
+    Each round claims up to ``batch_size`` due invoices (``next_check_at``
+    in the past or unset, no live lease) by setting a lease for ``lease_time``
+    seconds, checks them with one ``check_paid_batch`` per merchant and
+    releases them. Paid invoices go through ``successfully_paid`` and
+    ``on_paid`` in a savepoint each: if ``on_paid`` fails, only that invoice
+    is rolled back and rechecked later. Expired ones become
+    ``Status.EXPIRED``. The rest are rescheduled with exponential backoff
+    from ``recheck_interval`` up to ``max_recheck_interval``. With a
+    ``SessionRouter``'s ``writer`` as ``session_factory`` the status
+    changes are routed like any other write.
+
+    On PostgreSQL/MySQL claims use ``SELECT ... FOR UPDATE SKIP LOCKED``,
+    so workers never wait for each other. Other databases (SQLite) claim
+    with a conditional UPDATE under a lock per event loop. Leases of a
+    crashed worker simply expire and the invoices are claimed again.
+    """
+
+    _fallback_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            InvoiceClass: typing.Type[InvoiceT],
+            merchants: Mapping[MerchantEnum, BaseMerchant],
+            on_paid: OnPaid | None = None,
+            worker_id: str | None = None,
+            batch_size: int = 100,
+            lease_time: float = 60,
+            recheck_interval: float = 10,
+            max_recheck_interval: float = 5 * 60,
+            idle_interval: float = 5,
+    ) -> None:
+        if not issubclass(InvoiceClass, LeasedInvoice):
+            raise TypeError(f"{InvoiceClass.__name__} must inherit LeasedInvoice to be checked by the worker")
+        self.session_factory = session_factory
+        self.InvoiceClass = InvoiceClass
+        self.merchants = merchants
+        self.on_paid = on_paid
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.lease_time = lease_time
+        self.recheck_interval = recheck_interval
+        self.max_recheck_interval = max_recheck_interval
+        self.idle_interval = idle_interval
+        self._skip_locked: Optional[bool] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def next_check_delay(self, attempts: int) -> float:
+        return min(self.recheck_interval * 2 ** min(attempts, 16), self.max_recheck_interval)
+
+    async def run_once(self) -> int:
+        """Claim and check one batch. Returns the number of claimed invoices."""
+        with tracing.span("check_worker.round", worker=self.worker_id) as current:
+            claimed = await self.claim()
+            if current is not None:
+                current.set_attribute("claimed", len(claimed))
+            if claimed:
+                await self.process(claimed)
+        return len(claimed)
+
+    async def claim(self) -> list[_Claimed]:
+        cls = self.InvoiceClass
+        now = _now()
+        due = (
+            select(cls)
+            .where(cls.status == Status.PENDING)
+            .where(or_(cls.next_check_at.is_(None), cls.next_check_at <= now))
+            .where(or_(cls.lease_until.is_(None), cls.lease_until < now))
+            # Unscheduled invoices first, PostgreSQL sorts NULLs last by default
+            .order_by(cls.next_check_at.is_not(None), cls.next_check_at)
+            .limit(self.batch_size)
+        )
+        lease_until = now + datetime.timedelta(seconds=self.lease_time)
+        if self._skip_locked is None:
+            async with self.session_factory() as session:
+                self._skip_locked = session.get_bind().dialect.name in SKIP_LOCKED_DIALECTS
+
+        if self._skip_locked:
+            async with self.session_factory() as session, session.begin():
+                rows = (await session.execute(due.with_for_update(skip_locked=True))).scalars().all()
+                for invoice in rows:
+                    invoice.lease_owner = self.worker_id
+                    invoice.lease_until = lease_until
+                return [_claimed(invoice) for invoice in rows]
+
+        async with self._lock():
+            async with self.session_factory() as session, session.begin():
+                ids = (await session.execute(due.with_only_columns(cls.id))).scalars().all()
+                if not ids:
+                    return []
+                # Atomic per row: only leases that are still free are taken
+                await session.execute(
+                    update(cls)
+                    .where(cls.id.in_(ids))
+                    .where(or_(cls.lease_until.is_(None), cls.lease_until < now))
+                    .values(lease_owner=self.worker_id, lease_until=lease_until)
+                    .execution_options(synchronize_session=False)
+                )
+                rows = (
+                    await session.execute(
+                        select(cls).where(cls.id.in_(ids)).where(cls.lease_owner == self.worker_id)
+                    )
+                ).scalars().all()
+                return [_claimed(invoice) for invoice in rows]
+
+    async def process(self, claimed: list[_Claimed]) -> None:
+        now = _now()
+        by_merchant: dict[Optional[MerchantEnum], list[_Claimed]] = defaultdict(list)
+        expired = []
+        for item in claimed:
+            if item.expire_at is not None and _as_naive(item.expire_at) <= now:
+                expired.append(item)
+            else:
+                by_merchant[item.merchant].append(item)
+
+        results = await asyncio.gather(
+            *(self._check(merchant, items) for merchant, items in by_merchant.items())
+        )
+        paid, pending = [], []
+        for items, result in zip(by_merchant.values(), results):
+            for item in items:
+                if result.get(item.invoice_id):
+                    paid.append(item)
+                else:
+                    pending.append(item)
+        await self._finish(paid, expired, pending)
+
+    async def _check(self, merchant: Optional[MerchantEnum], items: list[_Claimed]) -> dict[str, bool]:
+        instance = self.merchants.get(merchant)
+        if instance is None:
+            events.emit("check_worker.unknown_merchant", level="WARNING", hot=True, merchant=merchant)
+            return {}
+        try:
+            with priority(Priority.BACKGROUND):
+                return await instance.check_paid_batch([item.invoice_id for item in items])
+        except Exception as e:
+            events.emit("check_worker.check_failed", level="WARNING", hot=True, merchant=merchant, error=e)
+            return {}
+
+    async def _finish(self, paid: list[_Claimed], expired: list[_Claimed], pending: list[_Claimed]) -> None:
+        cls = self.InvoiceClass
+        owned = cls.lease_owner == self.worker_id
+        released = {"lease_owner": None, "lease_until": None}
+        now = _now()
+        async with self.session_factory() as session, session.begin():
+            if paid:
+                claimed = {item.id: item for item in paid}
+                invoices = (
+                    await session.execute(select(cls).where(cls.id.in_(claimed)).where(owned))
+                ).scalars().all()
+                for invoice in invoices:
+                    # The rollback of a savepoint expires the invoice
+                    item = claimed[invoice.id]
+                    try:
+                        async with session.begin_nested():
+                            await invoice.successfully_paid()
+                            invoice.lease_owner = invoice.lease_until = None
+                            if self.on_paid is not None:
+                                await self.on_paid(session, invoice)
+                    except Exception as e:
+                        events.emit(
+                            "check_worker.on_paid_failed",
+                            level="ERROR",
+                            worker=self.worker_id,
+                            invoice_id=item.invoice_id,
+                            error=e,
+                        )
+                        pending.append(item)
+            if expired:
+                await session.execute(
+                    update(cls)
+                    .where(cls.id.in_([item.id for item in expired]))
+                    .where(owned)
+                    .values(status=Status.EXPIRED, **released)
+                    .execution_options(synchronize_session=False)
+                )
+                note_core_writes(session, ((item.user_id, item.invoice_id) for item in expired))
+            by_attempts: dict[int, list[int]] = defaultdict(list)
+            for item in pending:
+                by_attempts[item.check_attempts].append(item.id)
+            for attempts, ids in by_attempts.items():
+                next_check_at = now + datetime.timedelta(seconds=self.next_check_delay(attempts))
+                await session.execute(
+                    update(cls)
+                    .where(cls.id.in_(ids))
+                    .where(owned)
+                    .values(next_check_at=next_check_at, check_attempts=attempts + 1, **released)
+                    .execution_options(synchronize_session=False)
+                )
+
+    def _lock(self) -> asyncio.Lock:
+        # Shared by the workers of a loop, a lock can't be used across loops
+        loop = asyncio.get_running_loop()
+        lock = self._fallback_locks.get(loop)
+        if lock is None:
+            lock = self._fallback_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                events.emit("check_worker.round_failed", level="ERROR", worker=self.worker_id, error=e)
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.idle_interval)
+
+
+def _claimed(invoice) -> _Claimed:
+    return _Claimed(
+        invoice.id,
+        invoice.invoice_id,
+        invoice.user_id,
+        invoice.merchant,
+        invoice.expire_at,
+        invoice.check_attempts or 0,
+    )
+
+
+def _as_naive(value: datetime.datetime) -> datetime.datetime:
+    # Aware values (timezone-aware columns) in server-local time
+    return value if value.tzinfo is None else value.astimezone().replace(tzinfo=None)
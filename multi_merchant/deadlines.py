@@ -0,0 +1,110 @@
+"""
+Deadline propagation.
+
+A caller with a time budget sets it once::
+
+    with deadline(2):
+        invoice = await merchant.create_invoice(...)
+
+Every hop below (``create_invoice``/``is_paid``, HTTP requests, SDK calls
+in threads, ``Invoice`` queries) runs within the time left and fails with
+``DeadlineExceeded``. Work whose deadline already passed isn't started.
+Nested deadlines can only shorten the budget. Tasks created inside the
+block inherit it, background tasks are started ``detached()``.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import time
+import typing
+from typing import Callable, Iterator, Optional, TypeVar
+
+from . import events
+
+T = TypeVar("T")
+
+# Absolute deadline on the ``time.monotonic()`` clock
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's deadline passed."""
+
+    def __init__(self, what: str) -> None:
+        super().__init__(f"Deadline exceeded: {what}")
+        self.what = what
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Finish calls made inside the block within ``seconds``."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextlib.contextmanager
+def detached() -> Iterator[None]:
+    """Drop the deadline, for background tasks started from a request."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left until the current deadline, ``None`` without one."""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def check(what: str) -> None:
+    """Raise ``DeadlineExceeded`` if the deadline already passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        events.emit("deadline.dropped", level="WARNING", hot=True, what=what)
+        raise DeadlineExceeded(what)
+
+
+@contextlib.asynccontextmanager
+async def scope(what: str, timeout: float | None = None) -> typing.AsyncIterator[None]:
+    """
+    Run the block within the time left, and within ``timeout`` if given.
+
+    Only expiry of the deadline raises ``DeadlineExceeded``, an expired
+    ``timeout`` raises a plain ``TimeoutError``.
+    """
+    check(what)
+    left = remaining()
+    limit = timeout if left is None else left if timeout is None else min(left, timeout)
+    try:
+        async with asyncio.timeout(limit) as cm:
+            yield
+    except TimeoutError as e:
+        if cm.expired() and left is not None and left <= limit:
+            events.emit("deadline.exceeded", level="WARNING", hot=True, what=what)
+            raise DeadlineExceeded(what) from e
+        raise
+
+
+def bounded(what: str, func: Callable[..., typing.Awaitable[T]]) -> Callable[..., typing.Awaitable[T]]:
+    """Wrap ``func`` in ``scope(what)``."""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        if _deadline.get() is None:
+            return await func(*args, **kwargs)
+        async with scope(what):
+            return await func(*args, **kwargs)
+
+    return wrapper
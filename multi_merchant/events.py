@@ -0,0 +1,211 @@
+"""
+Structured event log.
+
+Events are key/value records queued on the caller's side and formatted and
+written by a background thread, so logging from the event loop costs a
+dict and a queue put:
+
+    from multi_merchant import events
+    events.emit("invoice.created", merchant="yookassa", invoice_id=invoice_id)
+
+High-frequency events (per-poll logs) are emitted with ``hot=True``. They
+are sampled and rate limited per event name and can be switched off
+entirely with ``events.set_hot_path(False)``.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TextIO
+
+from loguru import logger
+
+# Default rate limit of every hot event name: (events per second, burst)
+HOT_RATE_LIMIT = (1.0, 10)
+# Keys the sinks put next to the fields
+RESERVED_FIELDS = frozenset({"event", "level", "t"})
+
+
+@dataclass(slots=True)
+class Event:
+    name: str
+    level: str
+    fields: dict[str, Any]
+    time: float = field(default_factory=time.time)
+
+    def format(self) -> str:
+        return " ".join([self.name, *(f"{key}={value!r}" for key, value in self.fields.items())])
+
+
+EventSink = Callable[[Event], None]
+
+
+def loguru_sink(event: Event) -> None:
+    """Write events through loguru with their fields as ``extra``."""
+    logger.bind(event=event.name, **event.fields).log(event.level, event.format())
+
+
+class JsonLinesSink:
+    """Write events as JSON lines to ``stream``."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    def __call__(self, event: Event) -> None:
+        record = {"t": event.time, "event": event.name, "level": event.level, **event.fields}
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.stream.flush()
+
+
+@dataclass(slots=True)
+class _Bucket:
+    rate: float
+    burst: int
+    tokens: float
+    updated_at: float
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, self.burst)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class EventLog:
+    """
+    Event queue drained by a background writer thread.
+
+    ``sample`` maps event names to the fraction of events kept and
+    ``rate_limits`` to ``(events per second, burst)``. Hot events without
+    an explicit limit get ``hot_rate_limit``. When the queue is full events
+    are dropped and counted instead of blocking the caller.
+    """
+
+    def __init__(
+            self,
+            sink: EventSink = loguru_sink,
+            queue_size: int = 10_000,
+            sample: dict[str, float] | None = None,
+            rate_limits: dict[str, tuple[float, int]] | None = None,
+            hot_rate_limit: tuple[float, int] | None = HOT_RATE_LIMIT,
+            hot_path: bool = True,
+    ) -> None:
+        self.sink = sink
+        self.sample = dict(sample or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.hot_rate_limit = hot_rate_limit
+        self.hot_path = hot_path
+        self.dropped = 0
+        self.suppressed = 0
+        self._queue: queue.Queue[Optional[Event]] = queue.Queue(queue_size)
+        self._buckets: dict[str, _Bucket] = {}
+        self._random = random.random
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def emit(self, name: str, level: str = "INFO", hot: bool = False, **fields: Any) -> bool:
+        """
+        Queue an event. Returns False when it was sampled out, limited or dropped.
+
+        Raises ``ValueError`` for fields named like ``RESERVED_FIELDS``.
+        """
+        if not RESERVED_FIELDS.isdisjoint(fields):
+            raise ValueError(f"Reserved event field names: {sorted(RESERVED_FIELDS.intersection(fields))}")
+        if hot and not self.hot_path:
+            return False
+        rate = self.sample.get(name)
+        if rate is not None and self._random() >= rate:
+            self.suppressed += 1
+            return False
+        if not self._allow(name, hot):
+            self.suppressed += 1
+            return False
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(Event(name, level, fields))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _allow(self, name: str, hot: bool) -> bool:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            limit = self.rate_limits.get(name)
+            if limit is None and hot:
+                limit = self.hot_rate_limit
+            if limit is None:
+                return True
+            rate, burst = limit
+            bucket = self._buckets[name] = _Bucket(rate, burst, burst, time.monotonic())
+        return bucket.take(time.monotonic())
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="multi-merchant-events", daemon=True)
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Block until every queued event is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float | None = 5) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                self.sink(event)
+            except Exception as e:
+                logger.warning(f"Failed to write event: {e!r}")
+            finally:
+                self._queue.task_done()
+
+
+_event_log: Optional[EventLog] = None
+
+
+def install(event_log: Optional[EventLog]) -> Optional[EventLog]:
+    """Replace the global event log, returning the previous one."""
+    global _event_log
+    previous, _event_log = _event_log, event_log
+    return previous
+
+
+def get_event_log() -> EventLog:
+    global _event_log
+    if _event_log is None:
+        _event_log = EventLog()
+    return _event_log
+
+
+def emit(name: str, level: str = "INFO", hot: bool = False, **fields: Any) -> bool:
+    return get_event_log().emit(name, level, hot, **fields)
+
+
+def set_hot_path(enabled: bool) -> None:
+    """Switch hot-path (per-poll) events on or off."""
+    get_event_log().hot_path = enabled
+
+
+@atexit.register
+def _close() -> None:
+    if _event_log is not None:
+        _event_log.close()
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import math
+import time
+import typing
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import deadlines, tracing
+from .admission import Priority, priority
+from .merchants.base import PAYMENT_LIFETIME, Amount, BaseMerchant, InvoiceT, MerchantEnum
+from .models.draft import InvoiceDraft
+
+# Pooled invoices are created before the buyer is known
+UNASSIGNED_USER_ID = 0
+
+
+@dataclass(frozen=True, slots=True)
+class TariffKey:
+    merchant: MerchantEnum
+    amount: float
+    currency: str
+
+
+@dataclass
+class Tariff:
+    merchant: BaseMerchant
+    key: TariffKey
+    min_size: int
+    max_size: int
+    create_kwargs: dict[str, Any]
+    # (usable until, invoice), oldest first
+    ready: deque[tuple[float, InvoiceDraft]] = field(default_factory=deque)
+    acquired_at: deque[float] = field(default_factory=deque)
+    creating: int = 0
+
+    def purge(self, now: float) -> None:
+        while self.ready and self.ready[0][0] <= now:
+            self.ready.popleft()
+
+
+class InvoicePool:
+    """
+    Pre-provisioned provider invoices for fixed price points.
+
+    For every tariff ``(merchant, amount, currency)`` the pool keeps
+    unassigned invoices ready and refills them in the background. They are
+    retired ``min_ttl`` seconds before they expire. ``acquire`` binds one to
+    a user and persists it, so checkout is a local DB write. The pool size of
+    a tariff follows its demand: acquisitions per second over
+    ``demand_window`` times ``lead_time``, within ``[min_size, max_size]``.
+    """
+
+    def __init__(
+            self,
+            InvoiceClass: typing.Type[InvoiceT],
+            lifetime: float = PAYMENT_LIFETIME,
+            min_ttl: float = 10 * 60,
+            lead_time: float = 60,
+            demand_window: float = 10 * 60,
+            refill_interval: float = 30,
+            refill_concurrency: int = 5,
+    ) -> None:
+        self.InvoiceClass = InvoiceClass
+        self.lifetime = lifetime
+        self.min_ttl = min_ttl
+        self.lead_time = lead_time
+        self.demand_window = demand_window
+        self.refill_interval = refill_interval
+        self._semaphore = asyncio.Semaphore(refill_concurrency)
+        self._tariffs: dict[TariffKey, Tariff] = {}
+        self._wakeup = asyncio.Event()
+        self._refiller: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @staticmethod
+    def make_key(merchant: BaseMerchant | MerchantEnum, amount: Amount, currency: str) -> TariffKey:
+        if isinstance(merchant, BaseMerchant):
+            merchant = merchant.merchant
+        return TariffKey(merchant, float(amount), str(currency))
+
+    def add_tariff(
+            self,
+            merchant: BaseMerchant,
+            amount: Amount,
+            currency: str,
+            min_size: int = 1,
+            max_size: int = 50,
+            **create_kwargs,
+    ) -> TariffKey:
+        """Keep invoices for ``amount`` ``currency`` of ``merchant`` ready."""
+        key = self.make_key(merchant, amount, currency)
+        # The buyer is not known yet, keep the description free of user IDs
+        create_kwargs.setdefault("description", f"Product {key.amount:g} {key.currency}")
+        self._tariffs[key] = Tariff(merchant, key, min_size, max_size, create_kwargs)
+        self._wakeup.set()
+        return key
+
+    def available(self, key: TariffKey) -> int:
+        tariff = self._tariffs[key]
+        tariff.purge(time.monotonic())
+        return len(tariff.ready)
+
+    def target_size(self, tariff: Tariff, now: float) -> int:
+        while tariff.acquired_at and tariff.acquired_at[0] < now - self.demand_window:
+            tariff.acquired_at.popleft()
+        rate = len(tariff.acquired_at) / self.demand_window
+        return max(tariff.min_size, min(math.ceil(rate * self.lead_time), tariff.max_size))
+
+    async def start(self) -> None:
+        if self._refiller is None or self._refiller.done():
+            self._refiller = asyncio.create_task(self._refill_loop())
+
+    async def close(self) -> None:
+        if self._refiller is not None:
+            self._refiller.cancel()
+            self._refiller = None
+
+    async def acquire(
+            self,
+            session: AsyncSession,
+            user_id: int,
+            merchant: BaseMerchant | MerchantEnum,
+            amount: Amount,
+            currency: str,
+    ) -> InvoiceT | None:
+        """
+        Bind a ready invoice to ``user_id`` and add it to ``session``.
+
+        Returns None when the tariff is not pooled or the pool is empty;
+        the caller then creates the invoice as usual.
+        """
+        tariff = self._tariffs.get(self.make_key(merchant, amount, currency))
+        if tariff is None:
+            return None
+        now = time.monotonic()
+        tariff.acquired_at.append(now)
+        tariff.purge(now)
+        self._wakeup.set()
+        if not tariff.ready:
+            return None
+
+        usable_until, draft = tariff.ready.popleft()
+        invoice = dataclasses.replace(draft, user_id=user_id).to_invoice(self.InvoiceClass)
+        try:
+            with tracing.span("invoice_pool.acquire", merchant=tariff.key.merchant):
+                deadlines.check("invoice_pool.acquire")
+                session.add(invoice)
+                await session.flush()
+        except BaseException:
+            # Not persisted, the provider invoice is still free for the next buyer
+            tariff.ready.appendleft((usable_until, draft))
+            raise
+        return invoice
+
+    async def refill(self) -> None:
+        """Top up every tariff to its target size."""
+        now = time.monotonic()
+        jobs = []
+        for tariff in self._tariffs.values():
+            tariff.purge(now)
+            missing = self.target_size(tariff, now) - len(tariff.ready) - tariff.creating
+            jobs.extend(self._create(tariff) for _ in range(max(missing, 0)))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+    async def _create(self, tariff: Tariff) -> None:
+        tariff.creating += 1
+        try:
+            async with self._semaphore:
+                with priority(Priority.BACKGROUND):
+                    invoice = await tariff.merchant.create_invoice(
+                        user_id=UNASSIGNED_USER_ID,
+                        amount=tariff.key.amount,
+                        InvoiceClass=InvoiceDraft,
+                        currency=tariff.key.currency,
+                        **tariff.create_kwargs,
+                    )
+        except Exception as e:
+            logger.warning(f"Failed to pre-create invoice for {tariff.key}: {e!r}")
+            return
+        finally:
+            tariff.creating -= 1
+        usable_until = time.monotonic() + self.lifetime - self.min_ttl
+        tariff.ready.append((usable_until, invoice))
+
+    async def _refill_loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.exception(f"Invoice pool refill failed: {e!r}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -9,7 +9,6 @@ from AaioAPI import AaioAPI
 from pydantic import validator, field_serializer
 
 from multi_merchant.merchants.base import BaseMerchant, MerchantEnum, PAYMENT_LIFETIME
-from multi_merchant.merchants.betatransfer.betatransfer import BetaTrans
 from ...models import Invoice
 
 
@@ -32,7 +31,7 @@ class AaioPay(BaseMerchant):
         return v
 
     @field_serializer('client')
-    def serialize_cp(cp: BetaTrans | None) -> typing.Any:
+    def serialize_cp(cp: AaioAPI | None) -> typing.Any:
         return None
 
     async def create_invoice(
@@ -48,7 +47,8 @@ class AaioPay(BaseMerchant):
             **kwargs
     ) -> Invoice:
         payment_id = uuid.uuid4().hex
-        payment_url = self.client.create_payment(
+        payment_url = await self.run_in_thread(
+            self.client.create_payment,
             payment_id,
             amount=amount,
             currency=currency,
@@ -67,5 +67,5 @@ class AaioPay(BaseMerchant):
         )
 
     async def is_paid(self, invoice_id: str) -> bool:
-        info = self.client.get_payment_info(invoice_id)
+        info = await self.run_in_thread(self.client.get_payment_info, invoice_id)
         return info['status'] == "success"
@@ -1,18 +1,28 @@
 from __future__ import annotations
 
 import abc
+import asyncio
+import time
 import typing
 import zoneinfo
 from abc import ABC
 from enum import StrEnum
-from typing import Optional, Any, Literal, TypeVar, Union
+from typing import Optional, Any, AsyncIterator, Literal, Sequence, TypeVar, Union
 
-from aiohttp import ClientSession
-from pydantic import BaseModel, SecretStr, field_serializer
+from aiohttp import BaseConnector, ClientError, ClientResponse, ClientSession, ClientTimeout, TCPConnector
+from pydantic import BaseModel, Field, PrivateAttr, SecretStr, field_serializer
+from yarl import URL
 
+from .. import deadlines, events, tracing
+from ..admission import AdmissionController, Priority, with_default_priority
+from ..capture.recorder import get_recorder
 
 if typing.TYPE_CHECKING:
-    from ..models.invoice import Invoice
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from ..bulk import BulkResult, InvoiceRequest
+    from ..models.invoice import Invoice, Status
+    from ..watcher import PaymentWatcher
 
 # seconds
 PAYMENT_LIFETIME = 60 * 60
@@ -77,6 +87,38 @@ MerchantUnion = Union[
 ]
 
 InvoiceT = TypeVar("InvoiceT", bound="Invoice")
+T = TypeVar("T")
+
+# Resolved provider hosts are cached this long, seconds
+DNS_CACHE_TTL = 5 * 60
+# Idle keep-alive connections are kept this long, seconds
+KEEPALIVE_TIMEOUT = 60
+WARM_UP_TIMEOUT = ClientTimeout(total=10)
+# Concurrent is_paid calls of a batched status check
+CHECK_CONCURRENCY = 10
+
+
+class TimeoutProfile(BaseModel):
+    """Timeouts of a merchant's provider calls, seconds."""
+
+    # Establishing a connection, DNS and TLS included
+    connect: float = 5
+    # Between reads of the response
+    read: float = 15
+    # Whole request, waiting for a free connection included
+    total: Optional[float] = 30
+    # Blocking SDK call in a worker thread
+    thread: Optional[float] = 30
+
+    def client_timeout(self) -> ClientTimeout:
+        return ClientTimeout(total=self.total, sock_connect=self.connect, sock_read=self.read)
+
+
+# Merchant methods wrapped in tracing spans, with their default admission lane
+TRACED_METHODS = {
+    "create_invoice": Priority.INTERACTIVE,
+    "is_paid": Priority.USER_CHECK,
+}
 
 
 class BaseMerchant(BaseModel, ABC):
@@ -84,12 +126,30 @@ class BaseMerchant(BaseModel, ABC):
     api_key: SecretStr
     create_url: Optional[str] = None
     status_url: Optional[str] = None
+    # Concurrent provider calls, see ``multi_merchant.admission``
+    max_concurrency: int = 20
+    timeouts: TimeoutProfile = Field(default_factory=TimeoutProfile)
     session: Optional[ClientSession] = None
     merchant: Literal[MerchantEnum.NONE]
 
+    _watcher: Optional[PaymentWatcher] = PrivateAttr(None)
+    _connector: Optional[BaseConnector] = PrivateAttr(None)
+    _admission: Optional[AdmissionController] = PrivateAttr(None)
+
     class Config:
         arbitrary_types_allowed = True
 
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        for name, lane in TRACED_METHODS.items():
+            method = cls.__dict__.get(name)
+            if method is None or getattr(method, "__isabstractmethod__", False):
+                continue
+            if not getattr(method, "__traced__", False):
+                method = with_default_priority(lane, deadlines.bounded(f"merchant.{name}", method))
+                setattr(cls, name, tracing.traced_method(f"merchant.{name}", method))
+
     @property
     def headers(self) -> dict:
         return {}
@@ -108,19 +168,127 @@ class BaseMerchant(BaseModel, ABC):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close_session()
 
+    @property
+    def admission(self) -> AdmissionController:
+        """Bulkhead of this merchant's provider calls."""
+        if self._admission is None:
+            self._admission = AdmissionController(self.merchant, self.max_concurrency)
+        return self._admission
+
+    def share_connector(self, connector: BaseConnector | None) -> None:
+        """Open sessions on ``connector``, owned by the caller, instead of a private one."""
+        self._connector = connector
+
     async def get_session(self):
         if self.session is None or self.session.closed:
-            self.session = ClientSession(headers=self.headers)
+            connector = self._connector
+            if connector is None:
+                connector = TCPConnector(ttl_dns_cache=DNS_CACHE_TTL, keepalive_timeout=KEEPALIVE_TIMEOUT)
+            self.session = ClientSession(
+                headers=self.headers,
+                connector=connector,
+                connector_owner=self._connector is None,
+                timeout=self.timeouts.client_timeout(),
+                trace_configs=tracing.request_trace_configs(),
+            )
         return self.session
 
     async def close_session(self):
+        if self._watcher is not None:
+            await self._watcher.close()
         if self.session is not None:
             await self.session.close()
 
     async def make_request(self, method: str, url: str, **kwargs) -> Any:
+        return await self._request(method, url, ClientResponse.json, **kwargs)
+
+    async def make_raw_request(self, method: str, url: str, **kwargs) -> bytes:
+        """``make_request`` returning the undecoded body, for ``model_validate_json``."""
+        return await self._request(method, url, ClientResponse.read, **kwargs)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        read: typing.Callable[[ClientResponse], typing.Awaitable[T]],
+        **kwargs,
+    ) -> T:
+        # Waiting for a slot counts against the deadline too
+        async with deadlines.scope(f"{self.merchant} {method}"), self.admission.slot():
+            return await self._send(method, url, read, **kwargs)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        read: typing.Callable[[ClientResponse], typing.Awaitable[T]],
+        **kwargs,
+    ) -> T:
+        session = await self.get_session()
+        recorder = get_recorder()
+        if recorder is None and tracing.get_tracer() is None:
+            async with session.request(method, url, **kwargs) as res:
+                return await read(res)
+
+        span_url = str(URL(url).with_query(None))
+        with tracing.span("http.request", merchant=self.merchant, method=method, url=span_url) as current:
+            if current is not None:
+                kwargs["trace_request_ctx"] = {"span": current}
+            started_at, started = time.time(), time.perf_counter()
+            async with session.request(method, url, **kwargs) as res:
+                if recorder is not None:
+                    await recorder.capture(self.merchant, method, url, kwargs, res, started_at, started)
+                data = await read(res)
+            if current is not None:
+                current.set_attribute("http.total_ms", round((time.perf_counter() - started) * 1000, 3))
+            return data
+
+    def warm_up_urls(self) -> set[str]:
+        """Provider origins to keep connections open to."""
+        urls = set()
+        for url in (self.create_url, self.status_url):
+            if url:
+                urls.add(str(URL(url).origin()))
+        return urls
+
+    async def prefetch(self) -> None:
+        """Load metadata otherwise fetched on the first user request."""
+
+    async def warm_up(self, prefetch: bool = True) -> None:
+        """
+        Resolve provider hosts and open keep-alive connections to them.
+
+        Any HTTP response counts: only the connection matters.
+        """
         session = await self.get_session()
-        async with session.request(method, url, **kwargs) as res:
-            return await res.json()
+
+        async def touch(url: str) -> None:
+            try:
+                async with session.head(url, timeout=WARM_UP_TIMEOUT, allow_redirects=False):
+                    pass
+            except (ClientError, asyncio.TimeoutError) as e:
+                events.emit(
+                    "merchant.warm_up_failed", level="WARNING", hot=True, merchant=self.merchant, url=url, error=e
+                )
+
+        with tracing.span("merchant.warm_up", merchant=self.merchant):
+            jobs = [touch(url) for url in self.warm_up_urls()]
+            if prefetch:
+                jobs.append(self.prefetch())
+            await asyncio.gather(*jobs)
+
+    async def run_in_thread(self, func: typing.Callable[..., T], /, *args, **kwargs) -> T:
+        """
+        Run a blocking SDK call in a worker thread.
+
+        The current context (tracing span included) is carried into the thread.
+        The caller stops waiting after ``timeouts.thread`` or at the deadline,
+        the thread itself can't be interrupted and runs to completion.
+        """
+        name = getattr(func, "__name__", "call")
+        async with deadlines.scope(f"{self.merchant} {name}", self.timeouts.thread), self.admission.slot():
+            with tracing.span("merchant.thread", merchant=self.merchant, function=name):
+                return await asyncio.to_thread(func, *args, **kwargs)
 
     @abc.abstractmethod
     async def create_invoice(
@@ -137,3 +305,67 @@ class BaseMerchant(BaseModel, ABC):
     @abc.abstractmethod
     async def is_paid(self, invoice_id: str) -> bool:
         pass
+
+    async def check_paid_batch(self, invoice_ids: Sequence[str]) -> dict[str, bool]:
+        """
+        ``is_paid`` of many invoices. Failed checks are left out.
+
+        Merchants with a list endpoint override it with a single request.
+        """
+        semaphore = asyncio.Semaphore(CHECK_CONCURRENCY)
+
+        async def check(invoice_id: str) -> bool:
+            async with semaphore:
+                return await self.is_paid(invoice_id)
+
+        results = await asyncio.gather(*map(check, invoice_ids), return_exceptions=True)
+        paid = {}
+        for invoice_id, result in zip(invoice_ids, results):
+            if isinstance(result, BaseException):
+                events.emit("merchant.check_failed", level="WARNING", hot=True, merchant=self.merchant, error=result)
+            else:
+                paid[invoice_id] = result
+        return paid
+
+    def create_invoices_bulk(
+        self,
+        requests: typing.Iterable[InvoiceRequest],
+        InvoiceClass: typing.Type[InvoiceT],
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        concurrency: int = 10,
+        rate_limit: float | None = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Create an invoice per request, yielding results as they complete.
+
+        See ``multi_merchant.bulk.create_invoices_bulk``.
+        """
+        from ..bulk import create_invoices_bulk
+
+        return create_invoices_bulk(
+            self, requests, InvoiceClass, session_factory, concurrency, rate_limit, batch_size
+        )
+
+    @property
+    def watcher(self) -> PaymentWatcher:
+        """Shared status checker behind ``wait_paid`` and ``watch_status``."""
+        if self._watcher is None:
+            from ..watcher import PaymentWatcher
+
+            self._watcher = PaymentWatcher(self)
+        return self._watcher
+
+    async def wait_paid(self, invoice: Invoice, timeout: float | None = None) -> bool:
+        """Wait for ``invoice`` to be paid. False if it expires or ``timeout`` passes first."""
+        return await self.watcher.wait_paid(invoice, timeout)
+
+    def watch_status(self, invoice: Invoice) -> AsyncIterator[Status]:
+        """Status of ``invoice`` and its changes, up to paid or expired."""
+        return self.watcher.changes(invoice)
+
+    def notify_paid(self, invoice_id: str) -> bool:
+        """Settle waiters of ``invoice_id`` from a provider notification."""
+        from ..models.invoice import Status
+
+        return self.watcher.resolve(invoice_id, Status.SUCCESS)
@@ -1 +1,13 @@
-from .merchant import BetaTransferPay
+import typing
+
+if typing.TYPE_CHECKING:
+    from .merchant import BetaTransferPay
+
+
+def __getattr__(name: str) -> typing.Any:
+    # Keep ``betatransfer.methods`` importable without pypayment installed
+    if name == "BetaTransferPay":
+        from .merchant import BetaTransferPay
+
+        return BetaTransferPay
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,6 +2,8 @@ import requests
 from pydantic import BaseModel
 from pypayment import BetaTransferPayment, PaymentCreationError
 
+from .methods import BTPaymentType
+
 
 class PaymentMethod(BaseModel):
     method: str
@@ -11,20 +13,16 @@ class PaymentMethod(BaseModel):
     maximum: int
 
 
-# Example data instantiation
+# Same table as ``BTPaymentType``, in the shape of the BetaTransfer API
 methods = [
-    PaymentMethod(method="P2R_TJS", currency="TJS", commission=9.5, minimum=100, maximum=10000),
-    PaymentMethod(method="Card7", currency="UAH", commission=12.0, minimum=300, maximum=20000),
-    PaymentMethod(method="Card10", currency="BYN", commission=10.0, minimum=30, maximum=10000),
-    PaymentMethod(method="Card5", currency="UAH", commission=9.5, minimum=350, maximum=20000),
-    PaymentMethod(method="P2R_KZT", currency="KZT", commission=11.0, minimum=5600, maximum=460000),
-    PaymentMethod(method="Card6", currency="UZS", commission=12.0, minimum=50000, maximum=5500000),
-    PaymentMethod(method="Card1", currency="AZN", commission=13.0, minimum=10, maximum=4000),
-    PaymentMethod(method="Card4", currency="RUB", commission=8.5, minimum=100, maximum=60000),
-    PaymentMethod(method="Card8", currency="RUB", commission=10.0, minimum=500, maximum=50000),
-    PaymentMethod(method="P2R", currency="RUB", commission=8.5, minimum=100, maximum=50000),
-    PaymentMethod(method="YooMoney", currency="RUB", commission=12.0, minimum=100, maximum=50000),
-    PaymentMethod(method="Crypto", currency="USD", commission=2.0, minimum=5, maximum=5000)
+    PaymentMethod(
+        method=payment_type.value.name,
+        currency=payment_type.value.currency.value,
+        commission=payment_type.value.commission_in_percent,
+        minimum=payment_type.value.min_amount,
+        maximum=payment_type.value.max_amount,
+    )
+    for payment_type in BTPaymentType
 ]
 
 
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Collection, Iterable, Optional
+
+from loguru import logger
+
+from .methods import BTGateway, BTPaymentType
+from .rate import RateInfo, RateService
+
+
+@dataclass(frozen=True, slots=True)
+class GatewayChoice:
+    gateway: BTGateway
+    # Requested amount and currency
+    amount: float
+    currency: str
+    # Requested amount in the gateway currency
+    native_amount: float
+    # Amount to charge, in the gateway currency, so that the requested
+    # amount is left after the commission
+    gross_amount: float
+
+    @property
+    def payment_type(self) -> BTPaymentType:
+        """Payment type in the gateway's own currency."""
+        return BTPaymentType[self.gateway.name]
+
+
+class GatewayIndex:
+    """
+    BetaTransfer gateways sorted into amount intervals.
+
+    Each gateway's native min/max limits apply to the gross amount, so
+    they are reduced by the commission and converted into the base
+    currency, and the amount axis is split at every limit. Every interval
+    stores its eligible gateways ordered by commission, so a lookup is a
+    single bisect. The index is rebuilt whenever exchange rates change.
+    Until the first rates only gateways in the base currency are indexed.
+    """
+
+    def __init__(
+            self,
+            rates: Optional[RateInfo] = None,
+            gateways: Iterable[BTGateway] = tuple(t.value for t in BTPaymentType),
+            base: str = "RUB",
+    ) -> None:
+        self.base = base
+        self.gateways = tuple(gateways)
+        self._rates: Optional[RateInfo] = None
+        self._table: tuple[list[float], list[tuple[BTGateway, ...]]] = ([], [])
+        self.rebuild(rates)
+
+    @classmethod
+    def from_rate_service(cls, rate_service: RateService, **kwargs) -> GatewayIndex:
+        """Index kept up to date with the rates of ``rate_service``."""
+        index = cls(rate_service.peek(), **kwargs)
+        rate_service.add_listener(index.rebuild)
+        return index
+
+    @property
+    def rates(self) -> Optional[RateInfo]:
+        return self._rates
+
+    def rebuild(self, rates: Optional[RateInfo] = None) -> None:
+        limits: list[tuple[float, float, BTGateway]] = []
+        for gateway in self.gateways:
+            currency = gateway.currency.value
+            if rates is None and currency != self.base:
+                continue
+            net = 1 - gateway.commission_in_percent / 100
+            try:
+                limits.append(_limits(
+                    gateway,
+                    _convert(rates, _scale(gateway.min_amount, net), currency, self.base),
+                    _convert(rates, _scale(gateway.max_amount, net), currency, self.base),
+                ))
+            except ValueError as e:
+                logger.warning(f"Skip BetaTransfer gateway {gateway.name}: {e}")
+
+        # Upper limits are inclusive, so the interval ends right after them
+        bounds = sorted({bound for low, high, _ in limits for bound in (low, math.nextafter(high, math.inf))})
+        eligible = []
+        for bound in bounds:
+            gateways = [gateway for low, high, gateway in limits if low <= bound <= high]
+            gateways.sort(key=lambda g: (g.commission_in_percent, g.name))
+            eligible.append(tuple(gateways))
+
+        self._rates = rates
+        self._table = (bounds, eligible)
+
+    def eligible(self, amount: float, currency: Optional[str] = None) -> tuple[BTGateway, ...]:
+        """Gateways accepting ``amount``, cheapest first."""
+        bounds, eligible = self._table
+        position = bisect_right(bounds, self._to_base(amount, currency or self.base)) - 1
+        if position < 0:
+            return ()
+        return eligible[position]
+
+    def select(
+            self,
+            amount: float,
+            currency: Optional[str] = None,
+            gateway_currencies: Optional[Collection[str]] = None,
+    ) -> Optional[GatewayChoice]:
+        """
+        Cheapest gateway accepting ``amount`` in ``currency``, or None.
+
+        Gateways in other currencies are considered too, unless
+        ``gateway_currencies`` limits them.
+        """
+        currency = currency or self.base
+        for gateway in self.eligible(amount, currency):
+            gateway_currency = gateway.currency.value
+            if gateway_currencies is not None and gateway_currency not in gateway_currencies:
+                continue
+            native_amount = amount
+            if gateway_currency != currency:
+                native_amount = self._rates.convert(amount, currency, gateway_currency)
+            return GatewayChoice(
+                gateway=gateway,
+                amount=amount,
+                currency=currency,
+                native_amount=native_amount,
+                gross_amount=round(native_amount / (1 - gateway.commission_in_percent / 100), 2),
+            )
+        return None
+
+    def _to_base(self, amount: float, currency: str) -> float:
+        if currency == self.base:
+            return amount
+        if self._rates is None:
+            raise ValueError(f"No exchange rates to convert {currency} to {self.base}")
+        return self._rates.convert(amount, currency, self.base)
+
+
+def _convert(
+        rates: Optional[RateInfo],
+        amount: Optional[float],
+        from_currency: str,
+        to_currency: str,
+) -> Optional[float]:
+    if amount is None or from_currency == to_currency:
+        return amount
+    return rates.convert(amount, from_currency, to_currency)
+
+
+def _scale(amount: Optional[float], factor: float) -> Optional[float]:
+    return None if amount is None else amount * factor
+
+
+def _limits(gateway: BTGateway, low: Optional[float], high: Optional[float]) -> tuple[float, float, BTGateway]:
+    return (0.0 if low is None else low), (math.inf if high is None else high), gateway
@@ -4,20 +4,25 @@ import datetime
 import typing
 from typing import Optional, Literal
 
-from pydantic import validator, field_serializer
+from pydantic import validator, field_serializer, PrivateAttr
 from pypayment import PaymentStatus
 
 from multi_merchant.merchants.base import BaseMerchant, MerchantEnum, PAYMENT_LIFETIME
 from multi_merchant.merchants.betatransfer.betatransfer import BetaTrans
+from multi_merchant.merchants.betatransfer.gateways import GatewayIndex
 from multi_merchant.merchants.betatransfer.methods import BTPaymentTypeRUB
+from multi_merchant.merchants.betatransfer.rate import RateService
 from ...models import Invoice
 
 
 class BetaTransferPay(BaseMerchant):
     public_key: str
     client: Optional[BetaTrans] = None
+    rates: Optional[RateService] = None
     merchant: Literal[MerchantEnum.BETA_TRANSFER_PAY]
 
+    _gateway_index: Optional[GatewayIndex] = PrivateAttr(None)
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -32,21 +37,62 @@ class BetaTransferPay(BaseMerchant):
     def serialize_cp(cp: BetaTrans | None) -> typing.Any:
         return None
 
+    @field_serializer('rates')
+    def serialize_rates(rates: RateService | None) -> typing.Any:
+        return None
+
+    @property
+    def gateway_index(self) -> GatewayIndex:
+        """Gateway index, kept in sync with ``rates`` when they are set."""
+        if self._gateway_index is None:
+            if self.rates is not None:
+                self._gateway_index = GatewayIndex.from_rate_service(self.rates)
+            else:
+                self._gateway_index = GatewayIndex()
+        return self._gateway_index
+
+    async def prefetch(self) -> None:
+        if self.rates is not None:
+            await self.rates.get()
+        self.gateway_index
+
     async def create_invoice(
             self,
             user_id: int,
             amount: int | float | str,
             InvoiceClass: typing.Type[Invoice],
             currency: str = "RUB",
-            method: BTPaymentTypeRUB = BTPaymentTypeRUB.YooMoney,
+            method: BTPaymentTypeRUB | Literal["cheapest"] = BTPaymentTypeRUB.YooMoney,
             description: str = "Test Order",
             email: str = None,
             success_url: str = "https://example.com/success",
             fail_url: str = "https://example.com/fail",
+            gateway_currencies: typing.Collection[str] | None = None,
             **kwargs
     ) -> Invoice:
-        payment = BetaTrans(
-            amount,
+        """
+        ``method="cheapest"`` picks the cheapest gateway accepting the amount
+        in ``currency``, in any of ``gateway_currencies`` (all by default).
+        The payer is then charged the amount plus the gateway commission in
+        the gateway currency, the choice is kept in ``extra_data``.
+        """
+        extra_data = {}
+        charged = amount
+        if method == "cheapest":
+            choice = self.gateway_index.select(float(amount), currency, gateway_currencies)
+            if choice is None:
+                raise ValueError(f"No BetaTransfer gateway accepts {amount} {currency}")
+            method = choice.payment_type
+            charged = choice.gross_amount
+            extra_data = {
+                "gateway": choice.gateway.name,
+                "gateway_currency": choice.gateway.currency.value,
+                "gross_amount": choice.gross_amount,
+            }
+
+        payment = await self.run_in_thread(
+            BetaTrans,
+            charged,
             url_success=success_url,
             url_fail=fail_url,
             payment_type=method,
@@ -60,9 +106,10 @@ class BetaTransferPay(BaseMerchant):
             pay_url=payment.url,
             description=description,
             merchant=self.merchant,
-            expire_at=datetime.datetime.now() + datetime.timedelta(seconds=PAYMENT_LIFETIME)
+            expire_at=datetime.datetime.now() + datetime.timedelta(seconds=PAYMENT_LIFETIME),
+            extra_data=extra_data,
         )
 
     async def is_paid(self, invoice_id: str) -> bool:
-        status, income = BetaTrans.get_status_and_income(invoice_id)
+        status, income = await self.run_in_thread(BetaTrans.get_status_and_income, invoice_id)
         return status == PaymentStatus.PAID
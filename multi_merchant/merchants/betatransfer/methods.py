@@ -47,7 +47,12 @@ class BTPaymentType(Enum):
 
 
 class BTPaymentTypeRUB(Enum):
-    """BetaTransfer payment type enum."""
+    """
+    BetaTransfer payment types for RUB payments.
+
+    The limits are static RUB equivalents. ``gateways.GatewayIndex`` uses the
+    native ``BTPaymentType`` limits and the exchange rates instead.
+    """
     YooMoney = BTGateway("YooMoney", BTCurrency.RUB, 12.0, 100, 50000, "YooMoney RUB")
     P2R = BTGateway("P2R", BTCurrency.RUB, 8.5, 100, 50000, "Visa/Mastercard/МИР P2P RUB")
     Card4 = BTGateway("Card4", BTCurrency.RUB, 8.5, 100, 60000, "Cascade SBP RUB")
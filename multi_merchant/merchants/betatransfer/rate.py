@@ -1,11 +1,21 @@
+from __future__ import annotations
+
 import asyncio
-import json
+import os
+import time
+import typing
+from pathlib import Path
 
 import aiohttp
-from pydantic import BaseModel
+from loguru import logger
+from pydantic import BaseModel, ValidationError
 
 url = "https://www.cbr-xml-daily.ru/latest.js"
 
+# The CBR feed is updated once a day
+RATES_TTL = 6 * 60 * 60
+RATES_RETRY_INTERVAL = 60
+
 
 # {'base': 'RUB',
 #  'date': '2024-04-04',
@@ -69,20 +79,214 @@ class RateInfo(BaseModel):
             raise ValueError(f"Currency {currency} not found")
         return roubles * rate
 
+    def get_rate(self, currency: str) -> float:
+        """Units of ``currency`` per one unit of the base currency."""
+        if currency == self.base:
+            return 1.0
+        rate = self.rates.get(currency)
+        if rate is None:
+            raise ValueError(f"Currency {currency} not found")
+        return rate
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Convert ``amount`` between any two currencies of the feed."""
+        if from_currency == to_currency:
+            return amount
+        return amount / self.get_rate(from_currency) * self.get_rate(to_currency)
+
     @classmethod
-    async def fetch(cls):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as res:
-                text = await res.text()
-                data = json.loads(text)
-                return cls(**data)
+    async def fetch(cls, session: aiohttp.ClientSession | None = None, rates_url: str = url):
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await cls.fetch(session, rates_url)
+        async with session.get(rates_url) as res:
+            res.raise_for_status()
+            # The feed is served as application/javascript, so parse the raw body
+            return cls.model_validate_json(await res.read())
+
+
+RatesListener = typing.Callable[[RateInfo], typing.Any]
+
+
+class RateService:
+    """
+    Cached exchange rates for currency conversions.
+
+    Rates are refreshed in the background before they expire, concurrent
+    refreshes share one request, and the last good snapshot is persisted
+    to ``snapshot_path`` so a cold start does not wait on the network.
+    ``get`` only hits the network when nothing has been loaded yet.
+    """
+
+    def __init__(
+            self,
+            rates_url: str = url,
+            ttl: float = RATES_TTL,
+            refresh_ahead: float = 0.8,
+            retry_interval: float = RATES_RETRY_INTERVAL,
+            snapshot_path: str | os.PathLike | None = None,
+            session: aiohttp.ClientSession | None = None,
+    ) -> None:
+        self.rates_url = rates_url
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._session = session
+        self._own_session = session is None
+        self._rates: RateInfo | None = None
+        self._fetched_at = 0.0
+        self._inflight: asyncio.Task[RateInfo] | None = None
+        self._refresher: asyncio.Task | None = None
+        self._listeners: list[RatesListener] = []
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the cached rates were fetched."""
+        return time.monotonic() - self._fetched_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._rates is not None and self.age < self.ttl
+
+    def peek(self) -> RateInfo | None:
+        """Cached rates, without any I/O. May be stale."""
+        return self._rates
+
+    def add_listener(self, listener: RatesListener) -> None:
+        """Call ``listener(rates)`` every time new rates are loaded."""
+        self._listeners.append(listener)
+        if self._rates is not None:
+            listener(self._rates)
+
+    async def get(self) -> RateInfo:
+        """
+        Cached rates. Stale rates are returned as is while a refresh runs
+        in the background; only the very first call waits for the network.
+        """
+        if self._rates is None:
+            return await self.refresh()
+        if not self.is_fresh:
+            self._start_refresh()
+        return self._rates
+
+    async def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        return (await self.get()).convert(amount, from_currency, to_currency)
+
+    async def refresh(self) -> RateInfo:
+        """Fetch new rates. Concurrent callers share the same request."""
+        return await asyncio.shield(self._start_refresh())
+
+    async def start(self) -> None:
+        """Load the persisted snapshot and start the background refresher."""
+        if self._rates is None:
+            await self._load_snapshot()
+        if self._rates is None:
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        for task in (self._refresher, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+        self._refresher = None
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _start_refresh(self) -> asyncio.Task[RateInfo]:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+            self._inflight.add_done_callback(_log_refresh_error)
+        return self._inflight
+
+    async def _fetch(self) -> RateInfo:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._own_session = True
+        rates = await RateInfo.fetch(self._session, self.rates_url)
+        self._set_rates(rates, time.monotonic())
+        await self._save_snapshot(rates)
+        return rates
+
+    def _set_rates(self, rates: RateInfo, fetched_at: float) -> None:
+        self._rates = rates
+        self._fetched_at = fetched_at
+        for listener in self._listeners:
+            try:
+                listener(rates)
+            except Exception as e:
+                logger.exception(f"Exchange rates listener failed: {e!r}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if self._rates is None:
+                delay = self.retry_interval
+            else:
+                delay = max(self.ttl * self.refresh_ahead - self.age, 0)
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(self.retry_interval)
+
+    async def _load_snapshot(self) -> None:
+        path = self.snapshot_path
+        if path is None:
+            return
+        try:
+            data, mtime = await asyncio.to_thread(_read_snapshot, path)
+            rates = RateInfo.model_validate_json(data)
+        except FileNotFoundError:
+            return
+        except (OSError, ValidationError) as e:
+            logger.warning(f"Ignoring exchange rates snapshot {path}: {e!r}")
+            return
+        age = max(time.time() - mtime, 0)
+        self._set_rates(rates, time.monotonic() - age)
+
+    async def _save_snapshot(self, rates: RateInfo) -> None:
+        if self.snapshot_path is None:
+            return
+        try:
+            await asyncio.to_thread(_write_snapshot, self.snapshot_path, rates.model_dump_json())
+        except OSError as e:
+            logger.warning(f"Failed to save exchange rates snapshot: {e!r}")
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Failed to refresh exchange rates: {task.exception()!r}")
+
+
+def _read_snapshot(path: Path) -> tuple[bytes, float]:
+    return path.read_bytes(), path.stat().st_mtime
+
+
+def _write_snapshot(path: Path, data: str) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(data)
+    os.replace(tmp_path, path)
 
 
 async def main():
-    rate_info = await RateInfo.fetch()
-    # eq = rate_info.get_equivalent("KZT", 100)
-    eq = rate_info.get_equivalent("UAH", 250)
-    print(eq)
+    async with RateService() as rates:
+        # eq = (await rates.get()).get_equivalent("KZT", 100)
+        eq = (await rates.get()).get_equivalent("UAH", 250)
+        print(eq)
 
 
 if __name__ == '__main__':
@@ -5,7 +5,6 @@ import typing
 from enum import Enum, StrEnum
 from typing import Literal, LiteralString, Optional
 
-from loguru import logger
 from pydantic import BaseModel
 
 from .base import (
@@ -17,6 +16,7 @@ from .base import (
     MerchantUnion,
 )
 
+from .. import events, tracing
 from ..models import Invoice
 
 
@@ -65,6 +65,8 @@ class StatusInvoice(str, Enum):
 
 
 class CryptoPayment(BaseModel):
+    """Invoice status, other fields of the response are skipped."""
+
     status: Status
     status_invoice: StatusInvoice
     error: str | None = None
@@ -100,9 +102,9 @@ class CryptoCloud(BaseMerchant):
             shop_id=self.shop_id,
         )
         response = await self.make_request("POST", self.create_url, json=data.dict())
-        response = CryptoPaymentResponse(**response)
+        response = tracing.validate(CryptoPaymentResponse, response)
         if response.status == Status.SUCCESS:
-            logger.info(f"Success create invoice {response.invoice_id}")
+            events.emit("invoice.created", merchant=self.merchant, invoice_id=response.invoice_id)
             return InvoiceClass(
                 user_id=user_id,
                 amount=amount,
@@ -114,15 +116,17 @@ class CryptoCloud(BaseMerchant):
                 merchant=self.merchant,
                 expire_at=datetime.datetime.now() + datetime.timedelta(seconds=PAYMENT_LIFETIME),
             )
-        logger.error(f"Error create invoice {response}")
+        events.emit("invoice.create_failed", level="ERROR", merchant=self.merchant, response=response)
         raise Exception(f"Error create invoice {response}")
 
     async def is_paid(self, invoice_id: str) -> bool:
-        response = await self.make_request(
+        response = await self.make_raw_request(
             "GET", self.status_url, params={"uuid": f"{self.id_prefix}{invoice_id}"}
         )
-        response = CryptoPayment(**response)
-        # logger.debug(f"Response from {self.status_url} is {response}")
+        response = tracing.validate(CryptoPayment, response)
+        events.emit(
+            "cryptocloud.status", level="DEBUG", hot=True, invoice_id=invoice_id, status=response.status_invoice
+        )
         return response.status == Status.SUCCESS and response.status_invoice in (
             StatusInvoice.PAID,
             StatusInvoice.OVERPAID,
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import typing
 import uuid
 from typing import Literal, Optional, Any
@@ -38,7 +37,7 @@ class Cryptomus(BaseMerchant):
     ) -> Invoice:
         order_id = uuid.uuid4().hex
 
-        invoice: CryptomusInvoice = await asyncio.to_thread(  # type: ignore
+        invoice: CryptomusInvoice = await self.run_in_thread(  # type: ignore
             self.client.create_invoice,
             amount=amount,
             currency=currency,
@@ -56,7 +55,7 @@ class Cryptomus(BaseMerchant):
         )
 
     async def is_paid(self, invoice_id: str) -> bool:
-        invoice: CryptomusInvoice = await asyncio.to_thread(  # type: ignore
+        invoice: CryptomusInvoice = await self.run_in_thread(  # type: ignore
             self.client.payment_information,
             order_id=invoice_id,
         )
@@ -1,11 +1,13 @@
 from hashlib import md5
-from typing import Optional, Union, List
+from typing import AsyncIterator, Optional, Type, TypeVar, Union, List
 from urllib.parse import urlencode
 
 from .base import BaseClient
 from .const import HTTPMethods, Currencies
 from .models.balance import Balance
-from .models.transaction import Transaction
+from .models.transaction import Transaction, TransactionState
+
+TransactionT = TypeVar('TransactionT', Transaction, TransactionState)
 
 
 class Payok(BaseClient):
@@ -83,6 +85,54 @@ class Payok(BaseClient):
 
         return transactions
 
+    async def get_transaction_status(self, payment: Union[int, str]) -> TransactionState:
+        '''
+        Get the status of a transaction, without its other fields
+            :param payment: Payment ID
+        '''
+        url = f'{self.API_HOST}/api/transaction'
+        data = {
+            'API_ID': self.__api_id,
+            'API_KEY': self.__api_key,
+            'shop': self._shop,
+            'payment': payment,
+        }
+        response = await self._make_request(HTTPMethods.POST, url, data=data)
+        return TransactionState.model_validate(response['1'])
+
+    async def iter_transactions(
+            self,
+            offset: int = 0,
+            max_pages: Optional[int] = None,
+            model: Type[TransactionT] = Transaction,
+    ) -> AsyncIterator[TransactionT]:
+        '''
+        Iterate over shop transactions, newest first, paging by offset.
+            Only one page is held in memory at a time, paging stops at an empty page.
+            :param offset: Number of transactions to skip
+            :param max_pages: Stop after this many requests
+            :param model: Transaction, or TransactionState for statuses only
+            Docs: https://payok.io/cabinet/documentation/doc_api_transaction
+        '''
+        url = f'{self.API_HOST}/api/transaction'
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            data = {
+                'API_ID': self.__api_id,
+                'API_KEY': self.__api_key,
+                'shop': self._shop,
+            }
+            if offset:
+                data['offset'] = offset
+
+            page = await self._make_request(HTTPMethods.POST, url, data=data)
+            pages += 1
+            if not page:
+                return
+            for transaction in page.values():
+                yield model.model_validate(transaction)
+            offset += len(page)
+
     async def create_pay(
             self,
             amount: float,
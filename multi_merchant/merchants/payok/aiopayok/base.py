@@ -1,18 +1,27 @@
 import asyncio
+import contextlib
 import json
 import ssl
+import time
 from typing import Optional
 
 import certifi
-from aiohttp import ClientSession, TCPConnector
+from aiohttp import BaseConnector, ClientError, ClientSession, ClientTimeout, TCPConnector
 from aiohttp.typedefs import StrOrURL
+from yarl import URL
 
 from .exceptions import PayokAPIError
+from ...base import DNS_CACHE_TTL, KEEPALIVE_TIMEOUT
+from .... import deadlines, tracing
+from ....admission import AdmissionController
+from ....capture.recorder import get_recorder
 
 
 class BaseClient:
     '''Base aiohttp client'''
 
+    API_HOST: str
+
     def __init__(self) -> None:
         '''
         Set defaults on object init.
@@ -23,18 +32,51 @@ class BaseClient:
         '''
         self._loop = asyncio.get_event_loop()
         self._session: Optional[ClientSession] = None
+        # Bulkhead and timeouts of the owning merchant, set by PayokPay
+        self.admission: Optional[AdmissionController] = None
+        self.timeout = ClientTimeout(total=30, sock_connect=5, sock_read=15)
+        # Connector owned by the caller (``PayokPay.share_connector``)
+        self.connector: Optional[BaseConnector] = None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
 
     def get_session(self):
         '''Get cached session. One session per instance.'''
         if isinstance(self._session, ClientSession) and not self._session.closed:
             return self._session
 
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        connector = TCPConnector(ssl=ssl_context)
+        connector = self.connector
+        if connector is None:
+            connector = TCPConnector(ttl_dns_cache=DNS_CACHE_TTL, keepalive_timeout=KEEPALIVE_TIMEOUT)
 
-        self._session = ClientSession(connector=connector)
+        self._session = ClientSession(
+            connector=connector,
+            connector_owner=self.connector is None,
+            timeout=self.timeout,
+            trace_configs=tracing.request_trace_configs(),
+        )
         return self._session
 
+    async def warm_up(self) -> None:
+        '''Resolve the API host and open a keep-alive connection to it.'''
+        session = self.get_session()
+        try:
+            async with session.head(
+                    self.API_HOST, ssl=self.ssl_context, timeout=ClientTimeout(total=10), allow_redirects=False,
+            ):
+                pass
+        except (ClientError, asyncio.TimeoutError):
+            pass
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
     async def _make_request(self, method: str, url: StrOrURL, **kwargs) -> dict:
         '''
         Make a request.
@@ -44,12 +86,31 @@ class BaseClient:
             :param kwargs: data, params, json and other...
             :return: status and result or exception
         '''
+        slot = self.admission.slot() if self.admission is not None else contextlib.nullcontext()
+        # Waiting for a slot counts against the deadline too
+        async with deadlines.scope(f"payok {method}"), slot:
+            response = await self._send(method, url, **kwargs)
+        return await self._validate_response(response)
+
+    async def _send(self, method: str, url: StrOrURL, **kwargs) -> dict:
         session = self.get_session()
+        # Per request, a shared connector has the default SSL context
+        kwargs.setdefault("ssl", self.ssl_context)
+        recorder = get_recorder()
+        if recorder is None and tracing.get_tracer() is None:
+            async with session.request(method, url, **kwargs) as response:
+                return json.loads(await response.text())
 
-        async with session.request(method, url, **kwargs) as response:
-            text = await response.text()
-            response = json.loads(text)
-        return await self._validate_response(response)
+        span_url = str(URL(url).with_query(None))
+        with tracing.span("http.request", merchant="payok", method=method, url=span_url) as current:
+            if current is not None:
+                kwargs["trace_request_ctx"] = {"span": current}
+            started_at, started = time.time(), time.perf_counter()
+            async with session.request(method, url, **kwargs) as response:
+                if recorder is not None:
+                    await recorder.capture("payok", method, url, kwargs, response, started_at, started)
+                text = await response.text()
+            return json.loads(text)
 
     async def _validate_response(self, response: dict) -> dict:
         if response.get("status") and response.pop("status") == "error":
@@ -60,5 +121,5 @@ class BaseClient:
         return response
 
     def __del__(self):
-        if self._session:
+        if self._session and not self._session.closed:
             self._loop.run_until_complete(self._session.close())
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class HTTPMethods(str, Enum):
@@ -14,3 +14,11 @@ class Currencies(str, Enum):
     USD = 'USD'
     EUR = 'EUR'
     RUB2 = 'RUB2'
+
+
+class TransactionStatus(IntEnum):
+    '''Payok transaction statuses.'''
+
+    WAITING = 0
+    PAID = 1
+
@@ -1,10 +1,12 @@
-import gc
-from typing import Optional, Type, Union
+from typing import ClassVar, Optional, Type, Union
 
 
 class CodeErrorFactory(Exception):
     '''Payok API Exception'''
 
+    # Interned exception classes, one per (factory class, error code)
+    _exc_classes: ClassVar[dict[tuple[type, Optional[int]], type]] = {}
+
     def __init__(self, code: int = None, desc: str = None) -> None:
         self.code = int(code) if code else None
         self.desc = desc
@@ -25,21 +27,28 @@ class CodeErrorFactory(Exception):
         if code is None:
             return cls
 
-        catch_exc_classname = cls.generate_exc_classname(code)
-
-        for obj in gc.get_objects():
-            if obj.__class__.__name__ == catch_exc_classname:
-                return obj.__class__
-
-        return type(catch_exc_classname, (cls,), {})
+        return cls.get_exc_class(code)
 
     @classmethod
     def exception_to_raise(
             cls, code: int, desc: str
     ) -> "CodeErrorFactory":
         """ Returns an error with error code and error_description"""
-        exception_type = type(cls.generate_exc_classname(code), (cls,), {})
-        return exception_type(code, desc)
+        return cls.get_exc_class(code)(code, desc)
+
+    @classmethod
+    def get_exc_class(cls, code: Optional[int]) -> Type["CodeErrorFactory"]:
+        """ Returns the exception class for the error code, creating it once """
+        key = (cls, int(code) if code else None)
+        exc_class = cls._exc_classes.get(key)
+        if exc_class is None:
+            exc_class = type(
+                cls.generate_exc_classname(key[1]),
+                (cls,),
+                {"__module__": cls.__module__},
+            )
+            exc_class = cls._exc_classes.setdefault(key, exc_class)
+        return exc_class
 
     @classmethod
     def generate_exc_classname(cls, code: Optional[int]) -> str:
@@ -23,3 +23,11 @@ class Transaction(BaseModel):
     custom_fields: str
     webhook_status: int
     webhook_amount: int
+
+
+class TransactionState(BaseModel):
+    '''Status projection of a Payok transaction, other fields are skipped'''
+
+    payment_id: Union[int, str]
+    transaction_status: int
+    date: str | None = None
@@ -3,21 +3,29 @@ from __future__ import annotations
 import datetime
 import typing
 import uuid
+from contextlib import aclosing
 from typing import Optional, Literal
 
+from aiohttp import BaseConnector
 from pydantic import validator, field_serializer
-from pypayment import PaymentStatus
 
 from multi_merchant.merchants.base import (
     BaseMerchant,
     MerchantEnum,
     PAYMENT_LIFETIME,
+    TIME_ZONE,
     MerchantUnion,
 )
 from multi_merchant.merchants.betatransfer.methods import BTPaymentTypeRUB
 from multi_merchant.merchants.payok.aiopayok import Payok
+from multi_merchant.merchants.payok.aiopayok.const import TransactionStatus
+from multi_merchant.merchants.payok.aiopayok.exceptions import CodeErrorFactory
+from multi_merchant.merchants.payok.aiopayok.models.transaction import Transaction, TransactionState
 from ...models import Invoice
 
+# Transaction pages a ``check_paid_batch`` reads at most
+CHECK_MAX_PAGES = 20
+
 
 class PayokPay(BaseMerchant):
     api_id: int
@@ -40,6 +48,29 @@ class PayokPay(BaseMerchant):
     def serialize_cp(cp: Payok | None) -> typing.Any:
         return None
 
+    def model_post_init(self, __context: typing.Any) -> None:
+        super().model_post_init(__context)
+        if self.client is not None:
+            self.client.admission = self.admission
+            self.client.timeout = self.timeouts.client_timeout()
+
+    def share_connector(self, connector: BaseConnector | None) -> None:
+        super().share_connector(connector)
+        if self.client is not None:
+            self.client.connector = connector
+
+    async def close_session(self):
+        await super().close_session()
+        if self.client is not None:
+            await self.client.close()
+
+    def warm_up_urls(self) -> set[str]:
+        # Payok requests go through the client's own session
+        return set()
+
+    async def prefetch(self) -> None:
+        await self.client.warm_up()
+
     async def create_invoice(
         self,
         user_id: int,
@@ -69,7 +100,56 @@ class PayokPay(BaseMerchant):
 
     async def is_paid(self, invoice_id: str) -> bool:
         try:
-            transaction = await self.client.get_transactions(invoice_id)
-            return transaction["transaction_status"] == PaymentStatus.PAID.value
-        except Exception as e:
+            transaction = await self.client.get_transaction_status(invoice_id)
+        except CodeErrorFactory:
+            # Payok answers with an error while the payment does not exist yet
             return False
+        return transaction.transaction_status == TransactionStatus.PAID
+
+    async def check_paid_batch(self, invoice_ids: typing.Sequence[str]) -> dict[str, bool]:
+        # Invoices are checked until they expire, so their payments are at
+        # most PAYMENT_LIFETIME old. A minute of margin for clock skew.
+        since = datetime.datetime.now(TIME_ZONE) - datetime.timedelta(seconds=PAYMENT_LIFETIME + 60)
+        return await self.reconcile_invoices(invoice_ids, since=since, max_pages=CHECK_MAX_PAGES)
+
+    async def reconcile_invoices(
+        self,
+        invoice_ids: typing.Iterable[str],
+        since: datetime.datetime | None = None,
+        max_pages: int | None = None,
+    ) -> dict[str, bool]:
+        """
+        Resolve many invoices with one pass over the shop transactions.
+
+        Transactions are paged newest first. Paging stops as soon as every
+        invoice is found, or once transactions get older than ``since``
+        (usually the creation time of the oldest pending invoice).
+        """
+        pending = set(invoice_ids)
+        result = dict.fromkeys(pending, False)
+        if not pending:
+            return result
+        if since is not None and since.tzinfo is not None:
+            since = since.astimezone(TIME_ZONE).replace(tzinfo=None)
+
+        transactions = self.client.iter_transactions(max_pages=max_pages, model=TransactionState)
+        async with aclosing(transactions):
+            async for transaction in transactions:
+                payment_id = str(transaction.payment_id)
+                if payment_id in pending:
+                    pending.discard(payment_id)
+                    result[payment_id] = transaction.transaction_status == TransactionStatus.PAID
+                    if not pending:
+                        break
+                if since is not None:
+                    created_at = _transaction_date(transaction)
+                    if created_at is not None and created_at < since:
+                        break
+        return result
+
+
+def _transaction_date(transaction: Transaction | TransactionState) -> datetime.datetime | None:
+    try:
+        return datetime.datetime.fromisoformat(transaction.date)
+    except (TypeError, ValueError):
+        return None
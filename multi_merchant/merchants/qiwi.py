@@ -10,11 +10,9 @@ except ImportError:
 
 from pydantic import validator
 
-from .base import PAYMENT_LIFETIME, TIME_ZONE, BaseMerchant, MerchantEnum
+from .base import PAYMENT_LIFETIME, TIME_ZONE, BaseMerchant, InvoiceT, MerchantEnum
 import typing
 
-from ..models.invoice import Invoice
-
 
 # todo L1 24.11.2022 18:29 taima: Использовать кастомную платежную систему вместо модуля glQiwiApi
 #  Каждый раз открывается и закрывается сессия, что не есть хорошо
@@ -36,16 +34,17 @@ class Qiwi(BaseMerchant):
             self,
             user_id: int,
             amount: int | float | str,
-            InvoiceClass: typing.Type[Invoice],
+            InvoiceClass: typing.Type[InvoiceT],
             description: str = None,
             email: str = None,
-    ) -> Invoice:
+    ) -> InvoiceT:
+        lifetime = datetime.timedelta(seconds=PAYMENT_LIFETIME)
         bill = await self.client.create_p2p_bill(
             amount=amount,
             comment=description or f"Product {amount}",
-            expire_at=datetime.datetime.now(TIME_ZONE) + datetime.timedelta(seconds=PAYMENT_LIFETIME),
+            expire_at=datetime.datetime.now(TIME_ZONE) + lifetime,
         )
-        return Invoice(
+        return InvoiceClass(
             user_id=user_id,
             amount=bill.amount.value,
             currency=bill.amount.currency,
@@ -54,6 +53,8 @@ class Qiwi(BaseMerchant):
             email=email,
             description=description,
             merchant=self.merchant,
+            # Naive server-local time, like the other merchants
+            expire_at=datetime.datetime.now() + lifetime,
         )
 
     async def is_paid(self, invoice_id: str) -> bool:
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import importlib
+import typing
+from typing import Annotated, Iterable, Union
+
+from pydantic import Field
+
+from .base import MerchantEnum
+
+if typing.TYPE_CHECKING:
+    from .base import BaseMerchant
+
+# Merchant modules are imported on first use, so a deployment only pays
+# for (and only needs installed) the SDKs of the merchants it configures.
+MERCHANT_REGISTRY: dict[MerchantEnum, tuple[str, str]] = {
+    MerchantEnum.QIWI: ("multi_merchant.merchants.qiwi", "Qiwi"),
+    MerchantEnum.YOOKASSA: ("multi_merchant.merchants.yookassa.merchant", "YooKassa"),
+    MerchantEnum.YOOMONEY: ("multi_merchant.merchants.yoomoney.merchant", "YooMoney"),
+    MerchantEnum.CRYPTO_PAY: ("multi_merchant.merchants.cryptopay", "CryptoPay"),
+    MerchantEnum.CRYPTO_CLOUD: ("multi_merchant.merchants.cryptocloud", "CryptoCloud"),
+    MerchantEnum.CRYPTOMUS: ("multi_merchant.merchants.cryptomus", "Cryptomus"),
+    MerchantEnum.BETA_TRANSFER_PAY: ("multi_merchant.merchants.betatransfer.merchant", "BetaTransferPay"),
+    MerchantEnum.PAYOK: ("multi_merchant.merchants.payok.merchant", "PayokPay"),
+    MerchantEnum.AAIO: ("multi_merchant.merchants.aaio.merchant", "AaioPay"),
+}
+
+# Public class name -> merchant, used by the package level ``__getattr__``
+MERCHANT_NAMES: dict[str, MerchantEnum] = {
+    class_name: merchant for merchant, (_, class_name) in MERCHANT_REGISTRY.items()
+}
+
+
+def get_merchant_class(merchant: MerchantEnum | str) -> type[BaseMerchant]:
+    """Import and return the merchant class registered for ``merchant``."""
+    merchant = MerchantEnum(merchant)
+    try:
+        module_path, class_name = MERCHANT_REGISTRY[merchant]
+    except KeyError:
+        raise ValueError(f"Merchant {merchant} is not registered") from None
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+
+def build_merchant_annotated(merchants: Iterable[MerchantEnum | str] | None = None) -> typing.Any:
+    """
+    Build a discriminated union of merchant configs.
+
+    Only the given merchants are imported. Without arguments every
+    registered merchant is included.
+    """
+    if merchants is None:
+        merchants = MERCHANT_REGISTRY
+    classes = tuple(dict.fromkeys(get_merchant_class(m) for m in merchants))
+    if not classes:
+        raise ValueError("At least one merchant is required")
+    if len(classes) == 1:
+        return classes[0]
+    return Annotated[Union[classes], Field(discriminator="merchant")]
@@ -4,12 +4,11 @@ import typing
 from enum import StrEnum
 from typing import ClassVar
 
-from loguru import logger
 from pydantic import SecretStr, BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .base import BaseMerchant
-
+from .. import events, tracing
 from ..models.invoice import Invoice, Currency
 
 
@@ -65,6 +64,22 @@ class TransactionResponse(BaseModel):
         return False
 
 
+class TransferStatus(BaseModel):
+    """Fields of ``TransactionList`` needed to tell a payment, the rest is skipped."""
+
+    amount: float
+    to: str
+    state: State
+
+
+class TransfersStatus(BaseModel):
+    transactionLists: list[TransferStatus]
+
+
+class TransactionStatusResponse(TransactionResponse):
+    data: list[TransfersStatus]
+
+
 class USDT(BaseMerchant):
     address: str
     api_key: SecretStr
@@ -93,16 +108,26 @@ class USDT(BaseMerchant):
         Throttling: 5 requests per second
         :return:
         """
-        logger.info("Get transaction response from USDT")
+        return tracing.validate(TransactionResponse, await self._get_transactions())
+
+    async def get_transaction_status(self) -> TransactionStatusResponse:
+        """Transfers with only the fields needed for ``is_paid``."""
+        return tracing.validate(TransactionStatusResponse, await self._get_transactions())
+
+    async def _get_transactions(self) -> bytes:
+        events.emit("usdt.transactions.poll", level="DEBUG", hot=True, address=self.address)
         params = {
             "chainShortName": "TRON",
             "address": self.address,
             "protocolType": "token_20",
             "limit": 50,
         }
-        response = await self.make_request("GET", self.status_url, params=params)
-        return TransactionResponse(**response)
+        return await self.make_raw_request("GET", self.status_url, params=params)
 
     async def is_paid(self, invoice_id: str) -> bool:
-        response = await self.get_transaction_response()
+        response = await self.get_transaction_status()
         return response.is_paid(float(invoice_id), to=self.address)
+
+    async def check_paid_batch(self, invoice_ids: typing.Sequence[str]) -> dict[str, bool]:
+        response = await self.get_transaction_status()
+        return {invoice_id: response.is_paid(float(invoice_id), to=self.address) for invoice_id in invoice_ids}
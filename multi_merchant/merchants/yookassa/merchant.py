@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
+import random
+import time
 import typing
 import uuid
 from base64 import b64encode
 from enum import Enum
 from typing import Optional, Literal
 
-from pydantic import BaseModel, validator
+from aiohttp import ClientError
+from pydantic import BaseModel, PrivateAttr, validator
 
 from multi_merchant.merchants.base import (
     BaseMerchant,
@@ -18,7 +22,13 @@ from multi_merchant.merchants.base import (
     MerchantUnion,
     Amount as BaseAmount,
 )
+from multi_merchant import tracing
 from multi_merchant.models import Invoice
+from multi_merchant.routing.hedging import HedgeBudget
+from multi_merchant.routing.stats import MerchantStats
+
+# Samples needed before the observed p95 replaces ``hedge_after``
+HEDGE_MIN_SAMPLES = 20
 
 
 class Amount(BaseModel):
@@ -117,9 +127,35 @@ class YooPayment(YooPaymentRequest):
         return self.paid
 
 
+class YooPaymentStatus(BaseModel):
+    """Status projection of ``YooPayment``, other fields are skipped."""
+
+    id: str
+    paid: bool
+    status: Status
+
+
 class YooKassa(BaseMerchant):
+    """
+    YooKassa merchant.
+
+    Payment creation is idempotent by ``Idempotence-Key``, so with
+    ``hedge_after`` set a second request with the same key is sent when the
+    first one is slow, and the first response wins. Once enough samples are
+    collected the observed p95 creation latency is used as the threshold.
+    Failed hedged creations are retried ``create_retries`` times with the
+    same key, after a jittered exponential backoff from ``retry_backoff``
+    seconds. Without hedging a payment is created with a single request.
+    """
+
     create_url: Optional[str] = "https://api.yookassa.ru/v3/payments"
     merchant: Literal[MerchantEnum.YOOKASSA]
+    hedge_after: Optional[float] = None
+    create_retries: int = 2
+    retry_backoff: float = 0.2
+
+    _create_stats: MerchantStats = PrivateAttr(default_factory=MerchantStats)
+    _hedge_budget: HedgeBudget = PrivateAttr(default_factory=HedgeBudget)
 
     @property
     def headers(self) -> dict:
@@ -139,6 +175,7 @@ class YooKassa(BaseMerchant):
         currency: Currency = Currency.RUB,
         description: str | None = None,
         return_url: str = "https://t.me/",  # todo L2 14.08.2022 19:02 taima: прописать url
+        idempotence_key: str | None = None,
     ) -> InvoiceT:
         description = description or f"Product {amount} {currency} for user ID{user_id}"
         data = YooPaymentRequest.create_payment(
@@ -148,16 +185,13 @@ class YooKassa(BaseMerchant):
             description=description,
         )
 
-        idempotence_key = {"Idempotence-Key": str(uuid.uuid4())}
-        response = await self.make_request(
-            "POST",
-            self.create_url,
-            json=data.model_dump(),
-            headers=idempotence_key,
+        response = await self.create_payment(
+            data.model_dump(),
+            idempotence_key or str(uuid.uuid4()),
         )
         if response.get("type") == "error":
             raise Exception(response)
-        yoo_payment = YooPayment(**response)
+        yoo_payment = tracing.validate(YooPayment, response)
         return InvoiceClass(
             user_id=user_id,
             amount=float(yoo_payment.amount.value),
@@ -169,9 +203,74 @@ class YooKassa(BaseMerchant):
             expire_at=datetime.datetime.now() + datetime.timedelta(seconds=PAYMENT_LIFETIME),
         )
 
+    @property
+    def hedge_rate(self) -> float:
+        """Share of payment creations that sent a hedged request."""
+        return self._hedge_budget.hedge_rate
+
+    def hedge_threshold(self) -> float | None:
+        if self.hedge_after is None:
+            return None
+        if len(self._create_stats) >= HEDGE_MIN_SAMPLES:
+            return self._create_stats.p95
+        return self.hedge_after
+
+    async def create_payment(self, data: dict, idempotence_key: str) -> dict:
+        """Create a payment. Hedged creations are retried with the same idempotence key."""
+        headers = {"Idempotence-Key": idempotence_key}
+        retries = self.create_retries if self.hedge_after is not None else 0
+        # One request for the hedge rate, however many attempts it takes
+        self._hedge_budget.on_request()
+        for attempt in range(retries + 1):
+            last_attempt = attempt == retries
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            try:
+                response = await self._send_hedged("POST", self.create_url, json=data, headers=headers)
+            except (ClientError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                continue
+            if response.get("code") == "internal_server_error" and not last_attempt:
+                continue
+            return response
+
+    async def _send_hedged(self, method: str, url: str, **kwargs) -> typing.Any:
+        start = time.perf_counter()
+        tasks = {asyncio.create_task(self.make_request(method, url, **kwargs))}
+        try:
+            threshold = self.hedge_threshold()
+            if threshold is not None:
+                done, _ = await asyncio.wait(tasks, timeout=threshold)
+                if not done and self._hedge_budget.try_acquire():
+                    hedge = asyncio.create_task(self.make_request(method, url, **kwargs))
+                    hedge.add_done_callback(lambda _: self._hedge_budget.release())
+                    tasks.add(hedge)
+
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        failed = isinstance(result, dict) and result.get("type") == "error"
+                        self._create_stats.record(time.perf_counter() - start, ok=not failed)
+                        return result
+                    error = task.exception()
+            self._create_stats.record(time.perf_counter() - start, ok=False)
+            raise error
+        finally:
+            # Safe to drop: the other request carries the same idempotence key
+            for task in tasks:
+                task.cancel()
+
     async def is_paid(self, invoice_id: str) -> bool:
         """Проверка статуса платежа"""
-        return (await self.get_invoice(invoice_id)).paid
+        return (await self.get_invoice_status(invoice_id)).paid
+
+    async def get_invoice_status(self, invoice_id: str) -> YooPaymentStatus:
+        res = await self.make_raw_request("GET", f"{self.create_url}/{invoice_id}")
+        return tracing.validate(YooPaymentStatus, res)
 
     async def get_invoice(self, invoice_id: str) -> YooPayment:
         """Получение информации о платеже"""
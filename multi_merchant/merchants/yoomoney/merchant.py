@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import datetime
 import typing
 from typing import Any, Literal, Optional
@@ -44,6 +43,9 @@ class YooMoney(BaseMerchant):
         self.receiver = accoint_number
         return self.receiver
 
+    async def prefetch(self) -> None:
+        await self.run_in_thread(self.get_receiver)
+
     def create_quickpay(
         self,
         amount: float,
@@ -75,7 +77,7 @@ class YooMoney(BaseMerchant):
         amount = float(amount)
 
         description = description or f"Sponsor this project {invoive_id}"
-        qp = await asyncio.to_thread(self.create_quickpay, amount, invoive_id, description)
+        qp = await self.run_in_thread(self.create_quickpay, amount, invoive_id, description)
 
         return InvoiceClass(
             user_id=user_id,
@@ -96,7 +98,7 @@ class YooMoney(BaseMerchant):
         return False
 
     async def get_operations(self, invoice_id: str):
-        history = await asyncio.to_thread(
+        history = await self.run_in_thread(
             self.client.operation_history,
             label=invoice_id,
         )
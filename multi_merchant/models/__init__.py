@@ -1,6 +1,13 @@
-from .invoice import Invoice, Currency
+from .draft import InvoiceDraft
+from .invoice import Invoice, LeasedInvoice, Currency
+from .replicas import SessionRouter
+from .repository import InvoiceRepository
 
 __all__ = (
     "Invoice",
+    "InvoiceDraft",
+    "LeasedInvoice",
+    "InvoiceRepository",
+    "SessionRouter",
     "Currency",
 )
\ No newline at end of file
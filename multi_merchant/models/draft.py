@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import typing
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from multi_merchant.merchants.base import InvoiceT, MerchantEnum
+from multi_merchant.models.replicas import note_core_writes
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceDraft:
+    """
+    Created invoice that is not an ORM object yet.
+
+    Accepts the same arguments as ``Invoice``, so it can be passed to
+    ``create_invoice`` as ``InvoiceClass`` when only the pay URL is needed or
+    invoices are inserted in bulk later. Unset fields get the column
+    defaults on insert.
+    """
+
+    user_id: int
+    amount: float
+    currency: str
+    invoice_id: str
+    pay_url: Optional[str] = None
+    description: Optional[str] = None
+    merchant: Optional[MerchantEnum] = None
+    expire_at: Optional[datetime.datetime] = None
+    extra_data: Optional[dict] = None
+    status: Optional[str] = None
+    order_id: Optional[str] = None
+    email: Optional[str] = None
+
+    def as_row(self) -> dict[str, Any]:
+        """Set fields as an INSERT row."""
+        row = {}
+        for field in _FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                row[field] = value
+        return row
+
+    def to_invoice(self, InvoiceClass: typing.Type[InvoiceT]) -> InvoiceT:
+        return InvoiceClass(**self.as_row())
+
+    @staticmethod
+    async def insert_many(
+            session: AsyncSession,
+            InvoiceClass: typing.Type[InvoiceT],
+            drafts: Iterable[InvoiceDraft],
+    ) -> int:
+        """Insert drafts into ``InvoiceClass``'s table with multi-row INSERTs."""
+        # executemany needs the same columns in every row
+        groups: dict[frozenset[str], list[dict[str, Any]]] = {}
+        count = 0
+        for draft in drafts:
+            row = draft.as_row()
+            groups.setdefault(frozenset(row), []).append(row)
+            count += 1
+        for rows in groups.values():
+            await session.execute(insert(InvoiceClass), rows)
+            note_core_writes(session, ((row.get("user_id"), row.get("invoice_id")) for row in rows))
+        return count
+
+
+_FIELDS = tuple(field.name for field in dataclasses.fields(InvoiceDraft))
@@ -4,10 +4,11 @@ import datetime
 from enum import StrEnum
 from typing import TYPE_CHECKING, Optional, Self
 
-from sqlalchemy import String, func, select, JSON
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Mapped, mapped_column, selectinload
+from sqlalchemy import String, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm.exc import DetachedInstanceError
 
+from multi_merchant import tracing
 from multi_merchant.merchants.base import (
     TIME_ZONE,
     MerchantEnum,
@@ -15,6 +16,13 @@ from multi_merchant.merchants.base import (
     Currency,
 )
 
+if TYPE_CHECKING:
+    from multi_merchant.models.replicas import ReadSession
+    from multi_merchant.models.repository import InvoiceRepository
+
+
+# ``InstanceState.info`` flag of invoices read through a ``SessionRouter``
+READ_ONLY = "multi_merchant.read_only"
 
 # класс с методами для работы с мерчантами
 
@@ -72,48 +80,84 @@ class Invoice:
             email: Optional[str] = None,
         ): ...
 
+    def __setattr__(self, key: str, value) -> None:
+        state = self.__dict__.get("_sa_instance_state")
+        if state is not None and state.detached and state.info.get(READ_ONLY):
+            raise DetachedInstanceError(
+                f"{self.__class__.__name__} read through SessionRouter is read-only,"
+                f" add it to a writer() session to change {key}"
+            )
+        super().__setattr__(key, value)
+
     def __str__(self):
         return f"[{self.__class__.__name__}] {self.user} {self.amount} {self.currency}"
 
     @classmethod
-    async def get_pending_invoices(cls, session: AsyncSession) -> list[Self]:
+    def repository(cls) -> InvoiceRepository[Self]:
+        """Cached queries of this invoice class."""
+        from .repository import get_repository
+
+        return get_repository(cls)
+
+    @classmethod
+    @tracing.traced("invoice.get_pending_invoices")
+    async def get_pending_invoices(cls, session: ReadSession) -> list[Self]:
         """Get pending invoices."""
-        result = await session.execute(
-            select(cls)
-            .options(selectinload(cls.user))
-            .where(cls.expire_at > func.now())
-            .where(cls.status == Status.PENDING)
-        )
-        return result.unique().scalars().all()
+        return await cls.repository().get_pending(session)
+
+    @classmethod
+    @tracing.traced("invoice.get_by_invoice_id")
+    async def get_by_invoice_id(cls, session: ReadSession, invoice_id: str) -> Self | None:
+        """Get invoice by the provider's invoice id."""
+        return await cls.repository().get_by_invoice_id(session, invoice_id)
+
+    @classmethod
+    @tracing.traced("invoice.get_history")
+    async def get_history(cls, session: ReadSession, user_id: int, limit: int = 20) -> list[Self]:
+        """Get the user's latest invoices, newest first."""
+        return await cls.repository().get_history(session, user_id, limit)
 
     @classmethod
+    @tracing.traced("invoice.has_pending_invoice")
+    async def has_pending_invoice(
+        cls,
+        session: ReadSession,
+        user_id: int,
+        merchant: MerchantEnum | None = None,
+    ) -> bool:
+        """Whether the user has an unpaid invoice, without loading it."""
+        return await cls.repository().has_pending(session, user_id, merchant)
+
+    @classmethod
+    @tracing.traced("invoice.get_last_invoice")
     async def get_last_invoice(
         cls,
-        session: AsyncSession,
+        session: ReadSession,
         user_id: int,
         amount: int | float | str,
         currency: Currency,
         merchant: MerchantEnum,
     ) -> Self | None:
         """Get last unpaid invoice."""
-        return (
-            (
-                await session.execute(
-                    select(cls)
-                    .where(cls.user_id == user_id)
-                    .where(cls.amount == float(amount))
-                    .where(cls.currency == currency)
-                    .where(cls.merchant == merchant)
-                    .where(cls.status == Status.PENDING)
-                    .where(cls.expire_at > func.now())
-                    .order_by(cls.id.desc())
-                )
-            )
-            .unique()
-            .scalar_one_or_none()
-        )
+        return await cls.repository().get_last(session, user_id, amount, currency, merchant)
 
     # todo L1 TODO 22.04.2023 22:56 taima: Do successfully_paid and check_payment methods in one method
     async def successfully_paid(self):
         """Successful payment."""
         self.status = Status.SUCCESS
+
+
+class LeasedInvoice(Invoice):
+    """
+    Invoice with the status check schedule of ``multi_merchant.check_worker``.
+
+    Adds the ``next_check_at``, ``check_attempts``, ``lease_owner`` and
+    ``lease_until`` columns, existing tables need a migration.
+    """
+
+    __abstract__ = True
+
+    next_check_at: Mapped[datetime.datetime | None] = mapped_column(index=True, default=datetime.datetime.now)
+    check_attempts: Mapped[int] = mapped_column(default=0)
+    lease_owner: Mapped[str | None] = mapped_column(String(64))
+    lease_until: Mapped[datetime.datetime | None]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import contextlib
+import itertools
+import time
+import typing
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Sequence
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from multi_merchant.models.invoice import READ_ONLY, Invoice
+
+# ``Session.info`` keys of a ``writer()`` session: its router, and the
+# ``(user_id, invoice_id)`` written in the current transaction
+_ROUTER_KEY = "multi_merchant.session_router"
+_PENDING_KEY = "multi_merchant.pending_writes"
+
+
+class SessionRouter:
+    """
+    Sends writes to the primary database and reads to replicas.
+
+    Invoices inserted or moved to another status through a ``writer()``
+    session are remembered for ``read_your_writes`` seconds (longer than
+    the replication lag) from the commit. Reads about them, by ``user_id``
+    or ``invoice_id``, go to the primary in that window, so a user never
+    sees an invoice older than their own write. The window is per process.
+    Replicas are used in turn, without replicas everything goes to the
+    primary.
+
+    Core ``insert()``/``update()`` statements skip the ORM flush, code that
+    runs them on a ``writer()`` session reports the rows with
+    ``note_core_writes``.
+
+    Invoices read through the router come from a session that is closed
+    on return. They are read-only: changing one raises
+    ``DetachedInstanceError`` until it is added to a ``writer()`` session.
+    """
+
+    def __init__(
+            self,
+            primary: async_sessionmaker[AsyncSession],
+            replicas: Sequence[async_sessionmaker[AsyncSession]] = (),
+            read_your_writes: float = 5.0,
+    ) -> None:
+        self.primary = primary
+        self.replicas = tuple(replicas)
+        self.read_your_writes = read_your_writes
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self._next_replica = itertools.cycle(self.replicas)
+        # Key -> written at, oldest first
+        self._written: OrderedDict[Hashable, float] = OrderedDict()
+
+    def writer(self) -> AsyncSession:
+        """Session on the primary that records its invoice writes."""
+        session = self.primary()
+        session.info[_ROUTER_KEY] = self
+        event.listen(session.sync_session, "after_flush", _after_flush)
+        event.listen(session.sync_session, "after_commit", self._after_commit)
+        event.listen(session.sync_session, "after_soft_rollback", _after_soft_rollback)
+        event.listen(session.sync_session, "after_attach", _after_attach)
+        return session
+
+    @contextlib.asynccontextmanager
+    async def reader(
+            self,
+            user_id: Optional[int] = None,
+            invoice_id: Optional[str] = None,
+    ) -> typing.AsyncIterator[AsyncSession]:
+        """Read-only session, on the primary if the user or invoice was just written."""
+        async with self.session_factory(user_id, invoice_id)() as session:
+            yield session
+            # Detached on close, changes to them would be lost silently
+            for instance in session.identity_map.values():
+                inspect(instance).info[READ_ONLY] = True
+            session.expunge_all()
+
+    def session_factory(
+            self,
+            user_id: Optional[int] = None,
+            invoice_id: Optional[str] = None,
+    ) -> async_sessionmaker[AsyncSession]:
+        if not self.replicas or self.recently_written(user_id, invoice_id):
+            self.primary_reads += 1
+            return self.primary
+        self.replica_reads += 1
+        return next(self._next_replica)
+
+    def mark_written(self, user_id: Optional[int] = None, invoice_id: Optional[str] = None) -> None:
+        """Route reads about the user or invoice to the primary for a while."""
+        now = time.monotonic()
+        for key in (("user", user_id), ("invoice", invoice_id)):
+            if key[1] is not None:
+                self._written[key] = now
+                self._written.move_to_end(key)
+        self._purge(now)
+
+    def recently_written(self, user_id: Optional[int] = None, invoice_id: Optional[str] = None) -> bool:
+        now = time.monotonic()
+        self._purge(now)
+        return ("user", user_id) in self._written or ("invoice", invoice_id) in self._written
+
+    def _purge(self, now: float) -> None:
+        while self._written:
+            key, written_at = next(iter(self._written.items()))
+            if now - written_at < self.read_your_writes:
+                break
+            del self._written[key]
+
+    def _after_commit(self, session: Session) -> None:
+        # Released savepoints aren't visible to the replicas yet
+        if session.in_nested_transaction():
+            return
+        for user_id, invoice_id in session.info.pop(_PENDING_KEY, ()):
+            self.mark_written(user_id, invoice_id)
+
+
+def _after_flush(session: Session, flush_context: typing.Any) -> None:
+    for instance in itertools.chain(session.new, session.dirty):
+        if not isinstance(instance, Invoice):
+            continue
+        if instance in session.new or inspect(instance).attrs.status.history.has_changes():
+            session.info.setdefault(_PENDING_KEY, set()).add((instance.user_id, instance.invoice_id))
+
+
+def _after_attach(session: Session, instance: typing.Any) -> None:
+    # Taken over by the writer, it can be changed again
+    inspect(instance).info.pop(READ_ONLY, None)
+
+
+def _after_soft_rollback(session: Session, previous_transaction: typing.Any) -> None:
+    # Writes of a rolled back savepoint are kept, an extra primary read is harmless
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+def note_core_writes(session: AsyncSession, written: Iterable[tuple[Optional[int], Optional[str]]]) -> None:
+    """
+    Report ``(user_id, invoice_id)`` of invoices inserted or moved to another
+    status by Core statements, to the router if ``session`` is a ``writer()``.
+    They are remembered from the commit.
+    """
+    if _ROUTER_KEY in session.info:
+        session.info.setdefault(_PENDING_KEY, set()).update(written)
+
+
+ReadSession: typing.TypeAlias = AsyncSession | SessionRouter
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import typing
+from typing import Generic, Optional, Sequence
+
+from sqlalchemy import Row, bindparam, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import selectinload
+
+from multi_merchant import deadlines
+from multi_merchant.merchants.base import Amount, Currency, InvoiceT, MerchantEnum
+from multi_merchant.models.invoice import Status
+from multi_merchant.models.replicas import ReadSession, SessionRouter
+
+
+class InvoiceRepository(Generic[InvoiceT]):
+    """
+    Queries of one ``Invoice`` subclass, built once and reused.
+
+    Statements take their arguments as bound parameters, so every call
+    hits SQLAlchemy's compiled cache instead of building and compiling a
+    new ``select()``. Methods returning rows or flags skip ORM loading and
+    run on the session's connection.
+
+    Read methods also accept a ``SessionRouter``: the query then runs on a
+    replica in a session of its own, and ORM results come back detached.
+    """
+
+    def __init__(self, InvoiceClass: typing.Type[InvoiceT]) -> None:
+        cls = InvoiceClass
+        self.InvoiceClass = cls
+        pending = (cls.status == Status.PENDING, cls.expire_at > func.now())
+
+        self._pending = select(cls).where(*pending)
+        if hasattr(cls, "user"):
+            self._pending = self._pending.options(selectinload(cls.user))
+        self._last = (
+            select(cls)
+            .where(cls.user_id == bindparam("user_id"))
+            .where(cls.amount == bindparam("amount"))
+            .where(cls.currency == bindparam("currency"))
+            .where(cls.merchant == bindparam("merchant"))
+            .where(*pending)
+            .order_by(cls.id.desc())
+            .limit(1)
+        )
+        self._has_pending = select(exists().where(cls.user_id == bindparam("user_id")).where(*pending))
+        self._has_pending_with = select(
+            exists()
+            .where(cls.user_id == bindparam("user_id"))
+            .where(cls.merchant == bindparam("merchant"))
+            .where(*pending)
+        )
+        self._by_invoice_id = select(cls).where(cls.invoice_id == bindparam("invoice_id")).limit(1)
+        self._history = (
+            select(cls)
+            .where(cls.user_id == bindparam("user_id"))
+            .order_by(cls.id.desc())
+            .limit(bindparam("limit"))
+        )
+        columns = (cls.id, cls.invoice_id, cls.user_id, cls.merchant, cls.amount, cls.currency, cls.expire_at)
+        self._pending_rows = select(*columns).where(*pending).order_by(cls.id)
+        self._pending_rows_of = self._pending_rows.where(cls.merchant == bindparam("merchant"))
+
+    async def get_pending(self, session: ReadSession) -> Sequence[InvoiceT]:
+        async with deadlines.scope("invoice.get_pending"), _reading(session) as session:
+            result = await session.execute(self._pending)
+            return result.unique().scalars().all()
+
+    async def get_by_invoice_id(self, session: ReadSession, invoice_id: str) -> Optional[InvoiceT]:
+        async with deadlines.scope("invoice.get_by_invoice_id"), _reading(session, invoice_id=invoice_id) as session:
+            result = await session.execute(self._by_invoice_id, {"invoice_id": invoice_id})
+            return result.scalar_one_or_none()
+
+    async def get_history(self, session: ReadSession, user_id: int, limit: int = 20) -> Sequence[InvoiceT]:
+        """The user's latest invoices, newest first."""
+        async with deadlines.scope("invoice.get_history"), _reading(session, user_id=user_id) as session:
+            result = await session.execute(self._history, {"user_id": user_id, "limit": limit})
+            return result.scalars().all()
+
+    async def get_last(
+            self,
+            session: ReadSession,
+            user_id: int,
+            amount: Amount,
+            currency: Currency,
+            merchant: MerchantEnum,
+    ) -> Optional[InvoiceT]:
+        params = {"user_id": user_id, "amount": float(amount), "currency": currency, "merchant": merchant}
+        async with deadlines.scope("invoice.get_last"), _reading(session, user_id=user_id) as session:
+            result = await session.execute(self._last, params)
+            return result.scalar_one_or_none()
+
+    async def has_pending(self, session: ReadSession, user_id: int, merchant: MerchantEnum | None = None) -> bool:
+        """Whether the user has an unpaid, unexpired invoice, without loading it."""
+        if merchant is None:
+            stmt, params = self._has_pending, {"user_id": user_id}
+        else:
+            stmt, params = self._has_pending_with, {"user_id": user_id, "merchant": merchant}
+        async with deadlines.scope("invoice.has_pending"), _reading(session, user_id=user_id) as session:
+            connection = await self._connection(session)
+            return bool((await connection.execute(stmt, params)).scalar())
+
+    async def pending_rows(self, session: ReadSession, merchant: MerchantEnum | None = None) -> Sequence[Row]:
+        """
+        Pending invoices as plain rows of
+        ``(id, invoice_id, user_id, merchant, amount, currency, expire_at)``.
+        """
+        if merchant is None:
+            stmt, params = self._pending_rows, {}
+        else:
+            stmt, params = self._pending_rows_of, {"merchant": merchant}
+        async with deadlines.scope("invoice.pending_rows"), _reading(session) as session:
+            connection = await self._connection(session)
+            return (await connection.execute(stmt, params)).all()
+
+    @staticmethod
+    async def _connection(session: AsyncSession) -> AsyncConnection:
+        # Core statements bypass autoflush, flush pending changes like the ORM would
+        if session.new or session.dirty or session.deleted:
+            await session.flush()
+        return await session.connection()
+
+
+@contextlib.asynccontextmanager
+async def _reading(session: ReadSession, **keys: typing.Any) -> typing.AsyncIterator[AsyncSession]:
+    if isinstance(session, SessionRouter):
+        async with session.reader(**keys) as read_session:
+            yield read_session
+    else:
+        yield session
+
+
+@functools.cache
+def get_repository(InvoiceClass: typing.Type[InvoiceT]) -> InvoiceRepository[InvoiceT]:
+    return InvoiceRepository(InvoiceClass)
@@ -0,0 +1,12 @@
+from .hedging import HedgeBudget
+from .router import MerchantLimits, MerchantRoute, MerchantRouter, NoMerchantAvailable
+from .stats import MerchantStats
+
+__all__ = (
+    "HedgeBudget",
+    "MerchantLimits",
+    "MerchantRoute",
+    "MerchantRouter",
+    "MerchantStats",
+    "NoMerchantAvailable",
+)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+
+
+class HedgeBudget:
+    """
+    Caps hedged requests so they cannot amplify an outage.
+
+    Every routed request earns ``ratio`` hedge tokens (up to ``burst``),
+    and every hedge spends one, so at most ``ratio`` of the traffic is
+    duplicated over time. ``max_in_flight`` bounds concurrent hedges.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0, max_in_flight: int = 10) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.requests = 0
+        self.hedges = 0
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+
+    @property
+    def hedge_rate(self) -> float:
+        """Share of requests that were hedged."""
+        return self.hedges / self.requests if self.requests else 0.0
+
+    def on_request(self) -> None:
+        self.requests += 1
+        self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.max_in_flight or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.in_flight += 1
+        self.hedges += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
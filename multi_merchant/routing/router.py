@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import random
+import time
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .. import deadlines
+from ..merchants.base import Amount, BaseMerchant, Currency, InvoiceT, MerchantEnum
+from .hedging import HedgeBudget
+from .stats import MerchantStats
+
+# Called with the route and the invoice a losing hedge created anyway
+AbandonedCallback = Callable[["MerchantRoute", Any], Any]
+
+
+class MerchantLimits(BaseModel):
+    """What a merchant accepts and what it costs."""
+
+    currencies: Optional[frozenset[str]] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    fee_percent: float = 0.0
+
+    def accepts(self, amount: float, currency: str) -> bool:
+        if self.currencies is not None and currency not in self.currencies:
+            return False
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        return True
+
+
+@dataclass
+class MerchantRoute:
+    merchant: BaseMerchant
+    limits: MerchantLimits = field(default_factory=MerchantLimits)
+    stats: MerchantStats = field(default_factory=MerchantStats)
+
+    @property
+    def name(self) -> MerchantEnum:
+        return self.merchant.merchant
+
+
+class NoMerchantAvailable(Exception):
+    def __init__(self, amount: float, currency: str) -> None:
+        super().__init__(f"No merchant accepts {amount} {currency}")
+        self.amount = amount
+        self.currency = currency
+
+
+class MerchantRouter:
+    """
+    Picks the merchant for each invoice.
+
+    Eligible merchants are those whose limits accept the currency and the
+    amount. They are ranked by a cost in seconds:
+
+        p95 latency + fee_weight * fee_percent + error_weight * error_rate
+
+    Merchants without samples are assumed to take ``default_latency``. With
+    probability ``explore`` another eligible merchant is tried, so the
+    statistics of the merchants that are not picked stay up to date.
+
+    With hedging, if the chosen merchant has not answered within its
+    observed p95, the invoice is also started on the next candidate and
+    the first success wins. None of the providers can cancel a pending
+    invoice, so the losing one stays open until it expires
+    (``PAYMENT_LIFETIME``). It is passed to ``on_abandoned``, e.g. to be
+    stored as abandoned. Hedges are limited by ``hedge_budget`` and only
+    charged to it when another candidate is actually started.
+    """
+
+    def __init__(
+            self,
+            routes: Iterable[BaseMerchant | tuple[BaseMerchant, MerchantLimits]] = (),
+            fee_weight: float = 0.5,
+            error_weight: float = 10.0,
+            default_latency: float = 1.0,
+            explore: float = 0.05,
+            hedge_budget: HedgeBudget | None = None,
+            on_abandoned: AbandonedCallback | None = None,
+    ) -> None:
+        self.fee_weight = fee_weight
+        self.error_weight = error_weight
+        self.default_latency = default_latency
+        self.explore = explore
+        self.hedge_budget = hedge_budget or HedgeBudget()
+        self.on_abandoned = on_abandoned
+        self._background: set[asyncio.Task] = set()
+        self.routes: list[MerchantRoute] = []
+        for route in routes:
+            if isinstance(route, tuple):
+                self.add(*route)
+            else:
+                self.add(route)
+
+    def add(self, merchant: BaseMerchant, limits: MerchantLimits | None = None) -> MerchantRoute:
+        route = MerchantRoute(merchant, limits or MerchantLimits())
+        self.routes.append(route)
+        return route
+
+    def get_route(self, merchant: BaseMerchant) -> MerchantRoute:
+        for route in self.routes:
+            if route.merchant is merchant:
+                return route
+        raise KeyError(merchant.merchant)
+
+    def cost(self, route: MerchantRoute) -> float:
+        latency = route.stats.p95
+        if latency is None:
+            latency = self.default_latency
+        return (
+            latency
+            + self.fee_weight * route.limits.fee_percent
+            + self.error_weight * route.stats.error_rate
+        )
+
+    def candidates(self, amount: Amount, currency: str = Currency.RUB) -> list[MerchantRoute]:
+        """Eligible routes, best first."""
+        amount = float(amount)
+        routes = [route for route in self.routes if route.limits.accepts(amount, currency)]
+        routes.sort(key=self.cost)
+        if len(routes) > 1 and random.random() < self.explore:
+            routes.insert(0, routes.pop(random.randrange(1, len(routes))))
+        return routes
+
+    def choose(self, amount: Amount, currency: str = Currency.RUB) -> BaseMerchant:
+        routes = self.candidates(amount, currency)
+        if not routes:
+            raise NoMerchantAvailable(float(amount), currency)
+        return routes[0].merchant
+
+    async def call(self, route: MerchantRoute, method: str, *args, **kwargs) -> Any:
+        """Call ``route.merchant.<method>`` and record its latency and outcome."""
+        route.stats.in_flight += 1
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await getattr(route.merchant, method)(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            route.stats.in_flight -= 1
+            route.stats.record(time.perf_counter() - start, ok)
+
+    def hedge_delay(self, route: MerchantRoute) -> float:
+        """How long to wait for ``route`` before hedging."""
+        latency = route.stats.p95
+        return self.default_latency if latency is None else latency
+
+    async def create_invoice(
+            self,
+            user_id: int,
+            amount: Amount,
+            InvoiceClass: typing.Type[InvoiceT],
+            currency: str = Currency.RUB,
+            description: str | None = None,
+            fallback: bool = True,
+            hedge: bool = False,
+            **kwargs,
+    ) -> InvoiceT:
+        """
+        Create the invoice on the best eligible merchant.
+
+        With ``fallback`` the next merchant is tried when one fails. With
+        ``hedge`` a slow merchant is raced against the next candidate.
+        """
+        routes = self.candidates(amount, currency)
+        if not routes:
+            raise NoMerchantAvailable(float(amount), currency)
+
+        kwargs.update(
+            user_id=user_id,
+            amount=amount,
+            InvoiceClass=InvoiceClass,
+            currency=currency,
+            description=description,
+        )
+        remaining = collections.deque(routes)
+        pending: dict[asyncio.Task, MerchantRoute] = {}
+        hedged = False
+        error: Exception | None = None
+
+        def launch(is_hedge: bool = False) -> bool:
+            if not remaining or is_hedge and not self.hedge_budget.try_acquire():
+                return False
+            route = remaining.popleft()
+            task = asyncio.create_task(self.call(route, "create_invoice", **kwargs))
+            if is_hedge:
+                task.add_done_callback(lambda _: self.hedge_budget.release())
+            pending[task] = route
+            return True
+
+        self.hedge_budget.on_request()
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if hedge and not hedged and len(pending) == 1:
+                    [route] = pending.values()
+                    timeout = self.hedge_delay(route)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    launch(is_hedge=True)
+                    continue
+
+                for task in done:
+                    route = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    logger.warning(f"Failed to create invoice with {route.name}: {error!r}")
+                if not pending and fallback:
+                    launch()
+        finally:
+            for task, route in pending.items():
+                self._abandon(task, route)
+        raise error
+
+    def _abandon(self, task: asyncio.Task, route: MerchantRoute) -> None:
+        """Let a losing request finish in the background and report its invoice."""
+
+        async def cleanup() -> None:
+            try:
+                invoice = await task
+            except Exception:
+                return
+            logger.info(f"Abandoned hedged invoice {invoice.invoice_id} of {route.name}, it expires unpaid")
+            if self.on_abandoned is not None:
+                self.on_abandoned(route, invoice)
+
+        with deadlines.detached():
+            cleanup_task = asyncio.create_task(cleanup())
+        self._background.add(cleanup_task)
+        cleanup_task.add_done_callback(self._background.discard)
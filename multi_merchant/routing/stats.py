@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Optional
+
+
+class MerchantStats:
+    """
+    Rolling latency and error statistics of one merchant.
+
+    Keeps the last ``window`` calls that happened within ``horizon``
+    seconds, so old failures stop counting once the provider recovers.
+    """
+
+    def __init__(self, window: int = 200, horizon: float = 5 * 60) -> None:
+        self.window = window
+        self.horizon = horizon
+        self.in_flight = 0
+        self._samples: deque[tuple[float, float, bool]] = deque(maxlen=window)
+        self._sorted: Optional[list[float]] = None
+
+    def __len__(self) -> int:
+        self._expire()
+        return len(self._samples)
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        self._samples.append((time.monotonic(), latency, ok))
+        self._sorted = None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile in seconds, ``q`` in [0, 100]. None without samples."""
+        self._expire()
+        if self._sorted is None:
+            self._sorted = sorted(latency for _, latency, _ in self._samples)
+        if not self._sorted:
+            return None
+        position = min(math.ceil(q / 100 * len(self._sorted)), len(self._sorted)) - 1
+        return self._sorted[max(position, 0)]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.percentile(99)
+
+    @property
+    def error_rate(self) -> float:
+        self._expire()
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, _, ok in self._samples if not ok) / len(self._samples)
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.horizon
+        while self._samples and self._samples[0][0] < deadline:
+            self._samples.popleft()
+            self._sorted = None
@@ -0,0 +1,10 @@
+from .app import Simulator, SimPayment
+from .config import LatencyProfile, ProviderProfile, SimulatorConfig
+
+__all__ = (
+    "LatencyProfile",
+    "ProviderProfile",
+    "SimPayment",
+    "Simulator",
+    "SimulatorConfig",
+)
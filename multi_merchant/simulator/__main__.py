@@ -0,0 +1,40 @@
+"""
+Run the provider simulator.
+
+    python -m multi_merchant.simulator --port 8080 --config simulator.json
+"""
+import argparse
+import asyncio
+from pathlib import Path
+
+from loguru import logger
+
+from .app import PREFIXES, Simulator
+from .config import SimulatorConfig
+
+
+async def serve(config: SimulatorConfig, host: str, port: int) -> None:
+    async with Simulator(config, host, port) as simulator:
+        for prefix in PREFIXES:
+            logger.info(f"Serving {simulator.url}/{prefix}")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline payment provider simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--config", type=Path, help="SimulatorConfig as JSON")
+    args = parser.parse_args()
+
+    config = SimulatorConfig()
+    if args.config is not None:
+        config = SimulatorConfig.model_validate_json(args.config.read_bytes())
+    try:
+        asyncio.run(serve(config, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import random
+import time
+import typing
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from aiohttp import web
+
+from ..merchants.base import MerchantEnum
+from .config import ProviderProfile, SimulatorConfig
+
+# First path segment -> simulated provider
+PREFIXES: dict[str, MerchantEnum] = {
+    "yookassa": MerchantEnum.YOOKASSA,
+    "cryptocloud": MerchantEnum.CRYPTO_CLOUD,
+    "payok": MerchantEnum.PAYOK,
+    "aaio": MerchantEnum.AAIO,
+    "oklink": MerchantEnum.USDT,
+    "cryptomus": MerchantEnum.CRYPTOMUS,
+    "cryptopay": MerchantEnum.CRYPTO_PAY,
+    "yoomoney": MerchantEnum.YOOMONEY,
+}
+
+SIMULATOR_KEY = web.AppKey("simulator", "Simulator")
+
+
+@dataclass
+class SimPayment:
+    provider: MerchantEnum
+    id: str
+    amount: float
+    currency: str
+    created_at: float = field(default_factory=time.time)
+    description: Optional[str] = None
+    # Provider specific ids: YooMoney label, Cryptomus order_id, etc.
+    order_id: Optional[str] = None
+    number: int = 0
+    paid_at: Optional[float] = None
+    canceled: bool = False
+
+    @property
+    def created_at_iso(self) -> str:
+        return datetime.datetime.fromtimestamp(self.created_at, datetime.UTC).isoformat()
+
+    def is_paid(self, now: float | None = None) -> bool:
+        return self.paid_at is not None and self.paid_at <= (now or time.time())
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    burst: int
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, self.burst)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Simulator:
+    """
+    Local stand-in for the provider APIs used by the merchants.
+
+    Each provider is served under its own prefix (``/yookassa``, ``/payok``,
+    ...) with configurable latency, error rate, rate limit and payment
+    completion time. Point a merchant at it with the fields from ``urls``:
+
+        async with Simulator() as sim:
+            kassa = YooKassa(..., **sim.urls(MerchantEnum.YOOKASSA))
+
+    Providers whose SDK hard-codes its host (Aaio, Cryptomus, CryptoPay,
+    YooMoney) are served as well, for clients that can be pointed at
+    another base URL.
+    """
+
+    def __init__(
+            self,
+            config: SimulatorConfig | None = None,
+            host: str = "127.0.0.1",
+            port: int = 0,
+    ) -> None:
+        self.config = config or SimulatorConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.payments: dict[tuple[MerchantEnum, str], SimPayment] = {}
+        # Provider -> idempotence/order key -> payment id
+        self.keys: dict[MerchantEnum, dict[str, str]] = {}
+        # (address, amount, time) of simulated TRC-20 transfers
+        self.transfers: list[tuple[str, float, float]] = []
+        self.stats: dict[MerchantEnum, Counter] = {}
+        self._buckets: dict[MerchantEnum, TokenBucket] = {}
+        self._numbers = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.app = self.create_app()
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def urls(self, merchant: MerchantEnum) -> dict[str, str]:
+        """Merchant config fields pointing at the simulator."""
+        base = self.url
+        match merchant:
+            case MerchantEnum.YOOKASSA:
+                return {"create_url": f"{base}/yookassa/v3/payments"}
+            case MerchantEnum.CRYPTO_CLOUD:
+                return {
+                    "create_url": f"{base}/cryptocloud/v1/invoice/create",
+                    "status_url": f"{base}/cryptocloud/v1/invoice/info",
+                }
+            case MerchantEnum.USDT:
+                return {"status_url": f"{base}/oklink/api/v5/explorer/address/transaction-list"}
+            case MerchantEnum.CRYPTOMUS:
+                return {
+                    "create_url": f"{base}/cryptomus/v1/payment",
+                    "status_url": f"{base}/cryptomus/v1/payment/info",
+                }
+            case MerchantEnum.PAYOK:
+                # Set as ``PayokPay.client.API_HOST``
+                return {"API_HOST": f"{base}/payok"}
+            case MerchantEnum.AAIO:
+                return {"API_HOST": f"{base}/aaio"}
+            case MerchantEnum.CRYPTO_PAY:
+                return {"API_HOST": f"{base}/cryptopay"}
+            case MerchantEnum.YOOMONEY:
+                return {"API_HOST": f"{base}/yoomoney"}
+        raise ValueError(f"Merchant {merchant} is not simulated")
+
+    def create_app(self) -> web.Application:
+        from .providers import add_routes
+
+        app = web.Application(middlewares=[self._provider_middleware])
+        app[SIMULATOR_KEY] = self
+        app.router.add_post("/_sim/payments/{provider}/{payment_id}/pay", self._control_pay)
+        app.router.add_post("/_sim/oklink/transfers", self._control_transfer)
+        app.router.add_get("/_sim/stats", self._control_stats)
+        add_routes(app)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def profile(self, provider: MerchantEnum) -> ProviderProfile:
+        return self.config.profile(provider)
+
+    def add_payment(
+            self,
+            provider: MerchantEnum,
+            amount: float,
+            currency: str,
+            payment_id: str | None = None,
+            **kwargs,
+    ) -> SimPayment:
+        """Register a payment and schedule its completion per the provider profile."""
+        self._numbers += 1
+        payment = SimPayment(
+            provider,
+            payment_id or uuid.uuid4().hex,
+            float(amount),
+            currency,
+            number=self._numbers,
+            **kwargs,
+        )
+        profile = self.profile(provider)
+        if profile.pay_after is not None and self.rng.random() < profile.pay_probability:
+            payment.paid_at = payment.created_at + profile.pay_after
+        self.payments[(provider, payment.id)] = payment
+        return payment
+
+    def get_payment(self, provider: MerchantEnum, payment_id: str) -> SimPayment | None:
+        return self.payments.get((provider, payment_id))
+
+    def find_payment(self, provider: MerchantEnum, key: str) -> SimPayment | None:
+        """Payment by id or by a provider specific key (order id, label...)."""
+        payment = self.get_payment(provider, key)
+        if payment is None:
+            payment_id = self.keys.get(provider, {}).get(key)
+            if payment_id is not None:
+                payment = self.get_payment(provider, payment_id)
+        return payment
+
+    def remember_key(self, provider: MerchantEnum, key: str, payment: SimPayment) -> None:
+        self.keys.setdefault(provider, {})[key] = payment.id
+
+    def mark_paid(self, provider: MerchantEnum, payment_id: str) -> None:
+        payment = self.find_payment(provider, payment_id)
+        if payment is None:
+            raise KeyError(payment_id)
+        payment.paid_at = time.time()
+
+    def add_transfer(self, to: str, amount: float) -> None:
+        """Simulate an incoming USDT TRC-20 transfer."""
+        self.transfers.append((to, float(amount), time.time()))
+
+    @web.middleware
+    async def _provider_middleware(self, request: web.Request, handler):
+        provider = PREFIXES.get(request.path.split("/", 2)[1])
+        if provider is None:
+            return await handler(request)
+
+        stats = self.stats.setdefault(provider, Counter())
+        stats["requests"] += 1
+        profile = self.profile(provider)
+        if profile.rate_limit is not None:
+            bucket = self._buckets.get(provider)
+            if bucket is None:
+                bucket = self._buckets[provider] = TokenBucket(profile.rate_limit, profile.rate_limit_burst)
+            if not bucket.take():
+                stats["throttled"] += 1
+                return web.json_response({"error": "Too Many Requests"}, status=429)
+
+        await asyncio.sleep(profile.latency.sample(self.rng))
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            stats["errors"] += 1
+            return web.json_response(
+                {"type": "error", "status": "error", "code": "internal_server_error"},
+                status=profile.error_status,
+            )
+        return await handler(request)
+
+    async def _control_pay(self, request: web.Request) -> web.Response:
+        provider = MerchantEnum(request.match_info["provider"])
+        try:
+            self.mark_paid(provider, request.match_info["payment_id"])
+        except KeyError:
+            raise web.HTTPNotFound()
+        return web.json_response({"ok": True})
+
+    async def _control_transfer(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        self.add_transfer(data["to"], data["amount"])
+        return web.json_response({"ok": True})
+
+    async def _control_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({provider.value: dict(stats) for provider, stats in self.stats.items()})
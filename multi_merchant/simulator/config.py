@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from ..merchants.base import MerchantEnum
+
+
+class LatencyProfile(BaseModel):
+    """Response latency distribution, in seconds."""
+
+    distribution: Literal["constant", "uniform", "normal", "lognormal", "exponential"] = "lognormal"
+    mean: float = 0.05
+    # Standard deviation for ``normal``, shape for ``lognormal``, half-width for ``uniform``
+    spread: float = 0.5
+    min: float = 0.0
+    max: float = 30.0
+
+    def sample(self, rng: random.Random) -> float:
+        match self.distribution:
+            case "constant":
+                value = self.mean
+            case "uniform":
+                value = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+            case "normal":
+                value = rng.gauss(self.mean, self.spread)
+            case "lognormal":
+                # Parametrised so that the distribution mean equals ``mean``
+                mu = math.log(self.mean) - self.spread ** 2 / 2 if self.mean > 0 else 0.0
+                value = rng.lognormvariate(mu, self.spread) if self.mean > 0 else 0.0
+            case "exponential":
+                value = rng.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+        return min(max(value, self.min), self.max)
+
+
+class ProviderProfile(BaseModel):
+    """How a simulated provider behaves."""
+
+    latency: LatencyProfile = LatencyProfile()
+    # Share of requests answered with an error
+    error_rate: float = 0.0
+    error_status: int = 500
+    # Requests per second, None for no limit. Excess requests get HTTP 429
+    rate_limit: Optional[float] = None
+    rate_limit_burst: int = 10
+    # Seconds from creation until a payment is completed, None for never
+    pay_after: Optional[float] = 5.0
+    # Share of payments that are completed at all
+    pay_probability: float = 1.0
+
+
+class SimulatorConfig(BaseModel):
+    seed: Optional[int] = None
+    default: ProviderProfile = ProviderProfile()
+    providers: dict[MerchantEnum, ProviderProfile] = {}
+
+    def profile(self, merchant: MerchantEnum) -> ProviderProfile:
+        return self.providers.get(merchant, self.default)
@@ -0,0 +1,484 @@
+"""Request handlers for the simulated provider APIs."""
+from __future__ import annotations
+
+import datetime
+import secrets
+import time
+import uuid
+
+from aiohttp import web
+
+from ..merchants.base import TIME_ZONE, MerchantEnum
+from .app import SIMULATOR_KEY, SimPayment, Simulator
+
+PAYOK_PAGE_SIZE = 100
+YOOMONEY_ACCOUNT = "4100110000000000"
+
+
+def add_routes(app: web.Application) -> None:
+    router = app.router
+    # YooKassa
+    router.add_post("/yookassa/v3/payments", yookassa_create)
+    router.add_get("/yookassa/v3/payments/{payment_id}", yookassa_get)
+    router.add_post("/yookassa/v3/payments/{payment_id}/cancel", yookassa_cancel)
+    # CryptoCloud
+    router.add_post("/cryptocloud/v1/invoice/create", cryptocloud_create)
+    router.add_get("/cryptocloud/v1/invoice/info", cryptocloud_info)
+    # Payok
+    router.add_get("/payok/pay", payok_pay)
+    router.add_post("/payok/api/transaction", payok_transaction)
+    router.add_post("/payok/api/balance", payok_balance)
+    # Aaio
+    router.add_get("/aaio/merchant/pay", aaio_pay)
+    router.add_post("/aaio/api/info-pay", aaio_info)
+    # OKLink
+    router.add_get("/oklink/api/v5/explorer/address/transaction-list", oklink_transactions)
+    # Cryptomus
+    router.add_post("/cryptomus/v1/payment", cryptomus_create)
+    router.add_post("/cryptomus/v1/payment/info", cryptomus_info)
+    # CryptoPay
+    router.add_route("*", "/cryptopay/api/createInvoice", cryptopay_create)
+    router.add_route("*", "/cryptopay/api/getInvoices", cryptopay_get_invoices)
+    # YooMoney
+    router.add_post("/yoomoney/api/account-info", yoomoney_account_info)
+    router.add_post("/yoomoney/api/operation-history", yoomoney_operation_history)
+    router.add_route("*", "/yoomoney/quickpay/confirm.xml", yoomoney_quickpay)
+    router.add_get("/yoomoney/checkout", yoomoney_checkout)
+
+
+def get_simulator(request: web.Request) -> Simulator:
+    return request.app[SIMULATOR_KEY]
+
+
+async def read_params(request: web.Request) -> dict:
+    """Query, form or JSON parameters, whichever the client sent."""
+    params = dict(request.query)
+    if request.can_read_body:
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        else:
+            params.update(await request.post())
+    return params
+
+
+def iso(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.UTC).isoformat()
+
+
+# YooKassa
+
+
+def yookassa_payment(sim: Simulator, payment: SimPayment) -> dict:
+    paid = payment.is_paid()
+    if paid:
+        status = "succeeded"
+    elif payment.canceled:
+        status = "canceled"
+    else:
+        status = "pending"
+    return {
+        "id": payment.id,
+        "status": status,
+        "paid": paid,
+        "amount": {"value": f"{payment.amount:.2f}", "currency": payment.currency},
+        "confirmation": {
+            "type": "redirect",
+            "confirmation_url": f"{sim.url}/yookassa/checkout/{payment.id}",
+        },
+        "created_at": payment.created_at_iso,
+        "description": payment.description,
+        "recipient": {"account_id": "100500", "gateway_id": "100700"},
+        "refundable": False,
+        "test": True,
+        "metadata": {},
+    }
+
+
+def yookassa_not_found(payment_id: str) -> web.Response:
+    return web.json_response(
+        {
+            "type": "error",
+            "id": str(uuid.uuid4()),
+            "code": "not_found",
+            "description": f"Payment {payment_id} doesn't exist",
+        },
+        status=404,
+    )
+
+
+async def yookassa_create(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    provider = MerchantEnum.YOOKASSA
+    key = request.headers.get("Idempotence-Key")
+    data = await request.json()
+    # No await between the lookup and remember_key: same-key requests see each other's payment
+    payment = sim.find_payment(provider, key) if key else None
+    if payment is None:
+        payment = sim.add_payment(
+            provider,
+            data["amount"]["value"],
+            data["amount"]["currency"],
+            payment_id=str(uuid.uuid4()),
+            description=data.get("description"),
+        )
+        if key:
+            sim.remember_key(provider, key, payment)
+    return web.json_response(yookassa_payment(sim, payment))
+
+
+async def yookassa_get(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    payment = sim.get_payment(MerchantEnum.YOOKASSA, request.match_info["payment_id"])
+    if payment is None:
+        return yookassa_not_found(request.match_info["payment_id"])
+    return web.json_response(yookassa_payment(sim, payment))
+
+
+async def yookassa_cancel(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    payment = sim.get_payment(MerchantEnum.YOOKASSA, request.match_info["payment_id"])
+    if payment is None:
+        return yookassa_not_found(request.match_info["payment_id"])
+    if not payment.is_paid():
+        payment.canceled = True
+        payment.paid_at = None
+    return web.json_response(yookassa_payment(sim, payment))
+
+
+# CryptoCloud
+
+
+async def cryptocloud_create(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await request.json()
+    payment = sim.add_payment(
+        MerchantEnum.CRYPTO_CLOUD,
+        data["amount"],
+        data.get("currency") or "USD",
+        payment_id=secrets.token_hex(4).upper(),
+        order_id=data.get("order_id"),
+    )
+    return web.json_response({
+        "status": "success",
+        "invoice_id": payment.id,
+        "pay_url": f"{sim.url}/cryptocloud/pay/{payment.id}",
+        "currency": payment.currency,
+    })
+
+
+async def cryptocloud_info(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    invoice_id = request.query.get("uuid", "").removeprefix("INV-")
+    payment = sim.get_payment(MerchantEnum.CRYPTO_CLOUD, invoice_id)
+    if payment is None:
+        return web.json_response({"status": "error", "error": "Invoice not found"}, status=400)
+    return web.json_response({
+        "status": "success",
+        "status_invoice": "paid" if payment.is_paid() else "created",
+    })
+
+
+# Payok
+
+
+def payok_transaction_data(payment: SimPayment) -> dict:
+    paid = payment.is_paid()
+    return {
+        "transaction": payment.number,
+        "email": "buyer@example.com",
+        "amount": payment.amount,
+        "currency": payment.currency,
+        "currency_amount": payment.amount,
+        "comission_percent": 0,
+        "comission_fixed": 0,
+        "amount_profit": payment.amount,
+        "method": "card",
+        "payment_id": payment.id,
+        "description": payment.description or "",
+        # Payok reports Moscow time
+        "date": datetime.datetime.fromtimestamp(payment.created_at, TIME_ZONE).strftime("%Y-%m-%d %H:%M:%S"),
+        "pay_date": (
+            datetime.datetime.fromtimestamp(payment.paid_at, TIME_ZONE).strftime("%Y-%m-%d %H:%M:%S")
+            if paid else ""
+        ),
+        "transaction_status": 1 if paid else 0,
+        "custom_fields": "",
+        "webhook_status": 0,
+        "webhook_amount": 0,
+    }
+
+
+async def payok_pay(request: web.Request) -> web.Response:
+    """Payment form. Payok payments exist once the buyer opens the form."""
+    sim = get_simulator(request)
+    payment_id = request.query["payment"]
+    if sim.get_payment(MerchantEnum.PAYOK, payment_id) is None:
+        sim.add_payment(
+            MerchantEnum.PAYOK,
+            request.query["amount"],
+            request.query.get("currency", "RUB"),
+            payment_id=payment_id,
+            description=request.query.get("desc"),
+        )
+    return web.Response(text=f"Payok payment {payment_id}")
+
+
+async def payok_transaction(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await request.post()
+    payment_id = data.get("payment")
+    if payment_id:
+        payment = sim.get_payment(MerchantEnum.PAYOK, payment_id)
+        if payment is None:
+            return web.json_response({"status": "error", "error_code": "8", "text": "Transaction not found"})
+        return web.json_response({"status": "success", "1": payok_transaction_data(payment)})
+
+    offset = int(data.get("offset") or 0)
+    payments = sorted(
+        (p for (provider, _), p in sim.payments.items() if provider == MerchantEnum.PAYOK),
+        key=lambda p: p.number,
+        reverse=True,
+    )[offset:offset + PAYOK_PAGE_SIZE]
+    response: dict = {"status": "success"}
+    for number, payment in enumerate(payments, 1):
+        response[str(number)] = payok_transaction_data(payment)
+    return web.json_response(response)
+
+
+async def payok_balance(request: web.Request) -> web.Response:
+    return web.json_response({"balance": "1000.00", "ref_balance": "0.00"})
+
+
+# Aaio
+
+
+async def aaio_pay(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    order_id = request.query["order_id"]
+    if sim.get_payment(MerchantEnum.AAIO, order_id) is None:
+        sim.add_payment(
+            MerchantEnum.AAIO,
+            request.query["amount"],
+            request.query.get("currency", "RUB"),
+            payment_id=order_id,
+            description=request.query.get("desc"),
+        )
+    return web.Response(text=f"Aaio payment {order_id}")
+
+
+async def aaio_info(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await read_params(request)
+    payment = sim.get_payment(MerchantEnum.AAIO, data.get("order_id", ""))
+    if payment is None:
+        return web.json_response({"type": "error", "code": 404, "message": "Order not found"})
+    return web.json_response({
+        "type": "success",
+        "id": str(uuid.uuid5(uuid.NAMESPACE_OID, payment.id)),
+        "order_id": payment.id,
+        "desc": payment.description,
+        "merchant_id": data.get("merchant_id"),
+        "amount": payment.amount,
+        "currency": payment.currency,
+        "status": "success" if payment.is_paid() else "in_process",
+        "date": iso(payment.created_at),
+    })
+
+
+# OKLink
+
+
+async def oklink_transactions(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    address = request.query.get("address", "")
+    limit = int(request.query.get("limit", 20))
+    transfers = [t for t in reversed(sim.transfers) if t[0] == address][:limit]
+    return web.json_response({
+        "code": "0",
+        "msg": "",
+        "data": [{
+            "chainFullName": "TRON",
+            "chainShortName": "TRON",
+            "limit": str(limit),
+            "page": "1",
+            "totalPage": "1",
+            "transactionLists": [
+                {
+                    "amount": amount,
+                    "blockHash": secrets.token_hex(32),
+                    "challengeStatus": "",
+                    "from": "TSimulatorSender",
+                    "height": str(int(created_at)),
+                    "isFromContract": False,
+                    "isToContract": False,
+                    "l1OriginHash": "",
+                    "methodId": "a9059cbb",
+                    "state": "success",
+                    "to": to,
+                    "tokenContractAddress": "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t",
+                    "tokenId": "",
+                    "transactionSymbol": "USDT",
+                    "transactionTime": str(int(created_at * 1000)),
+                    "txFee": "0",
+                    "txId": secrets.token_hex(32),
+                }
+                for to, amount, created_at in transfers
+            ],
+        }],
+    })
+
+
+# Cryptomus
+
+
+def cryptomus_payment(sim: Simulator, payment: SimPayment) -> dict:
+    paid = payment.is_paid()
+    return {
+        "state": 0,
+        "result": {
+            "uuid": payment.id,
+            "order_id": payment.order_id,
+            "amount": f"{payment.amount:.2f}",
+            "payment_amount": f"{payment.amount:.2f}" if paid else None,
+            "currency": payment.currency,
+            "url": f"{sim.url}/cryptomus/pay/{payment.id}",
+            "expired_at": int(payment.created_at) + 3600,
+            "payment_status": "paid" if paid else "check",
+            "status": "paid" if paid else "check",
+            "is_final": paid,
+            "created_at": iso(payment.created_at),
+            "updated_at": iso(payment.paid_at if paid else payment.created_at),
+        },
+    }
+
+
+async def cryptomus_create(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    provider = MerchantEnum.CRYPTOMUS
+    data = await request.json()
+    payment = sim.find_payment(provider, data["order_id"])
+    if payment is None:
+        payment = sim.add_payment(
+            provider, data["amount"], data["currency"], payment_id=str(uuid.uuid4()), order_id=data["order_id"]
+        )
+        sim.remember_key(provider, data["order_id"], payment)
+    return web.json_response(cryptomus_payment(sim, payment))
+
+
+async def cryptomus_info(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await request.json()
+    payment = sim.find_payment(MerchantEnum.CRYPTOMUS, data.get("uuid") or data.get("order_id") or "")
+    if payment is None:
+        return web.json_response({"state": 1, "message": "Payment not found"}, status=404)
+    return web.json_response(cryptomus_payment(sim, payment))
+
+
+# CryptoPay
+
+
+def cryptopay_invoice(sim: Simulator, payment: SimPayment) -> dict:
+    paid = payment.is_paid()
+    invoice = {
+        "invoice_id": payment.number,
+        "hash": payment.id,
+        "currency_type": "crypto",
+        "asset": payment.currency,
+        "amount": str(payment.amount),
+        "pay_url": f"{sim.url}/cryptopay/pay/{payment.id}",
+        "bot_invoice_url": f"{sim.url}/cryptopay/pay/{payment.id}",
+        "description": payment.description,
+        "status": "paid" if paid else "active",
+        "created_at": iso(payment.created_at),
+        "allow_comments": True,
+        "allow_anonymous": True,
+    }
+    if paid:
+        invoice["paid_at"] = iso(payment.paid_at)
+    return invoice
+
+
+async def cryptopay_create(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await read_params(request)
+    payment = sim.add_payment(
+        MerchantEnum.CRYPTO_PAY,
+        data["amount"],
+        data.get("asset", "USDT"),
+        description=data.get("description"),
+    )
+    sim.remember_key(MerchantEnum.CRYPTO_PAY, str(payment.number), payment)
+    return web.json_response({"ok": True, "result": cryptopay_invoice(sim, payment)})
+
+
+async def cryptopay_get_invoices(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await read_params(request)
+    invoice_ids = data.get("invoice_ids")
+    if invoice_ids:
+        if isinstance(invoice_ids, str):
+            invoice_ids = invoice_ids.split(",")
+        payments = [sim.find_payment(MerchantEnum.CRYPTO_PAY, str(i).strip()) for i in invoice_ids]
+        payments = [p for p in payments if p is not None]
+    else:
+        payments = [p for (provider, _), p in sim.payments.items() if provider == MerchantEnum.CRYPTO_PAY]
+    items = [cryptopay_invoice(sim, p) for p in payments]
+    if data.get("status"):
+        items = [i for i in items if i["status"] == data["status"]]
+    return web.json_response({"ok": True, "result": {"items": items}})
+
+
+# YooMoney
+
+
+async def yoomoney_account_info(request: web.Request) -> web.Response:
+    return web.json_response({
+        "account": YOOMONEY_ACCOUNT,
+        "balance": 1000.0,
+        "currency": "643",
+        "account_status": "named",
+        "account_type": "personal",
+        "balance_details": {"total": 1000.0, "available": 1000.0},
+        "cards_linked": [],
+    })
+
+
+async def yoomoney_operation_history(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await read_params(request)
+    label = data.get("label")
+    payments = [
+        p for (provider, _), p in sim.payments.items()
+        if provider == MerchantEnum.YOOMONEY and p.is_paid() and (label is None or p.order_id == label)
+    ]
+    return web.json_response({
+        "operations": [
+            {
+                "operation_id": str(p.number),
+                "status": "success",
+                "datetime": iso(p.paid_at),
+                "title": p.description or "Payment",
+                "direction": "in",
+                "amount": p.amount,
+                "label": p.order_id,
+                "type": "deposition",
+            }
+            for p in payments
+        ]
+    })
+
+
+async def yoomoney_quickpay(request: web.Request) -> web.Response:
+    sim = get_simulator(request)
+    data = await read_params(request)
+    label = data.get("label") or uuid.uuid4().hex
+    if sim.find_payment(MerchantEnum.YOOMONEY, label) is None:
+        payment = sim.add_payment(
+            MerchantEnum.YOOMONEY, data.get("sum", 0), "RUB", order_id=label, description=data.get("targets")
+        )
+        sim.remember_key(MerchantEnum.YOOMONEY, label, payment)
+    raise web.HTTPFound(f"{sim.url}/yoomoney/checkout?label={label}&ts={int(time.time())}")
+
+
+async def yoomoney_checkout(request: web.Request) -> web.Response:
+    return web.Response(text=f"YooMoney payment {request.query.get('label')}")
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import time
+import typing
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Hashable, Iterable, Optional
+
+from aiohttp import TCPConnector
+
+from . import events
+from .merchants.base import DNS_CACHE_TTL, KEEPALIVE_TIMEOUT, BaseMerchant, MerchantEnum
+from .merchants.registry import get_merchant_class
+
+TenantKey = tuple[Hashable, MerchantEnum]
+
+# Merchants whose SDK keeps the credentials process-wide (``BetaTrans.authorize``
+# sets them on the class), so only one tenant per process can use them
+PROCESS_WIDE_MERCHANTS = frozenset({MerchantEnum.BETA_TRANSFER_PAY})
+
+
+class TenantMerchantPool:
+    """
+    Merchants of many tenants (shops), built on demand.
+
+    ``add_tenant`` only stores the raw configs. The merchant model, and with
+    it the provider SDK client, is built on the first ``get``. Active
+    merchants share one connector, so connections and file descriptors are
+    pooled across tenants. At most ``max_active`` merchants are kept.
+    The least recently used one is evicted when the limit is hit or when it
+    was idle for ``idle_ttl`` seconds. An evicted merchant that is checked
+    out with ``use`` is closed when the last user releases it, a merchant
+    from ``get`` is closed right away.
+    """
+
+    def __init__(
+            self,
+            max_active: int = 1000,
+            idle_ttl: float | None = 30 * 60,
+            connection_limit: int = 500,
+    ) -> None:
+        self.max_active = max_active
+        self.idle_ttl = idle_ttl
+        self.connection_limit = connection_limit
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._configs: dict[TenantKey, dict[str, Any]] = {}
+        # Key -> (merchant, last used at), least recently used first
+        self._active: OrderedDict[TenantKey, tuple[BaseMerchant, float]] = OrderedDict()
+        # id(merchant) -> number of ``use`` blocks holding it
+        self._in_use: dict[int, int] = {}
+        # Evicted merchants still in use, closed on the last release
+        self._retired: dict[int, tuple[TenantKey, BaseMerchant]] = {}
+        self._connector: Optional[TCPConnector] = None
+
+    async def __aenter__(self) -> typing.Self:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    async def add_tenant(self, tenant_id: Hashable, configs: Iterable[dict[str, Any]] | str | bytes) -> None:
+        """
+        Register the merchant configs of a tenant, a list of dicts or its JSON.
+
+        Every config needs its ``merchant`` key. Nothing else is validated
+        here. An active merchant whose config is replaced is closed.
+
+        Raises ``ValueError`` if another tenant already uses one of the
+        ``PROCESS_WIDE_MERCHANTS``, its credentials would be shared.
+        """
+        if isinstance(configs, (str, bytes)):
+            configs = json.loads(configs)
+        keyed = [((tenant_id, MerchantEnum(config["merchant"])), config) for config in configs]
+        for (_, merchant), _ in keyed:
+            if merchant not in PROCESS_WIDE_MERCHANTS:
+                continue
+            for other, other_merchant in self._configs:
+                if other_merchant == merchant and other != tenant_id:
+                    raise ValueError(
+                        f"{merchant} keeps its credentials process-wide and is already used by tenant {other!r}"
+                    )
+        for key, config in keyed:
+            self._configs[key] = config
+            entry = self._active.pop(key, None)
+            if entry is not None:
+                await self._evict(key, entry[0])
+
+    async def remove_tenant(self, tenant_id: Hashable) -> None:
+        for key in [key for key in self._configs if key[0] == tenant_id]:
+            del self._configs[key]
+            entry = self._active.pop(key, None)
+            if entry is not None:
+                await self._evict(key, entry[0])
+
+    def merchants_of(self, tenant_id: Hashable) -> list[MerchantEnum]:
+        return [merchant for tenant, merchant in self._configs if tenant == tenant_id]
+
+    @contextlib.asynccontextmanager
+    async def use(self, tenant_id: Hashable, merchant: MerchantEnum) -> AsyncIterator[BaseMerchant]:
+        """``get`` a merchant and keep it open until the block exits, even if it is evicted meanwhile."""
+        instance = await self.get(tenant_id, merchant)
+        self._in_use[id(instance)] = self._in_use.get(id(instance), 0) + 1
+        try:
+            yield instance
+        finally:
+            users = self._in_use.pop(id(instance)) - 1
+            if users:
+                self._in_use[id(instance)] = users
+            else:
+                retired = self._retired.pop(id(instance), None)
+                if retired is not None:
+                    await self._close(*retired)
+
+    async def get(self, tenant_id: Hashable, merchant: MerchantEnum) -> BaseMerchant:
+        """Merchant of a tenant, built from its config if it isn't active."""
+        key = tenant_id, MerchantEnum(merchant)
+        now = time.monotonic()
+        entry = self._active.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._active[key] = entry[0], now
+            self._active.move_to_end(key)
+            await self.evict_idle(now)
+            return entry[0]
+
+        config = self._configs.get(key)
+        if config is None:
+            raise KeyError(f"Merchant {key[1]} is not configured for tenant {tenant_id!r}")
+        self.misses += 1
+        instance = get_merchant_class(key[1]).model_validate(config)
+        instance.share_connector(self._get_connector())
+        self._active[key] = instance, now
+        while len(self._active) > self.max_active:
+            old_key, (old, _) = self._active.popitem(last=False)
+            self.evictions += 1
+            await self._evict(old_key, old)
+        await self.evict_idle(now)
+        return instance
+
+    async def evict_idle(self, now: float | None = None) -> int:
+        """Evict merchants unused for ``idle_ttl``. Returns how many were evicted."""
+        if self.idle_ttl is None:
+            return 0
+        now = now or time.monotonic()
+        closed = 0
+        while self._active:
+            key, (instance, used_at) = next(iter(self._active.items()))
+            if now - used_at < self.idle_ttl:
+                break
+            del self._active[key]
+            self.evictions += 1
+            await self._evict(key, instance)
+            closed += 1
+        return closed
+
+    async def close(self) -> None:
+        while self._active:
+            key, (instance, _) = self._active.popitem(last=False)
+            await self._close(key, instance)
+        while self._retired:
+            _, (key, instance) = self._retired.popitem()
+            await self._close(key, instance)
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+    def _get_connector(self) -> TCPConnector:
+        if self._connector is None or self._connector.closed:
+            self._connector = TCPConnector(
+                limit=self.connection_limit,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+        return self._connector
+
+    async def _evict(self, key: TenantKey, instance: BaseMerchant) -> None:
+        if self._in_use.get(id(instance)):
+            self._retired[id(instance)] = key, instance
+        else:
+            await self._close(key, instance)
+
+    async def _close(self, key: TenantKey, instance: BaseMerchant) -> None:
+        # close_session also stops the merchant's payment watcher
+        try:
+            await instance.close_session()
+        except Exception as e:
+            events.emit("tenants.close_failed", level="WARNING", tenant=key[0], merchant=key[1], error=e)
@@ -0,0 +1,157 @@
+"""
+OpenTelemetry compatible tracing.
+
+Install any tracer with an OpenTelemetry-style ``start_as_current_span``,
+for example ``opentelemetry.trace.get_tracer("multi_merchant")``:
+
+    from multi_merchant import tracing
+    tracing.set_tracer(tracer)
+
+Without a tracer every helper here reduces to a global lookup, so the
+instrumentation costs nothing in production setups that don't trace.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import time
+import typing
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from aiohttp import TraceConfig
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT")
+
+_tracer: Optional[Any] = None
+
+
+def set_tracer(tracer: Optional[Any]) -> None:
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Any]:
+    return _tracer
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """Span around a block, or nothing when no tracer is installed."""
+    tracer = _tracer
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def traced(name: str) -> Callable[[Callable[..., typing.Awaitable[T]]], Callable[..., typing.Awaitable[T]]]:
+    """Decorator wrapping a coroutine function in a span."""
+
+    def decorator(func: Callable[..., typing.Awaitable[T]]) -> Callable[..., typing.Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            tracer = _tracer
+            if tracer is None:
+                return await func(*args, **kwargs)
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+def traced_method(name: str, func: Callable[..., typing.Awaitable[T]]) -> Callable[..., typing.Awaitable[T]]:
+    """Like ``traced`` for merchant methods, tagging the span with the merchant."""
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs) -> T:
+        tracer = _tracer
+        if tracer is None:
+            return await func(self, *args, **kwargs)
+        attributes = {"merchant": str(getattr(self, "merchant", type(self).__name__))}
+        with tracer.start_as_current_span(name, attributes=attributes):
+            return await func(self, *args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def validate(model: type[ModelT], data: Any) -> ModelT:
+    """
+    ``model.model_validate(data)`` inside a validation span.
+
+    Raw ``bytes``/``str`` bodies go through ``model_validate_json``.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _validate(model, data)
+    with tracer.start_as_current_span("validate", attributes={"model": model.__name__}):
+        return _validate(model, data)
+
+
+def _validate(model: type[ModelT], data: Any) -> ModelT:
+    if isinstance(data, (bytes, str)):
+        return model.model_validate_json(data)
+    return model.model_validate(data)
+
+
+def request_trace_configs() -> list[TraceConfig]:
+    """aiohttp trace configs for a new session; empty when not tracing."""
+    if _tracer is None:
+        return []
+    return [_http_trace_config]
+
+
+def _clean(attributes: dict[str, Any]) -> dict[str, Any]:
+    return {k: v if type(v) in (str, bool, int, float) else str(v) for k, v in attributes.items() if v is not None}
+
+
+# Connection phase timings for the span passed as ``trace_request_ctx``
+
+
+def _phase(ctx: SimpleNamespace, name: str) -> None:
+    current = (ctx.trace_request_ctx or {}).get("span")
+    if current is None:
+        return
+    now = time.perf_counter()
+    started = ctx.__dict__.setdefault("started", now)
+    current.set_attribute(f"http.{name}_ms", round((now - started) * 1000, 3))
+
+
+async def _on_request_start(session, ctx, params) -> None:
+    ctx.started = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params) -> None:
+    _phase(ctx, "dns")
+
+
+async def _on_connection_create_end(session, ctx, params) -> None:
+    _phase(ctx, "connect")
+
+
+async def _on_connection_reuseconn(session, ctx, params) -> None:
+    current = (ctx.trace_request_ctx or {}).get("span")
+    if current is not None:
+        current.set_attribute("http.connection_reused", True)
+
+
+async def _on_request_end(session, ctx, params) -> None:
+    _phase(ctx, "ttfb")
+    current = (ctx.trace_request_ctx or {}).get("span")
+    if current is not None:
+        current.set_attribute("http.status_code", params.response.status)
+
+
+_http_trace_config = TraceConfig()
+_http_trace_config.on_request_start.append(_on_request_start)
+_http_trace_config.on_dns_resolvehost_end.append(_on_dns_end)
+_http_trace_config.on_connection_create_end.append(_on_connection_create_end)
+_http_trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+_http_trace_config.on_request_end.append(_on_request_end)
+_http_trace_config.freeze()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from typing import Iterable, Optional
+
+from . import events
+from .admission import Priority, priority
+from .merchants.base import KEEPALIVE_TIMEOUT, BaseMerchant
+
+
+class MerchantWarmer:
+    """
+    Keeps configured merchants ready for the first real request.
+
+    ``start`` warms every merchant concurrently: provider hosts are
+    resolved (and cached by the session connector), keep-alive connections
+    are opened and metadata such as the YooMoney receiver or BetaTransfer
+    rates is prefetched. Afterwards connections are touched every
+    ``heartbeat`` seconds, which must stay below the connector keep-alive
+    timeout, and metadata is refreshed every ``prefetch_interval``.
+    """
+
+    def __init__(
+            self,
+            merchants: Iterable[BaseMerchant],
+            heartbeat: float | None = KEEPALIVE_TIMEOUT / 2,
+            prefetch_interval: float | None = 30 * 60,
+    ) -> None:
+        if heartbeat is not None and heartbeat >= KEEPALIVE_TIMEOUT:
+            raise ValueError(f"Heartbeat must be shorter than the keep-alive timeout ({KEEPALIVE_TIMEOUT}s)")
+        self.merchants = list(merchants)
+        self.heartbeat = heartbeat
+        self.prefetch_interval = prefetch_interval
+        self._prefetched_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> typing.Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def warm_up(self, prefetch: bool = True) -> None:
+        with priority(Priority.BACKGROUND):
+            results = await asyncio.gather(
+                *(merchant.warm_up(prefetch) for merchant in self.merchants),
+                return_exceptions=True,
+            )
+        for merchant, result in zip(self.merchants, results):
+            if isinstance(result, Exception):
+                events.emit(
+                    "merchant.warm_up_failed", level="WARNING", hot=True, merchant=merchant.merchant, error=result
+                )
+        if prefetch:
+            self._prefetched_at = time.monotonic()
+
+    async def start(self) -> None:
+        """Warm every merchant up, then keep them warm in the background."""
+        await self.warm_up()
+        if self.heartbeat is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._heartbeat_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            prefetch = (
+                    self.prefetch_interval is not None
+                    and time.monotonic() - self._prefetched_at >= self.prefetch_interval
+            )
+            await self.warm_up(prefetch)
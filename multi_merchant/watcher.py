@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import typing
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from . import deadlines, events
+from .admission import Priority, priority
+from .models.invoice import Status
+
+if typing.TYPE_CHECKING:
+    from .merchants.base import BaseMerchant
+    from .models.invoice import Invoice
+
+# Statuses after which an invoice is no longer watched
+FINAL_STATUSES = frozenset({Status.SUCCESS, Status.EXPIRED, Status.FAIL})
+
+
+@dataclass
+class _Watch:
+    invoice_id: str
+    # Loop time after which the invoice counts as expired
+    deadline: Optional[float]
+    status: Status = Status.PENDING
+    waiters: set[asyncio.Future] = field(default_factory=set)
+    subscribers: set[asyncio.Queue] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.waiters or self.subscribers)
+
+
+class PaymentWatcher:
+    """
+    Shared payment status checker of a merchant.
+
+    Every waiter registers here, and one background loop polls the pending
+    invoices in batches (``BaseMerchant.check_paid_batch``) every
+    ``poll_interval`` seconds. Payok and USDT read their transaction list
+    for the whole batch, the other merchants make concurrent ``is_paid``
+    calls. ``resolve`` settles an invoice right away, e.g. from a provider
+    notification. The loop stops when nobody is waiting or on ``close``.
+    """
+
+    def __init__(self, merchant: BaseMerchant, poll_interval: float = 5) -> None:
+        self.merchant = merchant
+        self.poll_interval = poll_interval
+        self._watches: dict[str, _Watch] = {}
+        self._checker: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._watches)
+
+    async def wait(self, invoice: Invoice, timeout: float | None = None) -> Status:
+        """
+        Wait until ``invoice`` is paid or expires.
+
+        Returns the final status, or ``Status.PENDING`` on timeout or at
+        the caller's deadline.
+        """
+        left = deadlines.remaining()
+        if left is not None:
+            timeout = max(min(left, timeout if timeout is not None else left), 0)
+        watch = self._watch(invoice)
+        if watch.status in FINAL_STATUSES:
+            return watch.status
+        waiter = asyncio.get_running_loop().create_future()
+        watch.waiters.add(waiter)
+        self._ensure_checker()
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return Status.PENDING
+        finally:
+            watch.waiters.discard(waiter)
+            self._forget(watch)
+
+    async def wait_paid(self, invoice: Invoice, timeout: float | None = None) -> bool:
+        return await self.wait(invoice, timeout) == Status.SUCCESS
+
+    async def changes(self, invoice: Invoice) -> AsyncIterator[Status]:
+        """Yield the current status of ``invoice`` and every change up to a final one."""
+        watch = self._watch(invoice)
+        queue: asyncio.Queue[Status] = asyncio.Queue()
+        watch.subscribers.add(queue)
+        self._ensure_checker()
+        try:
+            status = watch.status
+            yield status
+            while status not in FINAL_STATUSES:
+                status = await queue.get()
+                yield status
+        finally:
+            watch.subscribers.discard(queue)
+            self._forget(watch)
+
+    def resolve(self, invoice_id: str, status: Status) -> bool:
+        """Set the status of a watched invoice. False if nobody watches it."""
+        watch = self._watches.get(invoice_id)
+        if watch is None or watch.status == status:
+            return False
+        watch.status = status
+        for queue in watch.subscribers:
+            queue.put_nowait(status)
+        if status in FINAL_STATUSES:
+            for waiter in watch.waiters:
+                if not waiter.done():
+                    waiter.set_result(status)
+            del self._watches[invoice_id]
+        return True
+
+    async def close(self) -> None:
+        """Stop polling. Pending ``wait`` calls return ``Status.PENDING``."""
+        checker, self._checker = self._checker, None
+        if checker is not None:
+            checker.cancel()
+            try:
+                await checker
+            except asyncio.CancelledError:
+                pass
+        for watch in self._watches.values():
+            for waiter in watch.waiters:
+                if not waiter.done():
+                    waiter.set_result(Status.PENDING)
+
+    async def check(self) -> None:
+        """Check every watched invoice once."""
+        now = asyncio.get_running_loop().time()
+        for watch in list(self._watches.values()):
+            if watch.deadline is not None and watch.deadline <= now:
+                self.resolve(watch.invoice_id, Status.EXPIRED)
+        if not self._watches:
+            return
+        paid = await self.merchant.check_paid_batch(list(self._watches))
+        for invoice_id, is_paid in paid.items():
+            if is_paid:
+                self.resolve(invoice_id, Status.SUCCESS)
+
+    def _watch(self, invoice: Invoice) -> _Watch:
+        watch = self._watches.get(invoice.invoice_id)
+        if watch is None:
+            watch = _Watch(invoice.invoice_id, _deadline(invoice.expire_at))
+            if invoice.status in FINAL_STATUSES:
+                watch.status = Status(invoice.status)
+                return watch
+            self._watches[invoice.invoice_id] = watch
+        return watch
+
+    def _forget(self, watch: _Watch) -> None:
+        if not watch and self._watches.get(watch.invoice_id) is watch:
+            del self._watches[watch.invoice_id]
+
+    def _ensure_checker(self) -> None:
+        if self._checker is None or self._checker.done():
+            # The loop outlives the waiter that started it
+            with deadlines.detached():
+                self._checker = asyncio.create_task(self._check_loop())
+
+    async def _check_loop(self) -> None:
+        while self._watches:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                with priority(Priority.BACKGROUND):
+                    await self.check()
+            except Exception as e:
+                events.emit("watcher.check_failed", level="WARNING", hot=True, merchant=self.merchant.merchant, error=e)
+
+
+def _deadline(expire_at: datetime.datetime | None) -> float | None:
+    if expire_at is None:
+        return None
+    now = datetime.datetime.now(expire_at.tzinfo)
+    return asyncio.get_running_loop().time() + (expire_at - now).total_seconds()
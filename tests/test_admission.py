@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from multi_merchant.admission import AdmissionController, Overloaded, Priority, priority
+
+
+def test_background_lane_keeps_room_for_interactive():
+    async def main() -> None:
+        admission = AdmissionController("test", limit=4)
+        assert admission.lane_limits[Priority.BACKGROUND] == 2
+        for _ in range(2):
+            await admission.acquire(Priority.BACKGROUND)
+        background = asyncio.create_task(admission.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        assert admission.waiting(Priority.BACKGROUND) == 1
+
+        # The lane is full, not the merchant
+        await admission.acquire(Priority.INTERACTIVE)
+        assert admission.in_flight == 3
+        admission.release(Priority.BACKGROUND)
+        await background
+        assert admission.admitted == {Priority.BACKGROUND: 3, Priority.INTERACTIVE: 1}
+
+    asyncio.run(main())
+
+
+def test_freed_slots_go_to_the_highest_lane():
+    async def main() -> None:
+        admission = AdmissionController("test", limit=1)
+        order = []
+
+        async def call(lane: Priority) -> None:
+            with priority(lane):
+                async with admission.slot():
+                    order.append(lane)
+
+        await admission.acquire(Priority.INTERACTIVE)
+        calls = [asyncio.create_task(call(lane)) for lane in (Priority.BACKGROUND, Priority.USER_CHECK)]
+        await asyncio.sleep(0)
+        admission.release(Priority.INTERACTIVE)
+        await asyncio.gather(*calls)
+        assert order == [Priority.USER_CHECK, Priority.BACKGROUND]
+        assert admission.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_full_lane_rejects_new_calls():
+    async def main() -> None:
+        admission = AdmissionController("test", limit=1, max_waiting={Priority.USER_CHECK: 1})
+        await admission.acquire(Priority.INTERACTIVE)
+        waiting = asyncio.create_task(admission.acquire(Priority.USER_CHECK))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await admission.acquire(Priority.USER_CHECK)
+        assert admission.shed[Priority.USER_CHECK] == 1
+
+        # A cancelled waiter leaves the queue
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert admission.waiting() == 0
+
+    asyncio.run(main())
+
+
+def test_background_waiters_are_shed_under_overload():
+    async def main() -> None:
+        admission = AdmissionController("test", limit=1)
+        await admission.acquire(Priority.INTERACTIVE)
+        background = asyncio.create_task(admission.acquire(Priority.BACKGROUND))
+        interactive = [asyncio.create_task(admission.acquire(Priority.INTERACTIVE)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded):
+            await background
+        assert admission.shed[Priority.BACKGROUND] == 1
+        for _ in interactive:
+            admission.release(Priority.INTERACTIVE)
+            await asyncio.sleep(0)
+        await asyncio.gather(*interactive)
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import pytest
+
+from multi_merchant.merchants.betatransfer.gateways import GatewayIndex
+from multi_merchant.merchants.betatransfer.methods import BTCurrency, BTPaymentType
+from multi_merchant.merchants.betatransfer.rate import RateInfo
+
+RATES = RateInfo(
+    date="2024-04-04",
+    timestamp=0,
+    rates={"USD": 0.011, "UAH": 0.42, "UZS": 137.0, "KZT": 4.9, "BYN": 0.035, "TJS": 0.12, "AZN": 0.018},
+)
+
+
+def test_payment_type_is_in_the_gateway_currency():
+    choice = GatewayIndex(RATES).select(1000, "UAH", gateway_currencies={"UAH"})
+    assert choice is not None
+    assert choice.payment_type is BTPaymentType.Card5
+    # What BetaTrans sends as the payment currency
+    assert choice.payment_type.value.currency == BTCurrency.UAH
+    assert choice.native_amount == 1000
+    assert choice.gross_amount == pytest.approx(1000 / 0.905, abs=0.01)
+
+
+def test_gross_amount_is_converted_and_within_limits():
+    choice = GatewayIndex(RATES).select(1000, "RUB")
+    assert choice is not None
+    # Crypto has the lowest commission and accepts 11 USD
+    assert choice.gateway.name == "Crypto"
+    assert choice.native_amount == pytest.approx(11)
+    assert choice.gross_amount == pytest.approx(11 / 0.98, abs=0.01)
+    low, high = choice.gateway.min_amount, choice.gateway.max_amount
+    assert low <= choice.gross_amount <= high
+
+
+def test_commission_counts_towards_the_limits():
+    index = GatewayIndex(RATES)
+    # 5000 USD is Crypto's maximum, with 2% on top it doesn't fit
+    assert all(g.name != "Crypto" for g in index.eligible(5000, "USD"))
+    assert any(g.name == "Crypto" for g in index.eligible(4900, "USD"))
+
+
+def test_rates_change_the_decision():
+    choice = GatewayIndex(RATES).select(1000, "RUB")
+    assert choice is not None and choice.gateway.name == "Crypto"
+    # Without rates only RUB gateways can be priced
+    choice = GatewayIndex().select(1000, "RUB")
+    assert choice is not None and choice.gateway.currency == BTCurrency.RUB
+
+
+def test_gateway_currencies_limit_the_choice():
+    for index in (GatewayIndex(), GatewayIndex(RATES)):
+        for amount in (150, 500, 1000, 40000):
+            choice = index.select(amount, "RUB", gateway_currencies={"RUB"})
+            assert choice is not None
+            assert choice.gateway.currency == BTCurrency.RUB
+            net = 1 - choice.gateway.commission_in_percent / 100
+            assert choice.gross_amount == pytest.approx(amount / net, abs=0.01)
+    assert GatewayIndex(RATES).select(10, "UAH", gateway_currencies={"UAH"}) is None
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+from multi_merchant.capture import TrafficRecorder, load_records
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+from multi_merchant.models.draft import InvoiceDraft
+from multi_merchant.simulator import Simulator
+
+
+def test_recorder_writes_in_background(tmp_path, monkeypatch):
+    path = tmp_path / "traffic.jsonl.gz"
+    writers = set()
+    recorder = TrafficRecorder(path, flush_every=1)
+    write = recorder._file.write
+
+    def tracked_write(data: str) -> int:
+        writers.add(threading.current_thread().name)
+        return write(data)
+
+    monkeypatch.setattr(recorder._file, "write", tracked_write)
+
+    async def main() -> None:
+        async with Simulator() as sim:
+            urls = sim.urls(MerchantEnum.YOOKASSA)
+            merchant = YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA, **urls)
+            async with merchant:
+                invoice = await merchant.create_invoice(1, 100, InvoiceDraft)
+                await merchant.is_paid(invoice.invoice_id)
+
+    with recorder:
+        asyncio.run(main())
+
+    assert writers == {"multi-merchant-capture"}
+    records = list(load_records(path))
+    assert [record["m"] for record in records] == ["POST", "GET"]
+    assert recorder.records == 2
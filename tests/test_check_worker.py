@@ -0,0 +1,194 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+
+from multi_merchant.check_worker import InvoiceCheckWorker
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.models.invoice import Invoice, LeasedInvoice, Status
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class CheckedInvoice(LeasedInvoice, Base):
+    __tablename__ = "checked_invoices"
+
+
+class StubMerchant:
+    def __init__(self, paid: set[str] = frozenset()) -> None:
+        self.paid = paid
+        self.checked: list[str] = []
+
+    async def check_paid_batch(self, invoice_ids):
+        self.checked += invoice_ids
+        return {invoice_id: invoice_id in self.paid for invoice_id in invoice_ids}
+
+
+def run(tmp_path, scenario) -> None:
+    async def main() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'invoices.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            await scenario(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+async def add_invoices(sessionmaker, *invoice_ids: str, **values) -> None:
+    # Merchants write naive server-local expiry times
+    values.setdefault("expire_at", datetime.datetime.now() + datetime.timedelta(hours=1))
+    async with sessionmaker() as session, session.begin():
+        for invoice_id in invoice_ids:
+            session.add(CheckedInvoice(
+                user_id=1, amount=100, currency="RUB", invoice_id=invoice_id, merchant=MerchantEnum.PAYOK, **values,
+            ))
+
+
+async def invoices(sessionmaker) -> dict[str, CheckedInvoice]:
+    async with sessionmaker() as session:
+        return {invoice.invoice_id: invoice for invoice in (await session.execute(select(CheckedInvoice))).scalars()}
+
+
+def test_lease_keeps_other_workers_off(tmp_path):
+    async def scenario(sessionmaker) -> None:
+        await add_invoices(sessionmaker, "a", "b", "unscheduled")
+        # Rows from before the migration have no next_check_at
+        async with sessionmaker() as session, session.begin():
+            await session.execute(
+                update(CheckedInvoice).where(CheckedInvoice.invoice_id == "unscheduled").values(next_check_at=None)
+            )
+        merchants = {MerchantEnum.PAYOK: StubMerchant()}
+        first = InvoiceCheckWorker(sessionmaker, CheckedInvoice, merchants, worker_id="first")
+        second = InvoiceCheckWorker(sessionmaker, CheckedInvoice, merchants, worker_id="second")
+
+        assert sorted(item.invoice_id for item in await first.claim()) == ["a", "b", "unscheduled"]
+        assert await second.claim() == []
+
+        # The first worker died, its leases run out
+        async with sessionmaker() as session, session.begin():
+            await session.execute(
+                update(CheckedInvoice).values(lease_until=datetime.datetime.now() - datetime.timedelta(seconds=1))
+            )
+        assert len(await second.claim()) == 3
+        assert {invoice.lease_owner for invoice in (await invoices(sessionmaker)).values()} == {"second"}
+
+    run(tmp_path, scenario)
+
+
+def test_expired_invoices_are_not_checked(tmp_path):
+    async def scenario(sessionmaker) -> None:
+        await add_invoices(sessionmaker, "fresh")
+        await add_invoices(sessionmaker, "stale", expire_at=datetime.datetime.now() - datetime.timedelta(minutes=1))
+        merchant = StubMerchant()
+        worker = InvoiceCheckWorker(sessionmaker, CheckedInvoice, {MerchantEnum.PAYOK: merchant})
+
+        assert await worker.run_once() == 2
+        assert merchant.checked == ["fresh"]
+        result = await invoices(sessionmaker)
+        assert result["fresh"].status == Status.PENDING
+        assert result["stale"].status == Status.EXPIRED
+        assert result["stale"].lease_owner is None
+
+    run(tmp_path, scenario)
+
+
+def test_unpaid_invoices_back_off(tmp_path):
+    async def scenario(sessionmaker) -> None:
+        await add_invoices(sessionmaker, "unpaid", "paid")
+        merchant = StubMerchant(paid={"paid"})
+        worker = InvoiceCheckWorker(
+            sessionmaker, CheckedInvoice, {MerchantEnum.PAYOK: merchant}, recheck_interval=10, max_recheck_interval=30,
+        )
+
+        delays = []
+        for _ in range(3):
+            started = datetime.datetime.now()
+            await worker.run_once()
+            invoice = (await invoices(sessionmaker))["unpaid"]
+            assert invoice.lease_owner is None
+            delays.append(round((invoice.next_check_at - started).total_seconds()))
+            # Not due yet
+            assert await worker.run_once() == 0
+            async with sessionmaker() as session, session.begin():
+                await session.execute(update(CheckedInvoice).values(next_check_at=started))
+
+        assert delays == [10, 20, 30]
+        result = await invoices(sessionmaker)
+        assert result["unpaid"].check_attempts == 3
+        assert result["paid"].status == Status.SUCCESS
+        assert merchant.checked.count("paid") == 1
+
+    run(tmp_path, scenario)
+
+
+def test_failing_on_paid_rolls_back_only_its_invoice(tmp_path):
+    async def on_paid(session, invoice) -> None:
+        if invoice.invoice_id == "broken":
+            invoice.description = "granted"
+            raise RuntimeError("grant failed")
+        invoice.description = "granted"
+
+    async def scenario(sessionmaker) -> None:
+        await add_invoices(sessionmaker, "ok", "broken")
+        merchant = StubMerchant(paid={"ok", "broken"})
+        worker = InvoiceCheckWorker(sessionmaker, CheckedInvoice, {MerchantEnum.PAYOK: merchant}, on_paid=on_paid)
+
+        assert await worker.run_once() == 2
+        result = await invoices(sessionmaker)
+        assert (result["ok"].status, result["ok"].description) == (Status.SUCCESS, "granted")
+        # Released for a recheck after the backoff
+        assert (result["broken"].status, result["broken"].description) == (Status.PENDING, None)
+        assert result["broken"].lease_owner is None
+        assert result["broken"].check_attempts == 1
+
+    run(tmp_path, scenario)
+
+
+def test_unscheduled_invoices_come_first(tmp_path):
+    async def scenario(sessionmaker) -> None:
+        await add_invoices(sessionmaker, "scheduled", "unscheduled")
+        async with sessionmaker() as session, session.begin():
+            await session.execute(
+                update(CheckedInvoice).where(CheckedInvoice.invoice_id == "unscheduled").values(next_check_at=None)
+            )
+        statements = []
+        event.listen(
+            sessionmaker.kw["bind"].sync_engine,
+            "before_cursor_execute",
+            lambda connection, cursor, statement, *args: statements.append(statement),
+        )
+        worker = InvoiceCheckWorker(sessionmaker, CheckedInvoice, {}, batch_size=1)
+
+        assert [item.invoice_id for item in await worker.claim()] == ["unscheduled"]
+        # Explicit, PostgreSQL would sort NULLs last
+        order = "ORDER BY checked_invoices.next_check_at IS NOT NULL, checked_invoices.next_check_at"
+        assert any(order in statement for statement in statements)
+
+    run(tmp_path, scenario)
+
+
+def test_invoices_without_schedule_columns_are_rejected():
+    class PlainInvoice(Invoice, Base):
+        __tablename__ = "plain_invoices"
+
+    with pytest.raises(TypeError):
+        InvoiceCheckWorker(async_sessionmaker(), PlainInvoice, {})
+
+
+def test_fallback_lock_per_event_loop():
+    worker = InvoiceCheckWorker(async_sessionmaker(), CheckedInvoice, {})
+
+    async def lock() -> asyncio.Lock:
+        async with worker._lock():
+            pass
+        return worker._lock()
+
+    assert asyncio.run(lock()) is not asyncio.run(lock())
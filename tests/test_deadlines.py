@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from multi_merchant import deadlines
+from multi_merchant.admission import Priority
+from multi_merchant.deadlines import DeadlineExceeded, deadline
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+from multi_merchant.simulator import Simulator, SimulatorConfig
+from multi_merchant.simulator.config import LatencyProfile, ProviderProfile
+
+SLOW = SimulatorConfig(default=ProviderProfile(latency=LatencyProfile(distribution="constant", mean=0.2)))
+
+
+def run(scenario) -> None:
+    async def main() -> None:
+        async with Simulator(SLOW) as sim:
+            urls = sim.urls(MerchantEnum.YOOKASSA)
+            merchant = YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA, max_concurrency=1, **urls)
+            async with merchant:
+                await scenario(sim, merchant, f"{urls['create_url']}/payment")
+
+    asyncio.run(main())
+
+
+def test_passed_deadline_is_not_sent():
+    async def scenario(sim, merchant, url) -> None:
+        with deadline(0), pytest.raises(DeadlineExceeded):
+            await merchant.make_request("GET", url)
+        assert MerchantEnum.YOOKASSA not in sim.stats
+        assert merchant.admission.in_flight == 0
+
+    run(scenario)
+
+
+def test_deadline_expires_waiting_for_a_slot():
+    async def scenario(sim, merchant, url) -> None:
+        await merchant.admission.acquire(Priority.INTERACTIVE)
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            await merchant.make_request("GET", url)
+        # Left the queue without ever taking a slot
+        assert merchant.admission.waiting() == 0
+        assert merchant.admission.in_flight == 1
+        assert MerchantEnum.YOOKASSA not in sim.stats
+
+    run(scenario)
+
+
+def test_deadline_expires_after_admission():
+    async def scenario(sim, merchant, url) -> None:
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            await merchant.make_request("GET", url)
+        assert sim.stats[MerchantEnum.YOOKASSA]["requests"] == 1
+        assert merchant.admission.in_flight == 0
+
+        # Only the deadline raises DeadlineExceeded
+        with deadline(1), pytest.raises(TimeoutError) as error:
+            async with deadlines.scope("sleep", timeout=0.01):
+                await asyncio.sleep(1)
+        assert not isinstance(error.value, DeadlineExceeded)
+
+    run(scenario)
+
+
+def test_nested_deadlines_only_shorten():
+    with deadline(10):
+        with deadline(0.5):
+            assert deadlines.remaining() <= 0.5
+        with deadline(60):
+            assert deadlines.remaining() <= 10
+    assert deadlines.remaining() is None
+
+
+def test_detached_tasks_outlive_the_deadline():
+    async def background() -> float | None:
+        left = deadlines.remaining()
+        await asyncio.sleep(0.05)
+        deadlines.check("background")
+        return left
+
+    async def main() -> None:
+        with deadline(0.01):
+            with deadlines.detached():
+                task = asyncio.create_task(background())
+            inherited = asyncio.create_task(background())
+        assert await task is None
+        with pytest.raises(DeadlineExceeded):
+            await inherited
+        assert deadlines.remaining() is None
+
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+import io
+import json
+
+import pytest
+
+from multi_merchant.events import RESERVED_FIELDS, EventLog, JsonLinesSink
+
+
+def test_reserved_field_names_are_rejected():
+    stream = io.StringIO()
+    event_log = EventLog(sink=JsonLinesSink(stream))
+    try:
+        with pytest.raises(ValueError):
+            event_log.emit("invoice.created", event="created")
+        with pytest.raises(ValueError):
+            event_log.emit("invoice.created", t=1)
+        assert event_log.emit("invoice.created", merchant="yookassa")
+        event_log.flush()
+    finally:
+        event_log.close()
+    record = json.loads(stream.getvalue())
+    assert record["event"] == "invoice.created"
+    assert record["merchant"] == "yookassa"
+    # Everything the sink adds next to the fields is reserved
+    assert set(record) - {"merchant"} == RESERVED_FIELDS
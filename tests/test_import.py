@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+
+# Seconds for ``import multi_merchant`` in a fresh interpreter, aiohttp,
+# pydantic and SQLAlchemy included
+IMPORT_TIME_BUDGET = 2.0
+
+MERCHANT_SDKS = (
+    "AaioAPI",
+    "CryptoPayAPI",
+    "WalletPay",
+    "aiocryptopay",
+    "glQiwiApi",
+    "pyCryptomusAPI",
+    "pypayment",
+    "requests",
+    "stripe",
+    "yookassa",
+    "yoomoney",
+)
+
+SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import multi_merchant
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def import_package() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def test_import_loads_no_merchant_sdk():
+    modules = import_package()["modules"]
+    loaded = [name for name in modules if name.split(".")[0] in MERCHANT_SDKS]
+    assert loaded == []
+    merchants = [
+        name for name in modules
+        if name.startswith("multi_merchant.merchants.")
+        and name not in ("multi_merchant.merchants.base", "multi_merchant.merchants.registry")
+    ]
+    assert merchants == []
+
+
+def test_import_time_budget():
+    # Best of three, so a cold disk cache doesn't fail the test
+    elapsed = min(import_package()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_TIME_BUDGET
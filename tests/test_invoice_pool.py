@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+
+from multi_merchant.invoice_pool import UNASSIGNED_USER_ID, InvoicePool
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+from multi_merchant.models.invoice import Invoice
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class PooledInvoice(Invoice, Base):
+    __tablename__ = "pooled_invoices"
+
+
+def stub_provider(monkeypatch) -> list[dict]:
+    created = []
+
+    async def create_invoice(self, user_id, amount, InvoiceClass, currency, description=None, **kwargs):
+        created.append({"user_id": user_id, "description": description})
+        return InvoiceClass(
+            user_id=user_id,
+            amount=amount,
+            currency=currency,
+            invoice_id=f"yookassa-{len(created)}",
+            pay_url="https://pay",
+            description=description,
+            merchant=self.merchant,
+        )
+
+    monkeypatch.setattr(YooKassa, "create_invoice", create_invoice)
+    return created
+
+
+def run(tmp_path, scenario) -> None:
+    async def main() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'invoices.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            await scenario(async_sessionmaker(engine, expire_on_commit=False))
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_acquire_binds_a_ready_invoice(tmp_path, monkeypatch):
+    created = stub_provider(monkeypatch)
+    merchant = YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA)
+
+    async def scenario(sessionmaker) -> None:
+        pool = InvoicePool(PooledInvoice)
+        key = pool.add_tariff(merchant, 100, "RUB", min_size=2)
+        await pool.refill()
+        assert pool.available(key) == 2
+        # Created for nobody in particular
+        assert created == [{"user_id": UNASSIGNED_USER_ID, "description": "Product 100 RUB"}] * 2
+
+        async with sessionmaker() as session, session.begin():
+            invoice = await pool.acquire(session, 42, merchant, 100, "RUB")
+        assert invoice.invoice_id == "yookassa-1"
+        assert pool.available(key) == 1
+        async with sessionmaker() as session:
+            stored = (await session.execute(select(PooledInvoice))).scalar_one()
+        assert (stored.user_id, stored.description) == (42, "Product 100 RUB")
+
+        async with sessionmaker() as session:
+            assert await pool.acquire(session, 42, merchant, 500, "RUB") is None
+
+    run(tmp_path, scenario)
+
+
+def test_failed_flush_keeps_the_invoice_pooled(tmp_path, monkeypatch):
+    stub_provider(monkeypatch)
+    merchant = YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA)
+
+    async def scenario(sessionmaker) -> None:
+        pool = InvoicePool(PooledInvoice)
+        key = pool.add_tariff(merchant, 100, "RUB", min_size=1)
+        await pool.refill()
+
+        async def fail():
+            raise ConnectionError("database is gone")
+
+        async with sessionmaker() as session:
+            monkeypatch.setattr(session, "flush", fail)
+            with pytest.raises(ConnectionError):
+                await pool.acquire(session, 42, merchant, 100, "RUB")
+        assert pool.available(key) == 1
+
+        async with sessionmaker() as session, session.begin():
+            assert (await pool.acquire(session, 42, merchant, 100, "RUB")).invoice_id == "yookassa-1"
+
+    run(tmp_path, scenario)
@@ -0,0 +1,46 @@
+import asyncio
+
+from multi_merchant.merchants.base import PAYMENT_LIFETIME, MerchantEnum
+from multi_merchant.merchants.payok.merchant import PayokPay
+from multi_merchant.simulator import Simulator, SimulatorConfig, providers
+from multi_merchant.simulator.config import ProviderProfile
+
+
+def test_iter_transactions_pages_until_empty(monkeypatch):
+    # Pages smaller than the documented 100 must not end paging early
+    monkeypatch.setattr(providers, "PAYOK_PAGE_SIZE", 7)
+
+    async def main() -> None:
+        async with Simulator(SimulatorConfig(default=ProviderProfile(pay_after=0))) as sim:
+            ids = [sim.add_payment(MerchantEnum.PAYOK, 100, "RUB").id for _ in range(30)]
+            merchant = PayokPay(shop_id="1", api_id=1, api_key="key", secret="secret", merchant=MerchantEnum.PAYOK)
+            merchant.client.API_HOST = sim.urls(MerchantEnum.PAYOK)["API_HOST"]
+            try:
+                seen = [str(t.payment_id) async for t in merchant.client.iter_transactions()]
+                assert sorted(seen) == sorted(ids)
+                assert await merchant.reconcile_invoices([ids[0], "unknown"]) == {ids[0]: True, "unknown": False}
+            finally:
+                await merchant.close_session()
+
+    asyncio.run(main())
+
+
+def test_check_paid_batch_stops_at_expired_payments(monkeypatch):
+    monkeypatch.setattr(providers, "PAYOK_PAGE_SIZE", 5)
+
+    async def main() -> None:
+        async with Simulator(SimulatorConfig(default=ProviderProfile(pay_after=0))) as sim:
+            for _ in range(50):
+                sim.add_payment(MerchantEnum.PAYOK, 100, "RUB").created_at -= PAYMENT_LIFETIME + 3600
+            fresh = [sim.add_payment(MerchantEnum.PAYOK, 100, "RUB").id for _ in range(8)]
+            merchant = PayokPay(shop_id="1", api_id=1, api_key="key", secret="secret", merchant=MerchantEnum.PAYOK)
+            merchant.client.API_HOST = sim.urls(MerchantEnum.PAYOK)["API_HOST"]
+            try:
+                paid = await merchant.check_paid_batch([fresh[0], "unknown"])
+                assert paid == {fresh[0]: True, "unknown": False}
+                # Two pages of fresh payments, the second one reaching the expired ones
+                assert sim.stats[MerchantEnum.PAYOK]["requests"] == 2
+            finally:
+                await merchant.close_session()
+
+    asyncio.run(main())
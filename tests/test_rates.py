@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+
+import pytest
+from aiohttp import ClientResponseError, web
+
+from multi_merchant.merchants.betatransfer import rate
+from multi_merchant.merchants.betatransfer.rate import RateInfo, RateService
+
+RATES = {"base": "RUB", "date": "2024-04-04", "rates": {"USD": 0.0108, "UAH": 0.4256}, "timestamp": 1712178000}
+
+
+class RatesServer:
+    """Rates feed on localhost, counting requests."""
+
+    def __init__(self, delay: float = 0, status: int = 200) -> None:
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    async def __aenter__(self) -> "RatesServer":
+        app = web.Application()
+        app.router.add_get("/latest.js", self._latest)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/latest.js"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
+
+    async def _latest(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        return web.Response(text=json.dumps(RATES), content_type="application/javascript")
+
+
+def test_concurrent_gets_share_one_refresh():
+    async def main() -> None:
+        async with RatesServer(delay=0.1) as server:
+            service = RateService(rates_url=server.url)
+            try:
+                first = await asyncio.gather(*(service.get() for _ in range(10)))
+                assert server.requests == 1
+                assert all(rates is first[0] for rates in first)
+
+                # Expired: stale rates are served while one refresh runs
+                service.ttl = 0
+                stale = await asyncio.gather(*(service.get() for _ in range(10)))
+                assert all(rates is first[0] for rates in stale)
+                await service.refresh()
+                assert server.requests == 2
+            finally:
+                await service.close()
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_refresh():
+    async def main() -> None:
+        async with RatesServer(delay=0.1) as server:
+            service = RateService(rates_url=server.url)
+            try:
+                waiter = asyncio.create_task(service.refresh())
+                await asyncio.sleep(0.02)
+                waiter.cancel()
+                assert (await service.refresh()).rates == RATES["rates"]
+                assert server.requests == 1
+            finally:
+                await service.close()
+
+    asyncio.run(main())
+
+
+def test_failed_refresh_falls_back_to_snapshot(tmp_path):
+    snapshot = tmp_path / "rates.json"
+    snapshot.write_text(json.dumps(RATES))
+
+    async def main() -> None:
+        async with RatesServer(status=500) as server:
+            async with RateService(rates_url=server.url, snapshot_path=snapshot, ttl=0) as service:
+                assert server.requests == 0
+                assert (await service.get()).rates == RATES["rates"]
+                with pytest.raises(ClientResponseError):
+                    await service.refresh()
+                assert server.requests >= 1
+                assert (await service.get()).rates == RATES["rates"]
+                assert json.loads(snapshot.read_text()) == RATES
+
+    asyncio.run(main())
+
+
+def test_snapshot_write_is_atomic(tmp_path, monkeypatch):
+    snapshot = tmp_path / "rates.json"
+    new = RateInfo.model_validate({**RATES, "date": "2024-04-05"})
+
+    rate._write_snapshot(snapshot, new.model_dump_json())
+    assert RateInfo.model_validate_json(snapshot.read_text()) == new
+    assert os.listdir(tmp_path) == ["rates.json"]
+
+    # A write interrupted before the rename leaves the old snapshot intact
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(rate.os, "replace", fail)
+    with pytest.raises(OSError):
+        rate._write_snapshot(snapshot, RateInfo.model_validate(RATES).model_dump_json())
+    assert RateInfo.model_validate_json(snapshot.read_text()) == new
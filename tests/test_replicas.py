@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm.exc import DetachedInstanceError
+
+from multi_merchant.check_worker import InvoiceCheckWorker
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.models import InvoiceDraft, LeasedInvoice, SessionRouter
+from multi_merchant.models.invoice import Status
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class RoutedInvoice(LeasedInvoice, Base):
+    __tablename__ = "routed_invoices"
+
+
+class NeverPaid:
+    async def check_paid_batch(self, invoice_ids):
+        return {}
+
+
+def run(tmp_path, scenario) -> None:
+    # The replica never catches up, a read served by it misses every write
+    async def main() -> None:
+        engines = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}") for name in ("primary", "replica")]
+        for engine in engines:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+        try:
+            await scenario(*(async_sessionmaker(engine, expire_on_commit=False) for engine in engines))
+        finally:
+            for engine in engines:
+                await engine.dispose()
+
+    asyncio.run(main())
+
+
+def invoice(user_id: int, invoice_id: str, **values) -> RoutedInvoice:
+    return RoutedInvoice(
+        user_id=user_id, amount=100, currency="RUB", invoice_id=invoice_id, merchant=MerchantEnum.PAYOK, **values,
+    )
+
+
+def test_reads_follow_own_writes_then_return_to_replica(tmp_path, monkeypatch):
+    async def scenario(primary, replica) -> None:
+        clock = [1000.0]
+        monkeypatch.setattr("multi_merchant.models.replicas.time.monotonic", lambda: clock[0])
+        router = SessionRouter(primary, [replica], read_your_writes=5)
+        async with router.writer() as session, session.begin():
+            session.add(invoice(1, "a"))
+
+        assert [i.invoice_id for i in await RoutedInvoice.get_history(router, 1)] == ["a"]
+        assert (await RoutedInvoice.get_by_invoice_id(router, "a")).user_id == 1
+        # Another user's reads aren't affected
+        assert await RoutedInvoice.get_history(router, 2) == []
+        assert (router.primary_reads, router.replica_reads) == (2, 1)
+
+        clock[0] += 5
+        assert await RoutedInvoice.get_history(router, 1) == []
+        assert (router.primary_reads, router.replica_reads) == (2, 2)
+
+    run(tmp_path, scenario)
+
+
+def test_without_replicas_reads_go_to_primary(tmp_path):
+    async def scenario(primary, replica) -> None:
+        router = SessionRouter(primary)
+        async with primary() as session, session.begin():
+            session.add(invoice(1, "a"))
+
+        assert [i.invoice_id for i in await RoutedInvoice.get_history(router, 1)] == ["a"]
+        assert (router.primary_reads, router.replica_reads) == (1, 0)
+
+    run(tmp_path, scenario)
+
+
+def test_core_writes_are_routed(tmp_path):
+    async def scenario(primary, replica) -> None:
+        router = SessionRouter(primary, [replica], read_your_writes=60)
+        drafts = [InvoiceDraft(user_id=1, amount=100, currency="RUB", invoice_id="bulk")]
+        async with router.writer() as session, session.begin():
+            await InvoiceDraft.insert_many(session, RoutedInvoice, drafts)
+        assert router.recently_written(user_id=1) and router.recently_written(invoice_id="bulk")
+
+        async with primary() as session, session.begin():
+            session.add(invoice(2, "stale", expire_at=datetime.datetime.now() - datetime.timedelta(minutes=1)))
+        worker = InvoiceCheckWorker(router.writer, RoutedInvoice, {MerchantEnum.PAYOK: NeverPaid()})
+        assert not router.recently_written(user_id=2)
+        await worker.run_once()
+
+        assert router.recently_written(user_id=2)
+        assert (await RoutedInvoice.get_by_invoice_id(router, "stale")).status == Status.EXPIRED
+
+    run(tmp_path, scenario)
+
+
+def test_window_starts_at_commit(tmp_path, monkeypatch):
+    async def scenario(primary, replica) -> None:
+        clock = [1000.0]
+        monkeypatch.setattr("multi_merchant.models.replicas.time.monotonic", lambda: clock[0])
+        router = SessionRouter(primary, [replica], read_your_writes=5)
+        async with router.writer() as session, session.begin():
+            session.add(invoice(1, "a"))
+            await session.flush()
+            # Not visible to anyone before the commit
+            assert not router.recently_written(user_id=1)
+            clock[0] += 4
+        clock[0] += 4
+        assert router.recently_written(user_id=1)
+
+        async with router.writer() as session:
+            async with session.begin():
+                session.add(invoice(2, "rolled back"))
+                await session.flush()
+                await session.rollback()
+        assert not router.recently_written(user_id=2)
+
+    run(tmp_path, scenario)
+
+
+def test_router_reads_are_read_only(tmp_path):
+    async def scenario(primary, replica) -> None:
+        router = SessionRouter(primary)
+        async with router.writer() as session, session.begin():
+            session.add(invoice(1, "a"))
+
+        read = await RoutedInvoice.get_by_invoice_id(router, "a")
+        with pytest.raises(DetachedInstanceError):
+            read.status = Status.SUCCESS
+
+        async with router.writer() as session, session.begin():
+            session.add(read)
+            await read.successfully_paid()
+        assert (await RoutedInvoice.get_by_invoice_id(router, "a")).status == Status.SUCCESS
+        # No longer a router read
+        read.description = "changed locally"
+
+    run(tmp_path, scenario)
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.routing.hedging import HedgeBudget
+from multi_merchant.routing.router import MerchantLimits, MerchantRouter
+
+
+class StubMerchant:
+    def __init__(self, merchant: MerchantEnum, delay: float = 0, fail: bool = False) -> None:
+        self.merchant = merchant
+        self.delay = delay
+        self.fail = fail
+        self.created = 0
+
+    async def create_invoice(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.merchant} is down")
+        self.created += 1
+        return SimpleNamespace(invoice_id=f"{self.merchant.value}-{self.created}", merchant=self.merchant)
+
+
+def create(router: MerchantRouter, **kwargs):
+    return router.create_invoice(1, 100, SimpleNamespace, **kwargs)
+
+
+def test_candidates_follow_limits_and_cost():
+    cheap = StubMerchant(MerchantEnum.PAYOK)
+    costly = StubMerchant(MerchantEnum.YOOKASSA)
+    usd = StubMerchant(MerchantEnum.CRYPTO_CLOUD)
+    router = MerchantRouter(
+        [
+            (costly, MerchantLimits(fee_percent=3.5)),
+            (cheap, MerchantLimits(fee_percent=1.0, max_amount=1000)),
+            (usd, MerchantLimits(currencies=frozenset({"USD"}))),
+        ],
+        explore=0,
+    )
+    assert [route.merchant for route in router.candidates(100, "RUB")] == [cheap, costly]
+    assert [route.merchant for route in router.candidates(5000, "RUB")] == [costly]
+    assert router.choose(10, "USD") is usd
+
+
+def test_fallback_to_the_next_merchant():
+    async def main() -> None:
+        down = StubMerchant(MerchantEnum.PAYOK, fail=True)
+        up = StubMerchant(MerchantEnum.YOOKASSA)
+        router = MerchantRouter([(down, MerchantLimits()), (up, MerchantLimits(fee_percent=1))], explore=0)
+        invoice = await create(router)
+        assert invoice.merchant == MerchantEnum.YOOKASSA
+        assert router.get_route(down).stats.error_rate > 0
+
+        # The failure made it more expensive
+        assert router.candidates(100, "RUB")[0].merchant is up
+
+        router = MerchantRouter([(down, MerchantLimits()), (up, MerchantLimits(fee_percent=1))], explore=0)
+        with pytest.raises(RuntimeError):
+            await create(router, fallback=False)
+        assert up.created == 1
+
+    asyncio.run(main())
+
+
+def test_hedge_wins_and_loser_is_abandoned():
+    async def main() -> None:
+        abandoned = []
+        slow = StubMerchant(MerchantEnum.PAYOK, delay=0.3)
+        fast = StubMerchant(MerchantEnum.YOOKASSA, delay=0.01)
+        router = MerchantRouter(
+            [(slow, MerchantLimits()), (fast, MerchantLimits(fee_percent=1))],
+            explore=0,
+            default_latency=0.05,
+            on_abandoned=lambda route, invoice: abandoned.append(invoice.invoice_id),
+        )
+        invoice = await create(router, hedge=True)
+        assert invoice.merchant == MerchantEnum.YOOKASSA
+        assert router.hedge_budget.hedges == 1
+
+        await asyncio.gather(*router._background)
+        assert abandoned == ["payok-1"]
+        assert router.hedge_budget.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_hedge_without_alternate_route_costs_nothing():
+    async def main() -> None:
+        budget = HedgeBudget(ratio=0, burst=1)
+        slow = StubMerchant(MerchantEnum.PAYOK, delay=0.1)
+        router = MerchantRouter([slow], default_latency=0.01, hedge_budget=budget)
+        await create(router, hedge=True)
+        assert budget.hedges == 0
+        assert budget.try_acquire()
+
+    asyncio.run(main())
+
+
+def test_hedge_budget_limits():
+    budget = HedgeBudget(ratio=0.5, burst=1, max_in_flight=1)
+    assert budget.try_acquire()
+    # In flight limit, then no tokens left
+    assert not budget.try_acquire()
+    budget.release()
+    assert not budget.try_acquire()
+    budget.on_request()
+    budget.on_request()
+    assert budget.try_acquire()
+    assert budget.hedge_rate == 1.0
@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+import aiohttp
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.simulator import Simulator
+
+
+def test_yookassa_idempotence_key_under_concurrency():
+    async def slow_body():
+        # The body arrives after both requests were accepted
+        body = json.dumps({"amount": {"value": "100.00", "currency": "RUB"}}).encode()
+        yield body[:10]
+        await asyncio.sleep(0.05)
+        yield body[10:]
+
+    async def main() -> None:
+        async with Simulator() as sim, aiohttp.ClientSession() as session:
+            url = sim.urls(MerchantEnum.YOOKASSA)["create_url"]
+
+            async def create(key: str) -> str:
+                headers = {"Idempotence-Key": key, "Content-Type": "application/json"}
+                async with session.post(url, data=slow_body(), headers=headers) as response:
+                    return (await response.json())["id"]
+
+            first, second, other = await asyncio.gather(create("key"), create("key"), create("other"))
+            assert first == second != other
+            assert len(sim.payments) == 2
+
+    asyncio.run(main())
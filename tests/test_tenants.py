@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.payok.merchant import PayokPay
+from multi_merchant.models.invoice import Status
+from multi_merchant.tenants import TenantMerchantPool
+
+BETA_TRANSFER = {"merchant": MerchantEnum.BETA_TRANSFER_PAY.value, "public_key": "public", "api_key": "secret"}
+PAYOK = {"merchant": MerchantEnum.PAYOK.value, "shop_id": "1", "api_id": 1, "api_key": "key", "secret": "secret"}
+
+
+def test_second_beta_transfer_tenant_is_rejected():
+    async def main() -> None:
+        async with TenantMerchantPool() as pool:
+            await pool.add_tenant("first", [BETA_TRANSFER])
+            # Replacing the tenant's own config is fine
+            await pool.add_tenant("first", [BETA_TRANSFER, PAYOK])
+            with pytest.raises(ValueError):
+                await pool.add_tenant("second", [PAYOK, BETA_TRANSFER])
+            # Nothing of the rejected tenant is stored
+            assert pool.merchants_of("second") == []
+
+            await pool.remove_tenant("first")
+            await pool.add_tenant("second", [BETA_TRANSFER])
+            assert pool.merchants_of("second") == [MerchantEnum.BETA_TRANSFER_PAY]
+
+    asyncio.run(main())
+
+
+def test_evicted_merchant_in_use_is_closed_on_release():
+    async def main() -> None:
+        async with TenantMerchantPool(max_active=1, idle_ttl=None) as pool:
+            await pool.add_tenant("first", [PAYOK])
+            await pool.add_tenant("second", [PAYOK])
+            async with pool.use("first", MerchantEnum.PAYOK) as merchant:
+                session = merchant.client.get_session()
+                # The SDK client is on the pool's connector too
+                assert session.connector is pool._connector
+
+                await pool.get("second", MerchantEnum.PAYOK)
+                assert pool.evictions == 1 and pool.active == 1
+                assert not session.closed
+            assert session.closed
+            assert not pool._connector.closed
+
+    asyncio.run(main())
+
+
+def test_eviction_stops_the_watcher(monkeypatch):
+    async def check_paid_batch(self, invoice_ids):
+        return {}
+
+    monkeypatch.setattr(PayokPay, "check_paid_batch", check_paid_batch)
+
+    async def main() -> None:
+        async with TenantMerchantPool(max_active=1, idle_ttl=None) as pool:
+            await pool.add_tenant("first", [PAYOK])
+            await pool.add_tenant("second", [PAYOK])
+            merchant = await pool.get("first", MerchantEnum.PAYOK)
+            merchant.watcher.poll_interval = 0.01
+            invoice = SimpleNamespace(invoice_id="a", expire_at=None, status=Status.PENDING)
+            wait = asyncio.create_task(merchant.wait_paid(invoice))
+            await asyncio.sleep(0.015)
+
+            await pool.get("second", MerchantEnum.PAYOK)
+            assert not await wait
+            assert merchant.watcher._checker is None
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+from multi_merchant.models.invoice import Status
+from multi_merchant.watcher import PaymentWatcher
+
+
+class StubMerchant:
+    merchant = MerchantEnum.PAYOK
+
+    def __init__(self) -> None:
+        self.paid: set[str] = set()
+        self.batches: list[list[str]] = []
+
+    async def check_paid_batch(self, invoice_ids):
+        self.batches.append(sorted(invoice_ids))
+        return {invoice_id: invoice_id in self.paid for invoice_id in invoice_ids}
+
+
+def invoice(invoice_id: str, lifetime: float = 3600) -> SimpleNamespace:
+    expire_at = datetime.datetime.now() + datetime.timedelta(seconds=lifetime)
+    return SimpleNamespace(invoice_id=invoice_id, expire_at=expire_at, status=Status.PENDING)
+
+
+def test_waiters_share_one_polling_loop():
+    async def main() -> None:
+        merchant = StubMerchant()
+        watcher = PaymentWatcher(merchant, poll_interval=0.01)
+        waits = [asyncio.create_task(watcher.wait(invoice(invoice_id))) for invoice_id in ("a", "a", "b")]
+        await asyncio.sleep(0.015)
+        assert merchant.batches == [["a", "b"]]
+
+        merchant.paid.add("a")
+        assert watcher.resolve("b", Status.FAIL)
+        assert await asyncio.gather(*waits) == [Status.SUCCESS, Status.SUCCESS, Status.FAIL]
+        assert len(watcher) == 0
+
+        # Expired invoices aren't checked anymore
+        assert await watcher.wait(invoice("c", lifetime=0.01)) == Status.EXPIRED
+        assert await watcher.wait(invoice("d"), timeout=0.001) == Status.PENDING
+        assert len(watcher) == 0
+
+    asyncio.run(main())
+
+
+def test_close_stops_the_loop():
+    async def main() -> None:
+        merchant = StubMerchant()
+        watcher = PaymentWatcher(merchant, poll_interval=0.01)
+        wait = asyncio.create_task(watcher.wait(invoice("a")))
+        await asyncio.sleep(0.015)
+        checker = watcher._checker
+        await watcher.close()
+        assert checker.cancelled()
+        assert await wait == Status.PENDING
+
+        polled = len(merchant.batches)
+        await asyncio.sleep(0.03)
+        assert len(merchant.batches) == polled
+
+    asyncio.run(main())
+
+
+def test_close_session_closes_the_watcher(monkeypatch):
+    async def is_paid(self, invoice_id):
+        return False
+
+    monkeypatch.setattr(YooKassa, "is_paid", is_paid)
+
+    async def main() -> None:
+        merchant = YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA)
+        merchant.watcher.poll_interval = 0.01
+        wait = asyncio.create_task(merchant.wait_paid(invoice("a")))
+        await asyncio.sleep(0.015)
+        checker = merchant.watcher._checker
+        await merchant.close_session()
+        assert checker.done()
+        assert not await wait
+
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientError
+
+from multi_merchant.merchants.base import MerchantEnum
+from multi_merchant.merchants.yookassa.merchant import YooKassa
+
+SERVER_ERROR = {"type": "error", "code": "internal_server_error"}
+PAYMENT = {"id": "payment"}
+
+
+def yookassa(**kwargs) -> YooKassa:
+    return YooKassa(shop_id="1", api_key="key", merchant=MerchantEnum.YOOKASSA, retry_backoff=0.01, **kwargs)
+
+
+def script(monkeypatch, *responses):
+    """Answer the n-th request with ``responses[n]``: (delay, response or exception)."""
+    calls = []
+
+    async def make_request(self, method, url, **kwargs):
+        delay, response = responses[len(calls)]
+        calls.append(kwargs["headers"]["Idempotence-Key"])
+        await asyncio.sleep(delay)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(YooKassa, "make_request", make_request)
+    return calls
+
+
+def test_slow_creation_is_hedged_with_the_same_key(monkeypatch):
+    calls = script(monkeypatch, (0.3, PAYMENT), (0, PAYMENT))
+    merchant = yookassa(hedge_after=0.02)
+    assert asyncio.run(merchant.create_payment({}, "key")) == PAYMENT
+    assert calls == ["key", "key"]
+    assert merchant.hedge_rate == 1.0
+
+
+def test_retries_count_as_one_request(monkeypatch):
+    calls = script(monkeypatch, (0, SERVER_ERROR), (0, ClientError()), (0, PAYMENT))
+    merchant = yookassa(hedge_after=1)
+    assert asyncio.run(merchant.create_payment({}, "key")) == PAYMENT
+    assert calls == ["key"] * 3
+    assert merchant._hedge_budget.requests == 1
+    assert merchant.hedge_rate == 0.0
+    # Failures are part of the latency statistics
+    assert len(merchant._create_stats) == 3
+    assert merchant._create_stats.error_rate == pytest.approx(2 / 3)
+
+
+def test_retries_back_off(monkeypatch):
+    script(monkeypatch, (0, SERVER_ERROR), (0, SERVER_ERROR), (0, PAYMENT))
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record_sleep(delay, *args):
+        # The scripted responses sleep for 0
+        if delay:
+            delays.append(delay)
+        await sleep(0)
+
+    merchant = yookassa(hedge_after=1)
+    monkeypatch.setattr("multi_merchant.merchants.yookassa.merchant.asyncio.sleep", record_sleep)
+    asyncio.run(merchant.create_payment({}, "key"))
+    assert len(delays) == 2
+    assert 0.005 <= delays[0] <= 0.015
+    assert 0.01 <= delays[1] <= 0.03
+
+
+def test_no_retries_without_hedging(monkeypatch):
+    calls = script(monkeypatch, (0, ClientError()), (0, PAYMENT))
+    with pytest.raises(ClientError):
+        asyncio.run(yookassa().create_payment({}, "key"))
+    assert len(calls) == 1